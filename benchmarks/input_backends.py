@@ -0,0 +1,150 @@
+'''
+Package
+-------
+Benchmarks
+
+Module Name
+---------
+Input Backends
+
+Author
+-------
+Karl Goran Antony Zuvela
+
+Description
+-----------
+Compares the time taken by openpyxl and the fast xlsx reader to read the
+filter header columns of the input workbooks. By default the test extracts
+are read; with --rows, a synthetic extract of the given size is written first.
+'''
+#           --- Standard libraries ---
+import argparse
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from os import path
+from typing import Callable
+#           --- Third party libraries ---
+from openpyxl import Workbook, load_workbook
+#           --- First party libraries ---
+import phb_app.data.location_management as loc
+import phb_app.data.xlsx_workbook as xw
+
+TEST_DIR = path.join(path.dirname(path.dirname(path.abspath(__file__))), "test")
+TEST_EXTRACTS = (
+    "German_SAPX_Extract_July_August_2024.xlsx",
+    "England_timesheet_July_August_2024.xlsx"
+)
+SYNTHETIC_HEADERS = (
+    "Projekt-Element", "Projektbezeichnung", "Name der Person", "Buchdatum", "Stunden gesamt"
+)
+# Unused columns, as found in real extracts
+FILLER_COLUMNS = 10
+
+def _filter_header_names() -> frozenset[str]:
+    '''Returns the filter headers of all countries.'''
+    return frozenset(
+        header for locale in loc.CountryData().countries
+        for header in (
+            locale.filter_headers.name, locale.filter_headers.proj_id,
+            locale.filter_headers.description, locale.filter_headers.hours,
+            locale.filter_headers.date
+        )
+    )
+
+FILTER_HEADERS = _filter_header_names()
+
+def _header_columns(header_row: tuple) -> tuple[int, ...]:
+    '''Returns the columns of the filter headers, as read by the wizard.'''
+    return tuple(idx for idx, value in enumerate(header_row) if value in FILTER_HEADERS)
+
+def read_openpyxl(file_path: str, read_only: bool) -> int:
+    '''Reads the header columns of every row with openpyxl. Returns the number of rows.'''
+    workbook = load_workbook(file_path, read_only=read_only)
+    sheet = workbook[workbook.sheetnames[0]]
+    columns = _header_columns(next(sheet.iter_rows(max_row=1, values_only=True)))
+    count = 0
+    for row in sheet.iter_rows(min_row=2, values_only=True):
+        _ = tuple(row[col] if col < len(row) else None for col in columns)
+        count += 1
+    if read_only:
+        workbook.close()
+    return count
+
+def read_fast(file_path: str) -> int:
+    '''Reads the header columns of every row with the fast reader. Returns the number of rows.'''
+    workbook = xw.FastXlsxWorkbook(file_path)
+    sheet = workbook[workbook.sheetnames[0]]
+    columns = _header_columns(next(sheet.iter_rows(max_row=1)))
+    count = sum(1 for _ in sheet.iter_projected_rows(columns, min_row=2))
+    workbook.close()
+    return count
+
+def write_synthetic_extract(file_path: str, rows: int) -> None:
+    '''Writes an extract with the given number of booking rows.'''
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Tabelle1")
+    sheet.append(SYNTHETIC_HEADERS + tuple(f"Feld {idx}" for idx in range(FILLER_COLUMNS)))
+    start = datetime(2024, 7, 1)
+    rand = random.Random(0)
+    for _ in range(rows):
+        sheet.append((
+            f"P-{rand.randrange(100):04d}",
+            f"Projekt {rand.randrange(100)}",
+            f"Person {rand.randrange(200)}",
+            start + timedelta(days=rand.randrange(62)),
+            round(rand.uniform(0.25, 10.0), 2),
+            *(rand.random() for _ in range(FILLER_COLUMNS))
+        ))
+    workbook.save(file_path)
+
+def _time(func: Callable[[], int], repeat: int) -> tuple[float, int]:
+    '''Returns the best time in seconds and the row count of the function.'''
+    best = float("inf")
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = func()
+        best = min(best, time.perf_counter() - start)
+    return best, count
+
+def run(file_paths: list[str], repeat: int) -> None:
+    '''Prints the timings of each reader per file.'''
+    readers = {
+        "openpyxl": lambda fp: read_openpyxl(fp, read_only=False),
+        "openpyxl read-only": lambda fp: read_openpyxl(fp, read_only=True),
+        "fast": read_fast
+    }
+    for file_path in file_paths:
+        print(path.basename(file_path))
+        baseline = None
+        for name, reader in readers.items():
+            seconds, count = _time(lambda r=reader, fp=file_path: r(fp), repeat)
+            baseline = baseline or seconds
+            speedup = baseline / seconds
+            print(f"  {name:<20}{seconds * 1000:>10.1f} ms{speedup:>8.1f}x  ({count} rows)")
+
+def main() -> None:
+    '''Runs the benchmark.'''
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, help=(
+        "Benchmark a synthetic extract with this many rows"
+    ))
+    parser.add_argument("--repeat", type=int, default=3, help=(
+        "Runs per reader; the best is reported"
+    ))
+    args = parser.parse_args()
+    if args.rows:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = path.join(tmp_dir, f"synthetic_{args.rows}.xlsx")
+            write_synthetic_extract(file_path, args.rows)
+            run([file_path], args.repeat)
+    else:
+        run([path.join(TEST_DIR, name) for name in TEST_EXTRACTS], args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -15,25 +15,57 @@ Karl Goran Antony Zuvela
 Description
 -----------
 The main entry point to the Project Hours Budgeting Wizard.
+
+python -m phb_app [--profile]
 '''
 #           --- Standard libraries ---
+import argparse
 import sys
+import multiprocessing
 #           --- Third party libraries ---
 from PyQt6.QtWidgets import QApplication
 #           --- First party libraries ---
+import phb_app.daemon as dmn
 import phb_app.data.location_management as loc
 import phb_app.data.workbook_management as wm
 import phb_app.wizard.phb_wizard_gui as wg
-import phb_app.wizard.constants.ui_strings as st
+import phb_app.wizard.constants.colours as co
+import phb_app.logging.profiler as pr
+
+def parse_args() -> tuple[argparse.Namespace, list[str]]:
+    '''Parses the wizard's options, leaving any other arguments to Qt.'''
+    parser = argparse.ArgumentParser(description="Project Hours Budgeting Wizard")
+    parser.add_argument("--profile", action="store_true", help=(
+        "Profile the session and write the profile next to the log, else next to the first input"
+    ))
+    return parser.parse_known_args()
 
 def main():
     '''Main entry point to program.'''
 
-    app = QApplication(sys.argv)
-    st.set_app_default_font_theme(app)
-    window = wg.PHBWizard(loc.CountryData(), wm.WorkbookManager())
+    args, qt_args = parse_args()
+    profiler = pr.SessionProfiler() if args.profile else None
+    if profiler:
+        profiler.start()
+    app = QApplication([sys.argv[0], *qt_args])
+    co.set_app_default_font_theme(app)
+    wb_mngr = wm.WorkbookManager()
+    # Inputs already parsed by a running daemon are taken from it
+    wb_mngr.daemon = dmn.DaemonClient()
+    window = wg.PHBWizard(loc.CountryData(), wb_mngr)
     window.show()
-    sys.exit(app.exec())
+    exit_code = app.exec()
+    if profiler:
+        profiler.stop()
+        profile_path = profiler.write(
+            pr.get_session_profile_dir(wb_mngr), pr.get_session_tags(wb_mngr)
+        )
+        print(f"Profile written to {profile_path}", file=sys.stderr)
+    # Stop watching the input files before exiting
+    wb_mngr.close()
+    sys.exit(exit_code)
 
 if __name__ == "__main__":
+    # Required for the aggregation worker processes in the frozen executable
+    multiprocessing.freeze_support()
     main()
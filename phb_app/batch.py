@@ -0,0 +1,350 @@
+'''
+Package
+-------
+Project Hours Budgeting
+
+Module Name
+---------
+Batch
+
+Author
+-------
+Karl Goran Antony Zuvela
+
+Description
+-----------
+Headless batch run of the project hours budgeting. Prints the accumulated hours per
+employee and project of the given input workbooks for a month, or a range of months.
+The inputs are parsed in this process, or by a running daemon, which keeps them in
+memory between runs. With --output, the hours are recorded in any number of budgeting
+files, all against the inputs parsed once, each with the hours of all projects, of the
+--project IDs or of its own project IDs, e.g. budget_Projekt_B.xlsx:P1,P2; with
+--dry-run, the cells which would change are printed instead, from what to what, and
+nothing is saved. With --history, the hours of earlier runs are queried from the
+history store. With --profile, the run is profiled and the profile written next to
+the first budgeting file, else the first input.
+
+python -m phb_app.batch INPUT [INPUT ...] --month 7 --year 2024 [--months 3]
+    [--country COUNTRY] [--project ID ...] [--employee NAME ...] [--json] [--daemon [--port PORT]]
+    [--output BUDGET.xlsx[:ID,...] ... [--sheet SHEET] [--dry-run]] [--profile]
+python -m phb_app.batch --history --employee NAME --month 7 --year 2024 [--months 18]
+    [--project ID ...]
+'''
+#           --- Standard libraries ---
+import argparse
+import json
+import multiprocessing
+import sys
+from dataclasses import asdict
+from os import path
+from typing import Optional
+#           --- First party libraries ---
+import phb_app.data.location_management as loc
+import phb_app.data.workbook_management as wm
+import phb_app.data.aggregation as agg
+import phb_app.data.history_store as hs
+import phb_app.data.ingestion_settings as ing
+import phb_app.data.name_index as nx
+import phb_app.daemon as dmn
+import phb_app.logging.exceptions as ex
+import phb_app.logging.profiler as pr
+import phb_app.utils.date_utils as du
+import phb_app.utils.hours_utils as hu
+import phb_app.utils.output_utils as ou
+import phb_app.wizard.constants.ui_strings as st
+
+type HoursByEmployee = dict[str, dict[str, float]]
+# Hours of each month with the name of every employee of the inputs
+type InputHours = tuple[ou.MonthHours, list[str]]
+
+DEFAULT_HISTORY_MONTHS = 18
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    '''Parses the command line.'''
+    parser = argparse.ArgumentParser(
+        description="Sums the hours per employee and project of input workbooks for a month."
+    )
+    parser.add_argument("inputs", nargs="*", help="Input workbooks (xlsx, csv or tsv)")
+    parser.add_argument("--month", type=int, required=True, help="Month number, 1 to 12")
+    parser.add_argument("--year", type=int, required=True)
+    parser.add_argument("--months", type=int, help=(
+        "Number of months from the given month on; with --history up to it "
+        f"(default {DEFAULT_HISTORY_MONTHS})"
+    ))
+    parser.add_argument("--country", help="Country of all inputs; by default from each file name")
+    parser.add_argument("--project", action="append", dest="projects", help=(
+        "Only this project ID; repeatable"
+    ))
+    parser.add_argument("--employee", action="append", dest="employees", help=(
+        "Only this employee; repeatable"
+    ))
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    parser.add_argument("--daemon", action="store_true", help=(
+        "Use the running daemon instead of parsing the inputs here"
+    ))
+    parser.add_argument("--port", type=int, help="Daemon port; by default the configured port")
+    parser.add_argument("--history", action="store_true", help=(
+        "Query the history store for the employees instead of reading inputs"
+    ))
+    parser.add_argument("--output", action="append", dest="outputs", type=parse_output, help=(
+        "Budgeting file to record the hours in, optionally only of its project IDs, "
+        "e.g. FILE:ID,ID; repeatable"
+    ))
+    parser.add_argument("--sheet", help="Worksheet of the budgeting files; by default their first")
+    parser.add_argument("--dry-run", action="store_true", help=(
+        "Print the cells --output would change without saving"
+    ))
+    parser.add_argument("--profile", action="store_true", help=(
+        "Profile the run and write the profile next to the outputs or inputs"
+    ))
+    args = parser.parse_args(argv)
+    if not 1 <= args.month <= 12:
+        parser.error("--month must be between 1 and 12")
+    if args.months is not None and args.months < 1:
+        parser.error("--months must be at least 1")
+    if args.history and not args.employees:
+        parser.error("--history requires at least one --employee")
+    if not args.history and not args.inputs:
+        parser.error("at least one input workbook is required")
+    if args.dry_run and not args.outputs:
+        parser.error("--dry-run requires at least one --output")
+    return args
+
+def parse_output(text: str) -> tuple[str, Optional[list[str]]]:
+    '''Parses a budgeting file of --output, optionally followed by its project IDs, e.g.
+    "budget_Projekt_B.xlsx:P1,P2". The colon of a drive, e.g. "C:\\budget.xlsx", is kept.'''
+    file_path, sep, proj_text = text.rpartition(":")
+    if not sep or len(file_path) <= 1 or any(char in proj_text for char in "/\\"):
+        return text, None
+    proj_ids = [proj_id.strip() for proj_id in proj_text.split(",") if proj_id.strip()]
+    return file_path, proj_ids or None
+
+def get_output_paths(args: argparse.Namespace) -> list[str]:
+    '''Returns the paths of the budgeting files of --output.'''
+    return [file_path for file_path, _ in args.outputs or []]
+
+def get_collected_projects(args: argparse.Namespace) -> Optional[list[str]]:
+    '''Returns the project IDs to sum the hours of. With --output, the hours of every project
+    are summed, as each budgeting file selects its own.'''
+    return None if args.outputs else args.projects
+
+def get_months(args: argparse.Namespace) -> list[tuple[int, int]]:
+    '''Returns the month and year of each month from the given month on.'''
+    return list(du.yield_range_months(args.month, args.year, args.months or 1))
+
+def compute_hours_locally(args: argparse.Namespace) -> InputHours:
+    '''Parses the inputs in this process, or takes them from the history store, and sums
+    their hours in each month. Returns them with every employee name of the inputs.'''
+    country_data = loc.CountryData()
+    wb_mngr = wm.WorkbookManager()
+    try:
+        for file_path in args.inputs:
+            ctx = wm.load_input_context(file_path, country_data, args.country, wb_mngr)
+            wb_mngr.add_workbook(st.IORole.INPUTS, ctx)
+        proj_ids = get_collected_projects(args)
+        month_hours = ou.collect_range_hours(
+            wb_mngr, get_months(args), set(proj_ids) if proj_ids else None
+        )
+        return month_hours, ou.collect_input_names(wb_mngr)
+    finally:
+        wb_mngr.close()
+
+def compute_hours_with_daemon(args: argparse.Namespace) -> InputHours:
+    '''Requests the summed hours of each month from the running daemon. Returns them with
+    every employee name of the inputs.'''
+    client = dmn.DaemonClient(args.port)
+    inputs = [
+        {"path": path.abspath(file_path), "country": args.country}
+        for file_path in args.inputs
+    ]
+    responses = {
+        (month, year): client.request({
+            "op": "aggregate",
+            "inputs": inputs,
+            "month": month,
+            "year": year,
+            "projects": get_collected_projects(args)
+        })
+        for month, year in get_months(args)
+    }
+    names = dict.fromkeys(
+        name for response in responses.values() for name in response.get("names", [])
+    )
+    return {month: response["employees"] for month, response in responses.items()}, list(names)
+
+def select_employees(hours: HoursByEmployee, employees: Optional[list[str]]) -> HoursByEmployee:
+    '''Returns the hours of only the given employees, or of all if none are given.'''
+    if not employees:
+        return hours
+    return {name: projects for name, projects in hours.items() if name in employees}
+
+def select_month_employees(
+    month_hours: ou.MonthHours,
+    employees: Optional[list[str]]
+) -> ou.MonthHours:
+    '''Returns the hours of each month of only the given employees, or of all if none are given.'''
+    return {month: select_employees(hours, employees) for month, hours in month_hours.items()}
+
+def query_history(args: argparse.Namespace) -> HoursByEmployee:
+    '''Returns the stored hours of the employees per month over the months up to the given month.'''
+    store = hs.open_history_store(query_only=True)
+    if store is None:
+        raise ex.HistoryUnavailable()
+    end_key = agg.to_month_key(args.month, args.year)
+    start_key = end_key - (args.months or DEFAULT_HISTORY_MONTHS) + 1
+    hours: HoursByEmployee = {}
+    try:
+        for name in args.employees:
+            months = hours.setdefault(name, {})
+            for year, month, proj_id, proj_hours in store.query_hours(
+                name, args.projects, (start_key % 12 + 1, start_key // 12), (args.month, args.year)
+            ):
+                label = f"{year}-{month:02d} {proj_id}"
+                months[label] = months.get(label, 0.0) + proj_hours
+    finally:
+        store.close()
+    return hours
+
+def record_outputs(
+    args: argparse.Namespace,
+    month_hours: ou.MonthHours,
+    input_names: Optional[list[str]] = None
+) -> list[ou.OutputResult]:
+    '''Records the hours in every budgeting file, of its own project IDs, else of --project.'''
+    jobs = [
+        ou.OutputJob(
+            path.abspath(file_path), args.month, args.year, args.months or 1, args.sheet,
+            args.dry_run, tuple(proj_ids or args.projects or ()) or None
+        )
+        for file_path, proj_ids in args.outputs
+    ]
+    month_hours = select_month_employees(month_hours, args.employees)
+    workers = ing.get_ingestion_settings().output_workers
+    return ou.process_outputs(jobs, month_hours, workers, input_names)
+
+def format_hours_table(hours: HoursByEmployee) -> list[str]:
+    '''Formats the hours as aligned lines of employee, project and hours,
+    with a total per employee.'''
+    rows = [
+        (name, proj_id, f"{proj_hours:.2f}")
+        for name, projects in sorted(hours.items())
+        for proj_id, proj_hours in list(projects.items()) + [("Total", sum(projects.values()))]
+    ]
+    if not rows:
+        return ["No hours found."]
+    name_width = max(len(row[0]) for row in rows)
+    proj_width = max(len(row[1]) for row in rows)
+    return [
+        f"{name.ljust(name_width)}  {proj_id.ljust(proj_width)}  {value.rjust(10)}"
+        for name, proj_id, value in rows
+    ]
+
+def format_hours(hours: HoursByEmployee, as_json: bool) -> str:
+    '''Formats the hours as JSON or as a table.'''
+    if as_json:
+        return json.dumps(hours, indent=2, ensure_ascii=False)
+    return "\n".join(format_hours_table(hours))
+
+def format_cell_value(value: object) -> str:
+    '''Formats a cell value of the dry run, numbers without float noise.'''
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"{value:g}"
+    return repr(value)
+
+def format_output_result(result: ou.OutputResult, dry_run: bool = False) -> str:
+    '''Formats the outcome of recording hours in a budgeting file, or of a dry run.'''
+    file_name = path.basename(result.file_path)
+    if result.error:
+        return f"{file_name}: failed: {result.error}"
+    employees = len({entry.name for entry in result.entries})
+    suggestions = [
+        f"  not in the inputs: {name}"
+        + (f"; similar: {nx.format_suggestions(similar)}" if similar else "")
+        for name, similar in result.suggestions.items()
+    ]
+    header = f"{file_name} [{result.sheet_name}]:"
+    if not dry_run:
+        written = f"{header} {result.written} cells written for {employees} employees"
+        return "\n".join([written, *suggestions])
+    lines = [f"{header} {len(result.changes)} cells would change for {employees} employees"]
+    lines.extend(format_cell_change(change) for change in result.changes)
+    return "\n".join(lines + suggestions)
+
+def format_cell_change(change: hu.CellChange) -> str:
+    '''Formats a cell of the dry run with its old and new value, and style if it changes.'''
+    old_value, new_value = format_cell_value(change.old_value), format_cell_value(change.new_value)
+    line = f"  {change.coord}: {old_value} -> {new_value}"
+    if change.old_style != change.new_style:
+        line += f"  ({change.old_style} -> {change.new_style})"
+    return line
+
+def print_hours(args: argparse.Namespace, month_hours: ou.MonthHours) -> None:
+    '''Prints the hours of one month as before, or of each month of a range.'''
+    month_hours = select_month_employees(month_hours, args.employees)
+    if args.months is None:
+        print(format_hours(month_hours[(args.month, args.year)], args.json))
+        return
+    labelled = {f"{year}-{month:02d}": hours for (month, year), hours in month_hours.items()}
+    if args.json:
+        print(json.dumps(labelled, indent=2, ensure_ascii=False))
+        return
+    for label, hours in labelled.items():
+        print("\n".join([f"* {label}", *format_hours_table(hours), ""]))
+
+def get_profile_dir(args: argparse.Namespace) -> str:
+    '''Returns the directory of the first budgeting file, where the wizard writes its log,
+    else of the first input, else the working directory.'''
+    files = get_output_paths(args) + args.inputs
+    return path.dirname(path.abspath(files[0])) if files else path.abspath(".")
+
+def get_profile_tags(args: argparse.Namespace) -> pr.ProfileTags:
+    '''Returns the sizes of the run's files and the months summed.'''
+    return {
+        **pr.get_platform_tags(),
+        "Months": str(args.months or 1),
+        **pr.get_file_tags(args.inputs, "Input"),
+        **pr.get_file_tags(get_output_paths(args), "Budgeting file")
+    }
+
+def main(argv: Optional[list[str]] = None) -> int:
+    '''Runs the batch, profiled with --profile. Returns the exit code.'''
+    args = parse_args(argv)
+    if not args.profile:
+        return run(args)
+    with pr.SessionProfiler() as profiler:
+        exit_code = run(args)
+    profile_path = profiler.write(get_profile_dir(args), get_profile_tags(args))
+    print(f"Profile written to {profile_path}", file=sys.stderr)
+    return exit_code
+
+def run(args: argparse.Namespace) -> int:
+    '''Runs the batch and prints the result. Returns the exit code.'''
+    try:
+        if args.history:
+            print(format_hours(query_history(args), args.json))
+            return 0
+        compute_hours = compute_hours_with_daemon if args.daemon else compute_hours_locally
+        month_hours, input_names = compute_hours(args)
+    except (
+        ex.WorkbookLoadError, ex.CountryIdentifiersNotInFilename, ex.DaemonUnavailable,
+        ex.DaemonRequestError, ex.HistoryUnavailable, KeyError
+    ) as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    if not args.outputs:
+        print_hours(args, month_hours)
+        return 0
+    results = record_outputs(args, month_hours, input_names)
+    if args.json:
+        # Old values may be dates
+        print(json.dumps(
+            [asdict(result) for result in results], indent=2, ensure_ascii=False, default=str
+        ))
+    else:
+        print("\n".join(format_output_result(result, args.dry_run) for result in results))
+    return 1 if any(result.error for result in results) else 0
+
+if __name__ == "__main__":
+    # Required for the aggregation and output worker processes in the frozen executable
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,338 @@
+'''
+Package
+-------
+Project Hours Budgeting
+
+Module Name
+---------
+Daemon
+
+Author
+-------
+Karl Goran Antony Zuvela
+
+Description
+-----------
+Optional long-lived local process which keeps parsed input workbooks in memory.
+Clients, such as the batch CLI, connect over localhost TCP and send one JSON request
+per line; every response is one JSON line. Inputs are loaded on first use and then
+watched on disk, so repeated requests against unchanged inputs are answered from memory.
+As any local user can connect, every request carries a token which the daemon writes
+on start to a file only its user can read, in the user's home directory.
+
+Start with: python -m phb_app.daemon [--port PORT]
+
+Requests:
+    {"op": "ping"}
+    {"op": "status"}
+    {"op": "projects", "inputs": [...]}
+    {"op": "bookings", "inputs": [...]}
+    {"op": "aggregate", "inputs": [...], "month": 7, "year": 2024,
+     "projects": [...], "employees": [...]}
+    {"op": "shutdown"}
+Inputs are file paths or objects of "path" and "country". Projects and employees are optional.
+Every request also holds the "token".
+Responses are {"ok": true, "result": ..., "elapsed_ms": ...} or {"ok": false, "error": ...}.
+'''
+#           --- Standard libraries ---
+import argparse
+import hmac
+import json
+import multiprocessing
+import os
+import secrets
+import socket
+import socketserver
+import sqlite3
+import threading
+import time
+import zipfile
+from os import path
+from xml.etree import ElementTree
+from typing import Any, Callable, Optional
+#           --- First party libraries ---
+import phb_app.data.location_management as loc
+import phb_app.data.workbook_management as wm
+import phb_app.data.aggregation as agg
+import phb_app.data.booking_management as bm
+import phb_app.data.history_store as hs
+import phb_app.data.ingestion_settings as ing
+import phb_app.logging.exceptions as ex
+import phb_app.utils.file_handling_utils as fu
+import phb_app.utils.hours_utils as hu
+import phb_app.wizard.constants.ui_strings as st
+
+type Request = dict[str, Any]
+type Response = dict[str, Any]
+
+LOCALHOST = "127.0.0.1"
+ENCODING = "utf-8"
+SHUTDOWN = "shutdown"
+CONNECT_TIMEOUT = 5.0
+TOKEN_BYTES = 32
+
+#           --- SERVICE ---
+
+class AggregationService:
+    '''Owns the workbook manager of the daemon and answers the requests.'''
+    __slots__ = ('wb_mngr', 'country_data', '_handlers')
+
+    def __init__(
+        self,
+        wb_mngr: Optional[wm.WorkbookManager] = None,
+        country_data: Optional[loc.CountryData] = None
+    ) -> None:
+        self.wb_mngr = wb_mngr or wm.WorkbookManager()
+        self.country_data = country_data or loc.CountryData()
+        self._handlers: dict[str, Callable[[Request], Any]] = {
+            "ping": lambda _: "pong",
+            "status": self._status,
+            "projects": self._projects,
+            "bookings": self._bookings,
+            "aggregate": self._aggregate
+        }
+
+    def handle(self, request: Request) -> Response:
+        '''Answers a request. Errors are returned in the response rather than raised.'''
+        start = time.perf_counter()
+        handler = self._handlers.get(request.get("op"))
+        if handler is None:
+            return {"ok": False, "error": f"Unknown operation: {request.get('op')}"}
+        try:
+            # Requests add workbooks to the manager, so they are answered one at a time.
+            # The lock also keeps the watcher from swapping in a reloaded input meanwhile.
+            with self.wb_mngr.lock:
+                result = handler(request)
+        except (
+            ex.WorkbookLoadError, ex.CountryIdentifiersNotInFilename,
+            KeyError, ValueError, TypeError,
+            # The history store, a corrupt sheet of the fast xlsx reader and the file system
+            sqlite3.Error, ElementTree.ParseError, zipfile.BadZipFile, OSError
+        ) as exc:
+            return {"ok": False, "error": str(exc)}
+        return {"ok": True, "result": result, "elapsed_ms": (time.perf_counter() - start) * 1000}
+
+    def close(self) -> None:
+        '''Stops watching the input files.'''
+        self.wb_mngr.close()
+
+    def _get_inputs(self, request: Request) -> list[wm.InputWorkbookContext]:
+        '''Returns the ingested contexts of the requested inputs, loading those not yet in memory
+        and those changed on disk since they were loaded.'''
+        contexts = []
+        for spec in request["inputs"]:
+            if isinstance(spec, str):
+                file_path, country = spec, None
+            else:
+                file_path, country = spec["path"], spec.get("country")
+            file_path = path.abspath(file_path)
+            ctx = next((
+                ctx for ctx in self.wb_mngr.yield_workbook_ctxs_by_role(st.IORole.INPUTS)
+                if ctx.mngd_wb.file_path == file_path
+            ), None)
+            # The watcher reloads changed files, but may not have noticed the change yet.
+            # Its reloads update the fingerprint of the workbook.
+            if ctx and ctx.mngd_wb.fingerprint != fu.get_file_fingerprint(file_path):
+                self.wb_mngr.remove_wb_ctx_by_uuid(st.IORole.INPUTS, ctx.mngd_wb.uuid)
+                ctx = None
+            if ctx is None:
+                ctx = wm.load_input_context(file_path, self.country_data, country, self.wb_mngr)
+                self.wb_mngr.add_workbook(st.IORole.INPUTS, ctx)
+            # An input requested twice is summed once
+            if all(ctx is not other for other in contexts):
+                contexts.append(ctx)
+        # Bookings are only duplicates of the other requested inputs
+        hu.aggregate_input_bookings(self.wb_mngr, contexts)
+        self.wb_mngr.apply_memory_budget()
+        return contexts
+
+    def _status(self, _: Request) -> dict[str, Any]:
+        '''Returns the inputs held in memory.'''
+        return {
+            "inputs": [
+                {
+                    "path": ctx.mngd_wb.file_path,
+                    "country": ctx.locale_data.country,
+                    "revision": ctx.mngd_wb.revision,
+                    "bookings": len(ctx.managed_sheet.bookings)
+                }
+                for ctx in self.wb_mngr.yield_workbook_ctxs_by_role(st.IORole.INPUTS)
+            ]
+        }
+
+    def _projects(self, request: Request) -> dict[str, dict[str, list[str]]]:
+        '''Returns the project IDs and descriptions per input.'''
+        return {
+            ctx.mngd_wb.file_path: ctx.managed_sheet.selectable_project_ids
+            for ctx in self._get_inputs(request)
+        }
+
+    def _bookings(self, request: Request) -> dict[str, dict[str, Any]]:
+        '''Returns the encoded bookings per input, which the wizard then need not parse.'''
+        return {
+            ctx.mngd_wb.file_path: bm.encode_booking_table(ctx.managed_sheet.bookings)
+            for ctx in self._get_inputs(request)
+        }
+
+    def _aggregate(self, request: Request) -> dict[str, Any]:
+        '''Returns the hours per employee and project of the requested inputs
+        in the requested month.'''
+        contexts = self._get_inputs(request)
+        projects = request.get("projects")
+        employees = request.get("employees")
+        hours = agg.collect_month_hours(
+            (ctx.managed_sheet.unique_aggregate for ctx in contexts),
+            int(request["month"]),
+            int(request["year"]),
+            set(projects) if projects else None,
+            set(employees) if employees else None
+        )
+        # Every name of the inputs, to tell names missing from them from names without hours
+        names = dict.fromkeys(
+            name for ctx in contexts for name in ctx.managed_sheet.aggregate.yield_names()
+        )
+        return {"employees": hours, "names": list(names)}
+
+#           --- SERVER ---
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    '''Answers the JSON line requests of one connection.'''
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as exc:
+                self._respond({"ok": False, "error": f"Invalid JSON: {exc}"})
+                continue
+            if not is_authorised(request, self.server.token):
+                self._respond({"ok": False, "error": "Unauthorised request"})
+                return
+            if request.get("op") == SHUTDOWN:
+                self._respond({"ok": True, "result": None})
+                # Shutting down waits for the serving loop, so it must not run in it
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+            self._respond(self.server.service.handle(request))
+
+    def _respond(self, response: Response) -> None:
+        '''Writes the response as one line.'''
+        self.wfile.write((json.dumps(response) + "\n").encode(ENCODING))
+        self.wfile.flush()
+
+class DaemonServer(socketserver.ThreadingTCPServer):
+    '''Localhost TCP server of the daemon. Only accepts local connections.'''
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, service: AggregationService, port: int, token: str) -> None:
+        super().__init__((LOCALHOST, port), _RequestHandler)
+        self.service = service
+        # Requests without it are refused, as any local user can connect
+        self.token = token
+
+#           --- CLIENT ---
+
+class DaemonClient:
+    '''Sends requests to a running daemon.'''
+    __slots__ = ('port',)
+
+    def __init__(self, port: Optional[int] = None) -> None:
+        self.port = port or ing.get_ingestion_settings().daemon_port
+
+    def request(self, request: Request) -> Any:
+        '''Sends the request with the daemon's token and returns the result of the response.'''
+        token = read_token(self.port)
+        if token is None:
+            raise ex.DaemonUnavailable(self.port)
+        try:
+            with socket.create_connection((LOCALHOST, self.port), timeout=CONNECT_TIMEOUT) as sock:
+                # Large inputs may take a while to load on first use
+                sock.settimeout(None)
+                sock.sendall((json.dumps({**request, "token": token}) + "\n").encode(ENCODING))
+                with sock.makefile("rb") as reader:
+                    line = reader.readline()
+        except ConnectionRefusedError as exc:
+            raise ex.DaemonUnavailable(self.port) from exc
+        if not line:
+            raise ex.DaemonRequestError("The connection was closed without a response.")
+        response = json.loads(line)
+        if not response.get("ok"):
+            raise ex.DaemonRequestError(response.get("error", ""))
+        return response.get("result")
+
+    def is_running(self) -> bool:
+        '''Checks whether the daemon answers.'''
+        try:
+            return self.request({"op": "ping"}) == "pong"
+        except (ex.DaemonUnavailable, ex.DaemonRequestError, OSError):
+            return False
+
+#           --- TOKEN ---
+
+def get_token_path(port: int) -> str:
+    '''Returns the path of the token file of the daemon on the port in the user's home directory.'''
+    return path.join(path.expanduser("~"), hs.DEFAULT_DB_DIR, f"daemon_{port}.token")
+
+def write_token(port: int, token: str) -> None:
+    '''Writes the token of the daemon on the port to a file readable only by the user.'''
+    token_path = get_token_path(port)
+    os.makedirs(path.dirname(token_path), mode=0o700, exist_ok=True)
+    file_descriptor = os.open(token_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(file_descriptor, "w", encoding=ENCODING) as file:
+        file.write(token)
+    # The file may have existed with other permissions
+    os.chmod(token_path, 0o600)
+
+def read_token(port: int) -> Optional[str]:
+    '''Returns the token of the daemon on the port, or None if none of the user is running.'''
+    try:
+        with open(get_token_path(port), encoding=ENCODING) as file:
+            return file.read().strip()
+    except OSError:
+        return None
+
+def is_authorised(request: Request, token: str) -> bool:
+    '''Checks the token of the request in constant time.'''
+    request_token = request.get("token")
+    if not isinstance(request_token, str):
+        return False
+    return hmac.compare_digest(request_token.encode(ENCODING), token.encode(ENCODING))
+
+#           --- ENTRY POINT ---
+
+def serve(port: Optional[int] = None) -> None:
+    '''Runs the daemon until a shutdown request is received.'''
+    port = port or ing.get_ingestion_settings().daemon_port
+    service = AggregationService()
+    token = secrets.token_hex(TOKEN_BYTES)
+    with DaemonServer(service, port, token) as server:
+        # Only written once the port is bound, so that a daemon already running keeps its token
+        write_token(port, token)
+        print(f"Project hours budgeting daemon listening on {LOCALHOST}:{port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            service.close()
+            try:
+                os.remove(get_token_path(port))
+            except OSError:
+                pass
+
+def main(argv: Optional[list[str]] = None) -> None:
+    '''Parses the command line and runs the daemon.'''
+    parser = argparse.ArgumentParser(
+        description="Keeps parsed input workbooks in memory for the batch CLI."
+    )
+    parser.add_argument("--port", type=int, help="Localhost port; by default the configured port")
+    args = parser.parse_args(argv)
+    serve(args.port)
+
+if __name__ == "__main__":
+    # Required for the aggregation worker processes in the frozen executable
+    multiprocessing.freeze_support()
+    main()
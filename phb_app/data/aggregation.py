@@ -0,0 +1,191 @@
+'''
+Package
+-------
+Data Handling
+
+Module Name
+---------
+Aggregation
+
+Author
+-------
+Karl Goran Antony Zuvela
+
+Description
+-----------
+Sums the hours of a booking table per employee, project and month. The table is
+split into chunks of rows, each chunk is summed on its own and the partial sums
+are merged in chunk order. With more than one worker, the chunks are summed in
+worker processes. As both paths sum the same chunks and merge them in the same
+order, they give identical results.
+'''
+#           --- Standard libraries ---
+import multiprocessing
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from math import isnan
+from typing import Collection, Iterable, Iterator, Optional, TYPE_CHECKING
+#           --- Third party libraries ---
+from openpyxl.utils.datetime import from_excel
+
+if TYPE_CHECKING:
+    import phb_app.data.booking_management as bm
+
+# Employee name reference, project ID reference and month key
+type AggregateKey = tuple[int, int, int]
+type PartialSums = dict[AggregateKey, float]
+# Summed hours by employee name reference, month key and project ID reference
+type SumsIndex = dict[int, dict[int, dict[int, float]]]
+
+DEFAULT_CHUNK_ROWS = 250_000
+
+#           --- DATA CONTAINERS ---
+
+@dataclass(slots=True)
+class BookingAggregate:
+    '''Data class for the hours of a booking table summed per employee, project and month.
+    The keys keep the order in which they first appear in the table. The sums are indexed
+    by employee and month once, so that looking up an employee's month is no scan.'''
+    pool: "bm.StringPool"
+    sums: PartialSums = field(default_factory=dict)
+    index: SumsIndex = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        '''Indexes the sums, whether aggregated, subtracted or loaded from the history.'''
+        self.index = index_sums(self.sums)
+
+    def yield_hours(
+        self,
+        name: str,
+        proj_ids: Iterable[str],
+        month: int,
+        year: int
+    ) -> Iterator[tuple[str, float]]:
+        '''Yields the project ID and summed hours of the employee's bookings on the given
+        project IDs in the given month.'''
+        name_ref = self.pool.lookup(name)
+        if name_ref is None:
+            return
+        month_sums = self.index.get(name_ref, {}).get(to_month_key(month, year))
+        if not month_sums:
+            return
+        for proj_id in proj_ids:
+            proj_ref = self.pool.lookup(proj_id)
+            if proj_ref in month_sums:
+                yield proj_id, month_sums[proj_ref]
+
+    def yield_names(self) -> Iterator[str]:
+        '''Yields every distinct employee name with summed hours, once.'''
+        for name_ref in self.index:
+            yield self.pool[name_ref]
+
+    def yield_month(self, month: int, year: int) -> Iterator[tuple[str, str, float]]:
+        '''Yields the employee name, project ID and summed hours of every booking sum
+        in the given month.'''
+        selected_month = to_month_key(month, year)
+        for (name_ref, proj_ref, month_val), hours in self.sums.items():
+            if month_val == selected_month:
+                yield self.pool[name_ref], self.pool[proj_ref], hours
+
+#           --- MODULE FUNCTIONS ---
+
+def to_month_key(month: int, year: int) -> int:
+    '''Public module level. Returns the number of months since year 0 as the key of the month.'''
+    return year * 12 + month - 1
+
+def collect_month_hours(
+    aggregates: Iterable[BookingAggregate],
+    month: int,
+    year: int,
+    proj_ids: Optional[Collection[str]] = None,
+    names: Optional[Collection[str]] = None
+) -> dict[str, dict[str, float]]:
+    '''Public module level. Collects the hours per employee and project in the given month
+    over all aggregates, optionally only of the given project IDs and employees.'''
+    hours_by_name: dict[str, dict[str, float]] = {}
+    for aggregate in aggregates:
+        for name, proj_id, hours in aggregate.yield_month(month, year):
+            if proj_ids is not None and proj_id not in proj_ids:
+                continue
+            if names is not None and name not in names:
+                continue
+            projects = hours_by_name.setdefault(name, {})
+            projects[proj_id] = projects.get(proj_id, 0.0) + hours
+    return hours_by_name
+
+def index_sums(sums: PartialSums) -> SumsIndex:
+    '''Public module level. Indexes the sums by employee, then month, then project ID,
+    keeping the order of the sums.'''
+    index: SumsIndex = {}
+    for (name_ref, proj_ref, month_key), hours in sums.items():
+        index.setdefault(name_ref, {}).setdefault(month_key, {})[proj_ref] = hours
+    return index
+
+def aggregate_chunk(
+    names: array,
+    proj_ids: array,
+    hours: array,
+    date_serials: array
+) -> PartialSums:
+    '''Public module level. Sums the hours of a chunk of bookings per employee, project and month.
+    Bookings without hours or date are skipped. Only takes arrays, so that chunks are cheap to
+    send to worker processes.'''
+    sums: PartialSums = {}
+    # Months of the days seen so far, as a chunk holds few distinct days
+    month_keys: dict[int, int] = {}
+    for name_ref, proj_ref, hours_val, serial in zip(names, proj_ids, hours, date_serials):
+        if isnan(hours_val) or isnan(serial):
+            continue
+        day = int(serial)
+        month_key = month_keys.get(day)
+        if month_key is None:
+            date_val = from_excel(day)
+            month_key = month_keys[day] = to_month_key(date_val.month, date_val.year)
+        key = (name_ref, proj_ref, month_key)
+        sums[key] = sums.get(key, 0.0) + hours_val
+    return sums
+
+def merge_partial_sums(partials: Iterable[PartialSums]) -> PartialSums:
+    '''Public module level. Merges the partial sums in the given order.'''
+    merged: PartialSums = {}
+    for partial in partials:
+        for key, hours in partial.items():
+            merged[key] = merged.get(key, 0.0) + hours
+    return merged
+
+def subtract_sums(aggregate: BookingAggregate, sums: PartialSums) -> BookingAggregate:
+    '''Public module level. Returns the aggregate less the given sums. Keys left without
+    hours are dropped, as if their bookings had never been there.'''
+    remaining = dict(aggregate.sums)
+    for key, hours in sums.items():
+        left = remaining.get(key, 0.0) - hours
+        if abs(left) < 1e-9:
+            remaining.pop(key, None)
+        else:
+            remaining[key] = left
+    return BookingAggregate(aggregate.pool, remaining)
+
+def aggregate_bookings(
+    table: "bm.BookingTable",
+    workers: int = 1,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> BookingAggregate:
+    '''Public module level. Sums the hours of the booking table per employee, project and month.
+    Worker processes are only started if there is more than one worker and more than one chunk.'''
+    bounds = [
+        (start, min(start + chunk_rows, len(table)))
+        for start in range(0, len(table), chunk_rows)
+    ]
+    columns = (table.names, table.proj_ids, table.hours, table.date_serials)
+    # One list of array slices per column, so that each chunk is a tuple of arrays
+    chunks = [[column[start:end] for start, end in bounds] for column in columns]
+    if workers <= 1 or len(bounds) <= 1:
+        partials = map(aggregate_chunk, *chunks)
+        return BookingAggregate(table.pool, merge_partial_sums(partials))
+    # Spawn rather than fork: the wizard runs Qt and watcher threads
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(bounds)), mp_context=context) as executor:
+        # Results are returned in chunk order
+        sums = merge_partial_sums(executor.map(aggregate_chunk, *chunks))
+    return BookingAggregate(table.pool, sums)
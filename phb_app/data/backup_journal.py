@@ -0,0 +1,225 @@
+'''
+Package
+-------
+Data Handling
+
+Module Name
+---------
+Backup Journal
+
+Author
+-------
+Karl Goran Antony Zuvela
+
+Description
+-----------
+Keeps the original value, number format and font of every budgeting file cell
+before hours are written into it, rather than a copy of the whole file. Each run
+appends one compressed JSON line to a journal next to the budgeting file; nothing
+is ever rewritten. A restore reapplies the cells of the latest run not yet restored
+and appends a restore record, so repeated restores step back run by run. A restore
+is refused if the budgeting file changed since the journal's last record.
+'''
+#           --- Standard libraries ---
+import gzip
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+from os import path
+from typing import Iterator, Optional
+from xml.etree.ElementTree import fromstring, tostring
+#           --- Third party libraries ---
+from openpyxl.styles import Font
+from openpyxl.worksheet.worksheet import Worksheet
+#           --- First party libraries ---
+import phb_app.logging.exceptions as ex
+import phb_app.templating.types as t
+import phb_app.utils.file_handling_utils as fu
+import phb_app.utils.style_utils as su
+
+JOURNAL_SUFFIX = ".phb_backup.jsonl.gz"
+RUN = "run"
+RESTORE = "restore"
+
+type CellValue = Optional[str | int | float | bool | datetime | date | time]
+
+#           --- DATA CONTAINERS ---
+
+@dataclass(slots=True)
+class CellBackup:
+    '''Data class for the original state of a cell.'''
+    coord: str
+    value: CellValue
+    number_format: str
+    # XML of the font; None in journals which left the workbook's default font out
+    font: Optional[str] = None
+
+@dataclass(slots=True)
+class Backup:
+    '''Data class for the original cells of a run, with the fingerprints of the
+    budgeting file before the run and after saving it.'''
+    file_path: str
+    sheet_name: str
+    cells: list[CellBackup] = field(default_factory=list)
+    fingerprint_before: Optional[t.FileFingerprint] = None
+    fingerprint_after: Optional[t.FileFingerprint] = None
+    created: str = ""
+    backup_id: int = 0
+
+#           --- JOURNAL ---
+
+class BackupJournal:
+    '''Append-only journal of the backups of a budgeting file.'''
+    __slots__ = ('file_path', 'journal_path')
+
+    def __init__(self, file_path: str) -> None:
+        self.file_path = path.abspath(file_path)
+        self.journal_path = self.file_path + JOURNAL_SUFFIX
+
+    def append_backup(self, backup: Backup) -> Backup:
+        '''Appends the backup of a run, once the budgeting file is saved. Returns it with its ID.'''
+        backup.backup_id = self._next_id()
+        backup.fingerprint_after = fu.get_file_fingerprint(self.file_path)
+        self._append({
+            "kind": RUN,
+            "id": backup.backup_id,
+            "created": backup.created,
+            "sheet": backup.sheet_name,
+            "before": backup.fingerprint_before,
+            "after": backup.fingerprint_after,
+            "cells": [
+                [cell.coord, _encode_value(cell.value), cell.number_format, cell.font]
+                for cell in backup.cells
+            ]
+        })
+        return backup
+
+    def yield_backups(self) -> Iterator[Backup]:
+        '''Yields the backups of every run, oldest first.'''
+        for record in self._yield_records():
+            if record["kind"] == RUN:
+                yield _to_backup(self.file_path, record)
+
+    def get_restorable(self) -> Optional[Backup]:
+        '''Returns the backup of the latest run not yet restored, or None.'''
+        restored = set()
+        backups = []
+        for record in self._yield_records():
+            if record["kind"] == RESTORE:
+                restored.add(record["id"])
+            else:
+                backups.append(record)
+        pending = [record for record in backups if record["id"] not in restored]
+        return _to_backup(self.file_path, pending[-1]) if pending else None
+
+    def restore(self, backup_id: Optional[int] = None, force: bool = False) -> Backup:
+        '''Reapplies the original cells of the given run, by default the latest not yet
+        restored, saves the budgeting file and records the restore.'''
+        backup = self.get_restorable() if backup_id is None else next(
+            (backup for backup in self.yield_backups() if backup.backup_id == backup_id), None
+        )
+        if backup is None:
+            raise ex.BackupNotFound(self.file_path, backup_id)
+        last = self._get_last_fingerprint()
+        if not force and last is not None and fu.get_file_fingerprint(self.file_path) != last:
+            raise ex.BudgetingFileChanged(self.file_path)
+        file_name = path.basename(self.file_path)
+        workbook = fu.try_load_workbook(self.file_path, file_name, writable=True)
+        sheet = workbook[backup.sheet_name]
+        for cell in backup.cells:
+            apply_cell_backup(sheet, cell)
+        workbook.save(self.file_path)
+        self._append({
+            "kind": RESTORE,
+            "id": backup.backup_id,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "after": fu.get_file_fingerprint(self.file_path)
+        })
+        return backup
+
+    def _get_last_fingerprint(self) -> Optional[t.FileFingerprint]:
+        '''Returns the fingerprint of the budgeting file after the last record.'''
+        last = None
+        for record in self._yield_records():
+            last = record["after"]
+        return tuple(last) if last else None
+
+    def _next_id(self) -> int:
+        '''Returns the ID of the next run.'''
+        run_ids = (record["id"] for record in self._yield_records() if record["kind"] == RUN)
+        return max(run_ids, default=0) + 1
+
+    def _yield_records(self) -> Iterator[dict]:
+        '''Yields the records of the journal, oldest first.'''
+        if not path.exists(self.journal_path):
+            return
+        # Each append is its own gzip member; they are read as one stream
+        with gzip.open(self.journal_path, "rt", encoding="utf-8") as journal:
+            for line in journal:
+                if line.strip():
+                    yield json.loads(line)
+
+    def _append(self, record: dict) -> None:
+        '''Appends a record as one compressed line.'''
+        with gzip.open(self.journal_path, "at", encoding="utf-8") as journal:
+            journal.write(json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n")
+
+#           --- MODULE FUNCTIONS ---
+
+def capture_cells(sheet: Worksheet, coords: list[str], file_path: str) -> Backup:
+    '''Public module level. Captures the value, number format and font of the cells
+    before they are changed.'''
+    fonts = sheet.parent._fonts # pylint: disable=protected-access
+    cells = []
+    for coord in coords:
+        cell = sheet[coord]
+        font = tostring(fonts[su.get_font_id(cell)].to_tree(), encoding="unicode")
+        cells.append(CellBackup(coord, cell.value, cell.number_format, font))
+    return Backup(
+        file_path=path.abspath(file_path),
+        sheet_name=sheet.title,
+        cells=cells,
+        fingerprint_before=fu.get_file_fingerprint(file_path),
+        created=datetime.now().isoformat(timespec="seconds")
+    )
+
+def apply_cell_backup(sheet: Worksheet, backup: CellBackup) -> None:
+    '''Public module level. Sets the cell back to its captured state.'''
+    cell = sheet[backup.coord]
+    cell.value = backup.value
+    cell.number_format = backup.number_format
+    if backup.font:
+        cell.font = Font.from_tree(fromstring(backup.font))
+    else:
+        # The default font is the workbook's first, not openpyxl's Calibri
+        cell.font = sheet.parent._fonts[0] # pylint: disable=protected-access
+
+def _encode_value(value: CellValue) -> object:
+    '''Private module level. Encodes date and time values, which JSON does not know,
+    as tagged text.'''
+    for kind in (datetime, date, time):
+        if isinstance(value, kind):
+            return {kind.__name__: value.isoformat()}
+    return value
+
+def _decode_value(value: object) -> CellValue:
+    '''Private module level. Decodes tagged date and time values.'''
+    if isinstance(value, dict):
+        (kind, text), = value.items()
+        return {"datetime": datetime, "date": date, "time": time}[kind].fromisoformat(text)
+    return value
+
+def _to_backup(file_path: str, record: dict) -> Backup:
+    '''Private module level. Builds the backup of a run record.'''
+    return Backup(
+        file_path=file_path,
+        sheet_name=record["sheet"],
+        cells=[
+            CellBackup(coord, _decode_value(value), fmt, font)
+            for coord, value, fmt, font in record["cells"]
+        ],
+        fingerprint_before=tuple(record["before"]) if record["before"] else None,
+        fingerprint_after=tuple(record["after"]) if record["after"] else None,
+        created=record["created"],
+        backup_id=record["id"]
+    )
@@ -0,0 +1,283 @@
+'''
+Package
+-------
+Data Handling
+
+Module Name
+---------
+Booking Management
+
+Author
+-------
+Karl Goran Antony Zuvela
+
+Description
+-----------
+Provides the bookings ingested from an input worksheet. Each distinct employee name,
+project ID and project description is stored once in a string pool; the rows of the
+booking table only hold integer references into the pool, kept in compact arrays.
+Dates are kept as Excel serial numbers, so that summing by month only compares floats.
+Text hours and dates are read in bulk once the whole column is ingested: hours with the
+locale's decimal separator, dates in a format inferred for the column.
+A table can be encoded as JSON data, so that the daemon hands its parsed bookings to
+the wizard rather than the wizard parsing the file again.
+'''
+#           --- Standard libraries ---
+import base64
+from array import array
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime
+from math import isfinite, isnan, nan
+from typing import Any, Iterable, Iterator, Optional
+#           --- Third party libraries ---
+from openpyxl.utils.datetime import to_excel
+#           --- First party libraries ---
+import phb_app.data.date_parsing as dp
+import phb_app.data.location_management as loc
+import phb_app.utils.date_utils as du
+
+# Reference of a missing value, e.g. a booking without a project description
+MISSING_REF = -1
+# Rejected hours kept as examples in the report
+REJECTED_EXAMPLES = 5
+# Columns of the booking table, as encoded
+COLUMNS = ("names", "proj_ids", "descriptions", "hours", "date_serials")
+
+#           --- DATA CONTAINERS ---
+
+@dataclass(slots=True)
+class HoursColumnReport:
+    '''Data class for the hours of a column which were not numbers: how many rows were
+    read from text and rejected, with a few rejected values as examples.'''
+    converted: int = 0
+    rejected: int = 0
+    examples: list[str] = field(default_factory=list)
+
+    def reject(self, value: object) -> None:
+        '''Counts a rejected value, keeping the first ones as examples.'''
+        self.rejected += 1
+        if len(self.examples) < REJECTED_EXAMPLES:
+            self.examples.append(repr(value))
+
+class StringPool:
+    '''Stores each distinct string once and refers to it by its integer reference.'''
+    __slots__ = ('_refs', '_strings')
+
+    def __init__(self) -> None:
+        self._refs: dict[str, int] = {}
+        self._strings: list[str] = []
+
+    def intern(self, value: str) -> int:
+        '''Returns the reference of the string, adding it to the pool if new.'''
+        ref = self._refs.get(value)
+        if ref is None:
+            ref = len(self._strings)
+            self._refs[value] = ref
+            self._strings.append(value)
+        return ref
+
+    def lookup(self, value: str) -> Optional[int]:
+        '''Returns the reference of the string, or None if it is not in the pool.'''
+        return self._refs.get(value)
+
+    def __getitem__(self, ref: int) -> str:
+        return self._strings[ref]
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+@dataclass(slots=True)
+class BookingTable:
+    '''Column-wise table of the bookings of an input worksheet. Missing hours and dates
+    are NaN and missing descriptions MISSING_REF.'''
+    pool: StringPool = field(default_factory=StringPool)
+    names: array = field(default_factory=lambda: array('l'))
+    proj_ids: array = field(default_factory=lambda: array('l'))
+    descriptions: array = field(default_factory=lambda: array('l'))
+    hours: array = field(default_factory=lambda: array('d'))
+    date_serials: array = field(default_factory=lambda: array('d'))
+    # How the text dates were read; None if the date column held no text
+    date_report: Optional[dp.DateColumnReport] = None
+    # How the hours which were not numbers were read; None if all were numbers
+    hours_report: Optional[HoursColumnReport] = None
+    # Hash of each booking by its strings, date and hours; computed on first use
+    row_hashes: Optional[array] = None
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def get_row_hashes(self) -> array:
+        '''Returns the hash of each booking by employee, project, date and hours. The hashes
+        compare bookings of different tables, so they hash the strings rather than references.
+        They are only valid within the process.'''
+        if self.row_hashes is None or len(self.row_hashes) != len(self):
+            pool = self.pool
+            self.row_hashes = array('q', (
+                hash((
+                    pool[name_ref], pool[proj_ref],
+                    None if isnan(serial) else serial, None if isnan(hours_val) else hours_val
+                ))
+                for name_ref, proj_ref, serial, hours_val
+                in zip(self.names, self.proj_ids, self.date_serials, self.hours)
+            ))
+        return self.row_hashes
+
+    def append(
+        self,
+        name: str,
+        proj_id: str,
+        description: Optional[str],
+        hours: Optional[float],
+        date_serial: Optional[float]
+    ) -> None:
+        '''Appends a booking, interning its strings.'''
+        self.names.append(self.pool.intern(name))
+        self.proj_ids.append(self.pool.intern(proj_id))
+        self.descriptions.append(self.pool.intern(description) if description else MISSING_REF)
+        self.hours.append(nan if hours is None else hours)
+        self.date_serials.append(nan if date_serial is None else date_serial)
+
+    def yield_project_ids_and_descs(self) -> Iterator[tuple[str, str]]:
+        '''Yields the pooled project ID and description of each booking with a description.'''
+        for proj_ref, desc_ref in zip(self.proj_ids, self.descriptions):
+            if desc_ref != MISSING_REF:
+                yield self.pool[proj_ref], self.pool[desc_ref]
+
+#           --- MODULE FACTORY FUNCTIONS ---
+
+def encode_booking_table(table: BookingTable) -> dict[str, Any]:
+    '''Public module level. Encodes the booking table as JSON data. The columns are kept
+    in their machine representation, as base64, since the daemon only serves the local
+    machine.'''
+    return {
+        "strings": [table.pool[ref] for ref in range(len(table.pool))],
+        "columns": {
+            name: base64.b64encode(getattr(table, name).tobytes()).decode("ascii")
+            for name in COLUMNS
+        },
+        "date_report": asdict(table.date_report) if table.date_report else None,
+        "hours_report": asdict(table.hours_report) if table.hours_report else None
+    }
+
+def decode_booking_table(data: dict[str, Any]) -> BookingTable:
+    '''Public module level. Decodes a booking table encoded by encode_booking_table.
+    Raises a ValueError if the columns are malformed.'''
+    table = BookingTable()
+    for value in data["strings"]:
+        table.pool.intern(value)
+    if len(table.pool) != len(data["strings"]):
+        raise ValueError("The strings of the booking table are not distinct.")
+    for name in COLUMNS:
+        getattr(table, name).frombytes(base64.b64decode(data["columns"][name], validate=True))
+    if any(len(getattr(table, name)) != len(table) for name in COLUMNS):
+        raise ValueError("The columns of the booking table differ in length.")
+    if data["date_report"]:
+        table.date_report = dp.DateColumnReport(**data["date_report"])
+    if data["hours_report"]:
+        table.hours_report = HoursColumnReport(**data["hours_report"])
+    return table
+
+def build_booking_table(rows: Iterable[tuple], csv_format: loc.CsvFormat) -> BookingTable:
+    '''Public module level. Builds the booking table from rows of name, project ID,
+    description, hours and date. Rows without name or project ID are dropped.
+    Hours which are not numbers, e.g. text from CSV files, are read with the locale's
+    decimal separator and text dates in the format inferred for the column. Numbers in
+    the date column are taken as Excel serial numbers.'''
+    table = BookingTable()
+    # Row and value of every text date and of all hours not a number,
+    # read in bulk once the column is complete
+    text_dates: list[tuple[int, str]] = []
+    other_hours: list[tuple[int, object]] = []
+    for name, proj_id, description, raw_hours, raw_date in rows:
+        if not name or not proj_id:
+            continue
+        if isinstance(raw_hours, (float, int)) and not isinstance(raw_hours, bool):
+            # Zero hours count as no hours
+            hours = raw_hours or None
+        else:
+            if raw_hours is not None and raw_hours != "":
+                other_hours.append((len(table), raw_hours))
+            hours = None
+        if isinstance(raw_date, str):
+            text_dates.append((len(table), raw_date))
+            date_serial = None
+        else:
+            date_serial = to_date_serial(raw_date, csv_format.date_format) if raw_date else None
+        description = str(description) if description else None
+        table.append(str(name), str(proj_id), description, hours, date_serial)
+    if other_hours:
+        _set_other_hours(table, other_hours, csv_format.decimal_separator)
+    if text_dates:
+        _set_text_date_serials(table, text_dates, csv_format.date_format)
+    return table
+
+def _set_other_hours(
+    table: BookingTable,
+    other_hours: list[tuple[int, object]],
+    decimal_separator: str
+) -> None:
+    '''Private module level. Sets the hours of each row whose value, not a number, reads as
+    one with the decimal separator. Each distinct text is read once; other values are rejected.'''
+    report = HoursColumnReport()
+    read: dict[str, Optional[float]] = {}
+    hours = table.hours
+    for row, value in other_hours:
+        if isinstance(value, str):
+            if value not in read:
+                read[value] = to_hours(value, decimal_separator)
+            hours_val = read[value]
+        else:
+            hours_val = None
+        if hours_val is None:
+            report.reject(value)
+        else:
+            hours[row] = hours_val
+            report.converted += 1
+    table.hours_report = report
+
+def _set_text_date_serials(
+    table: BookingTable,
+    text_dates: list[tuple[int, str]],
+    locale_format: str
+) -> None:
+    '''Private module level. Infers the format of the text dates from a sample of their
+    distinct texts and sets the serial of each row whose text is a date.'''
+    distinct = dict.fromkeys(text for _, text in text_dates)
+    parser = dp.DateParser(dp.infer_date_format(distinct, locale_format), locale_format)
+    serials = table.date_serials
+    for row, text in text_dates:
+        serial = parser.parse(text)
+        if serial is not None:
+            serials[row] = serial
+    table.date_report = parser.report
+
+def to_hours(value: float|int|str, decimal_separator: str) -> Optional[float|int]:
+    '''Public module level. Returns the hours as a number. Text is read with the given
+    decimal separator. None is returned if the text is not a finite number.'''
+    if not isinstance(value, str):
+        return value
+    try:
+        hours = float(value.strip().replace(decimal_separator, "."))
+    except ValueError:
+        return None
+    return hours if isfinite(hours) else None
+
+def to_date_serial(value: float|int|datetime|date|str, date_format: str) -> Optional[float]:
+    '''Public module level. Returns the date as an Excel serial number. Text is read with
+    the given date format, or ISO 8601 as a fallback. None is returned if the value is
+    not a date.'''
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return float(to_excel(value))
+    if isinstance(value, str):
+        parsed = du.to_datetime(value, date_format)
+        return float(to_excel(parsed)) if parsed else None
+    return None
+
+def format_hours_report(file_name: str, report: HoursColumnReport) -> str:
+    '''Public module level. Formats the report of the hours of the file which were not
+    numbers as one line.'''
+    examples = f" (e.g. {', '.join(report.examples)})" if report.examples else ""
+    converted = f"{report.converted} hours read from text"
+    return f"{file_name}: {converted}, {report.rejected} rejected{examples}"
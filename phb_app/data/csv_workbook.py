@@ -0,0 +1,108 @@
+'''
+Package
+-------
+Data Handling
+
+Module Name
+---------
+CSV Workbook
+
+Author
+-------
+Karl Goran Antony Zuvela
+
+Description
+-----------
+Read-only workbook and worksheet for CSV and TSV exports. Mirrors the parts of the
+openpyxl interface used for input workbooks, so that CSV inputs run through the same
+header indexing and aggregation as Excel inputs. Rows are streamed from the file
+on each iteration and never held in memory.
+'''
+#           --- Standard libraries ---
+import csv
+from os import path
+from itertools import islice
+from typing import Iterator, Optional
+#           --- First party libraries ---
+import phb_app.data.location_management as loc
+import phb_app.wizard.constants.ui_strings as st
+
+type RowValues = tuple[Optional[str], ...]
+
+class CsvWorksheet:
+    '''A single CSV or TSV file as a worksheet. All values are returned as text;
+    empty fields are returned as None, as openpyxl does for empty cells.'''
+    __slots__ = ('title', 'file_path', 'csv_format', '_delimiter')
+
+    def __init__(self, title: str, file_path: str, delimiter: Optional[str] = None) -> None:
+        self.title = title
+        self.file_path = file_path
+        self.csv_format = loc.CsvFormat()
+        # TSV files are always tab separated, whatever the locale says
+        self._delimiter = delimiter
+
+    @property
+    def delimiter(self) -> str:
+        '''The delimiter of the file.'''
+        return self._delimiter or self.csv_format.delimiter
+
+    def iter_rows(
+        self,
+        min_row: int = 1,
+        max_row: Optional[int] = None,
+        values_only: bool = True
+    ) -> Iterator[RowValues]:
+        '''Yields the rows from min_row to max_row (both one-based and inclusive)
+        as tuples of values. Only values can be returned, as there are no cells.'''
+        if not values_only:
+            raise NotImplementedError("CSV worksheets only provide values.")
+        with open(self.file_path, 'r', encoding=self.csv_format.encoding, newline='') as csv_file:
+            reader = csv.reader(csv_file, delimiter=self.delimiter)
+            for row in islice(reader, min_row - 1, max_row):
+                yield tuple(value if value != "" else None for value in row)
+
+    def iter_projected_rows(
+        self,
+        columns: tuple[int, ...],
+        min_row: int = 1,
+        max_row: Optional[int] = None,
+        serial_columns: frozenset[int] = frozenset() # pylint: disable=unused-argument
+    ) -> Iterator[RowValues]:
+        '''Yields the values of the given zero-based columns only, in the given order.
+        Missing fields of short rows are returned as None. Dates are always text,
+        so there are no serial columns.'''
+        with open(self.file_path, 'r', encoding=self.csv_format.encoding, newline='') as csv_file:
+            reader = csv.reader(csv_file, delimiter=self.delimiter)
+            for row in islice(reader, min_row - 1, max_row):
+                yield tuple(row[col] or None if col < len(row) else None for col in columns)
+
+class CsvWorkbook:
+    '''A CSV or TSV file as a workbook with a single worksheet named after the file.'''
+    __slots__ = ('file_path', '_sheet')
+
+    def __init__(self, file_path: str) -> None:
+        self.file_path = file_path
+        # Fail early, like openpyxl, if the file cannot be read
+        with open(file_path, 'rb'):
+            pass
+        title, extension = path.splitext(path.basename(file_path))
+        delimiter = '\t' if extension.lower() == st.SpecialStrings.TSV else None
+        self._sheet = CsvWorksheet(title, file_path, delimiter)
+
+    @property
+    def sheetnames(self) -> list[str]:
+        '''The name of the only worksheet.'''
+        return [self._sheet.title]
+
+    def __getitem__(self, sheet_name: str) -> CsvWorksheet:
+        if sheet_name != self._sheet.title:
+            raise KeyError(f"Worksheet {sheet_name} does not exist.")
+        return self._sheet
+
+    def set_format(self, csv_format: loc.CsvFormat) -> None:
+        '''Sets the locale's format, used when reading the rows.'''
+        self._sheet.csv_format = csv_format
+
+def is_csv_file(file_path: str) -> bool:
+    '''Public module level. Checks whether the file is a CSV or TSV file by its extension.'''
+    return path.splitext(file_path)[1].lower() in (st.SpecialStrings.CSV, st.SpecialStrings.TSV)
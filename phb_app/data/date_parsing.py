@@ -0,0 +1,163 @@
+'''
+Package
+-------
+Data Handling
+
+Module Name
+---------
+Date Parsing
+
+Author
+-------
+Karl Goran Antony Zuvela
+
+Description
+-----------
+Reads a column of text dates, e.g. of a CSV export, as Excel serial numbers. The format
+of the column is inferred once from a sample of its texts, preferring the locale's
+format, and compiled into a regular expression, so that each text is only matched
+rather than tried against every format. Each distinct text is read once. Texts in
+another format, as in columns mixing formats, fall back to every known format cell by
+cell; texts in none are counted as unreadable.
+'''
+#           --- Standard libraries ---
+import re
+from dataclasses import dataclass
+from datetime import date, datetime
+from itertools import islice
+from typing import Iterable, Optional
+
+# Numeric date formats found in the timesheet exports, tried in this order
+CANDIDATE_FORMATS = (
+    "%d.%m.%Y", "%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y", "%Y/%m/%d", "%d.%m.%y"
+)
+# Texts of a column the format is inferred from
+SAMPLE_SIZE = 200
+
+_EXCEL_EPOCH_ORDINAL = date(1899, 12, 30).toordinal()
+_FIELD_PATTERNS = {
+    "d": r"(?P<d>\d{1,2})", "m": r"(?P<m>\d{1,2})", "Y": r"(?P<Y>\d{4})", "y": r"(?P<y>\d{2})"
+}
+# How a text was read
+_PARSED, _FALLBACK, _UNPARSED = 0, 1, 2
+
+@dataclass(slots=True)
+class DateColumnReport:
+    '''Data class for the text dates of a column: the inferred format and how many rows
+    were read in it, in another format or not at all.'''
+    date_format: Optional[str]
+    parsed: int = 0
+    fallback: int = 0
+    unparsed: int = 0
+
+class DateParser:
+    '''Reads text dates of one column in its inferred format, falling back cell by cell.'''
+    __slots__ = ('report', 'locale_format', '_pattern', '_read')
+
+    def __init__(self, date_format: Optional[str], locale_format: Optional[str] = None) -> None:
+        self.report = DateColumnReport(date_format)
+        # Also tried cell by cell, as it may not be numeric, e.g. with month names
+        self.locale_format = locale_format
+        self._pattern = compile_date_format(date_format) if date_format else None
+        # Serial and how it was read of each distinct text
+        self._read: dict[str, tuple[Optional[float], int]] = {}
+
+    def parse(self, text: str) -> Optional[float]:
+        '''Returns the text date as an Excel serial number, or None if it is not a date.'''
+        read = self._read.get(text)
+        if read is None:
+            read = self._read[text] = self._read_text(text)
+        serial, how = read
+        if how == _PARSED:
+            self.report.parsed += 1
+        elif how == _FALLBACK:
+            self.report.fallback += 1
+        else:
+            self.report.unparsed += 1
+        return serial
+
+    def _read_text(self, text: str) -> tuple[Optional[float], int]:
+        '''Reads the text in the column's format, else in any known format.'''
+        if self._pattern is not None:
+            serial = match_date_serial(self._pattern, text)
+            if serial is not None:
+                return serial, _PARSED
+        serial = parse_any_date_serial(text, self.locale_format)
+        return serial, _UNPARSED if serial is None else _FALLBACK
+
+def compile_date_format(date_format: str) -> Optional[re.Pattern]:
+    '''Public module level. Compiles a numeric date format, e.g. "%d.%m.%Y", into a regular
+    expression. A trailing time is allowed and ignored. None is returned for formats with
+    other directives, e.g. month names.'''
+    parts = []
+    chars = iter(date_format)
+    for char in chars:
+        if char != "%":
+            parts.append(re.escape(char))
+            continue
+        field_pattern = _FIELD_PATTERNS.get(next(chars, ""))
+        if field_pattern is None:
+            return None
+        parts.append(field_pattern)
+    return re.compile(r"\s*" + "".join(parts) + r"(?:[ T][\d:.]*)?\s*$")
+
+def match_date_serial(pattern: re.Pattern, text: str) -> Optional[float]:
+    '''Public module level. Returns the Excel serial number of the text matching the compiled
+    format, or None if it does not match or is no valid date, e.g. the 31st of June.'''
+    match = pattern.match(text)
+    if match is None:
+        return None
+    fields = match.groupdict()
+    year = int(fields["Y"]) if "Y" in fields else 2000 + int(fields["y"])
+    try:
+        ordinal = date(year, int(fields["m"]), int(fields["d"])).toordinal()
+        return float(ordinal - _EXCEL_EPOCH_ORDINAL)
+    except ValueError:
+        return None
+
+_COMPILED_CANDIDATES = tuple(compile_date_format(date_format) for date_format in CANDIDATE_FORMATS)
+
+def parse_any_date_serial(text: str, locale_format: Optional[str] = None) -> Optional[float]:
+    '''Public module level. Returns the Excel serial number of the text in the locale's
+    format, the first known format it matches or ISO 8601, or None if it is not a date.'''
+    text = text.strip()
+    if locale_format:
+        try:
+            return float(datetime.strptime(text, locale_format).toordinal() - _EXCEL_EPOCH_ORDINAL)
+        except ValueError:
+            pass
+    for pattern in _COMPILED_CANDIDATES:
+        serial = match_date_serial(pattern, text)
+        if serial is not None:
+            return serial
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    return float(parsed.toordinal() - _EXCEL_EPOCH_ORDINAL)
+
+def infer_date_format(texts: Iterable[str], preferred: Optional[str] = None) -> Optional[str]:
+    '''Public module level. Returns the known format reading the most of the first texts,
+    the preferred format winning ties, or None if none reads any. Ambiguous dates, e.g.
+    "07/08/2024", are settled by the others in the sample, e.g. "31/07/2024".'''
+    sample = list(islice(texts, SAMPLE_SIZE))
+    formats = list(CANDIDATE_FORMATS)
+    if preferred in formats:
+        formats.remove(preferred)
+    if preferred and compile_date_format(preferred):
+        formats.insert(0, preferred)
+    best_format, best_count = None, 0
+    for date_format in formats:
+        pattern = compile_date_format(date_format)
+        count = sum(match_date_serial(pattern, text) is not None for text in sample)
+        if count > best_count:
+            best_format, best_count = date_format, count
+    return best_format
+
+def format_date_report(file_name: str, report: DateColumnReport) -> str:
+    '''Public module level. Formats the report of the text dates of the file as one line.'''
+    return (
+        f"{file_name}: {report.parsed} text dates read as "
+        f"{report.date_format or 'no known format'}, "
+        f"{report.fallback} in other formats, {report.unparsed} unreadable"
+    )
@@ -0,0 +1,89 @@
+'''
+Package
+-------
+Data Handling
+
+Module Name
+---------
+Duplicate Bookings
+
+Author
+-------
+Karl Goran Antony Zuvela
+
+Description
+-----------
+Finds the bookings of an input which an earlier input already holds, as when
+overlapping extracts are loaded, e.g. a July to August and an August export. Each
+booking is hashed once by employee, project, date and hours, eight bytes per row,
+and the hashes of the inputs are compared with one dictionary. A booking found n
+times in an earlier input only duplicates its first n occurrences in a later one, so
+that bookings repeated within an export are kept.
+'''
+#           --- Standard libraries ---
+from array import array
+from dataclasses import dataclass
+from math import isnan
+from typing import Optional, Sequence
+#           --- First party libraries ---
+import phb_app.data.aggregation as agg
+import phb_app.data.booking_management as bm
+
+@dataclass(slots=True)
+class DuplicateBookings:
+    '''Data class for the bookings of an input also found in earlier inputs.'''
+    rows: array
+    hours: float
+    # File names of the earlier inputs
+    duplicate_of: list[str]
+    # Summed hours without the duplicates; None if they are kept
+    aggregate: Optional[agg.BookingAggregate] = None
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+def find_duplicate_rows(tables: Sequence[bm.BookingTable]) -> list[tuple[array, set[int]]]:
+    '''Public module level. Returns the rows of each booking table which duplicate rows of
+    the tables before it, in the order given, with the indices of the tables duplicated.'''
+    # Most occurrences of each booking in any table so far, with the table holding them
+    seen: dict[int, tuple[int, int]] = {}
+    duplicates = []
+    for idx, table in enumerate(tables):
+        counts: dict[int, int] = {}
+        rows = array('l')
+        sources = set()
+        for row, row_hash in enumerate(table.get_row_hashes()):
+            count = counts[row_hash] = counts.get(row_hash, 0) + 1
+            seen_count, source = seen.get(row_hash, (0, idx))
+            if count <= seen_count:
+                rows.append(row)
+                sources.add(source)
+        for row_hash, count in counts.items():
+            if count > seen.get(row_hash, (0, idx))[0]:
+                seen[row_hash] = (count, idx)
+        duplicates.append((rows, sources))
+    return duplicates
+
+def sum_duplicate_hours(table: bm.BookingTable, rows: array) -> float:
+    '''Public module level. Returns the hours of the given rows.'''
+    return sum(hours for row in rows if not isnan(hours := table.hours[row]))
+
+def drop_duplicate_rows(
+    table: bm.BookingTable,
+    aggregate: agg.BookingAggregate,
+    rows: array
+) -> agg.BookingAggregate:
+    '''Public module level. Returns the summed hours of the booking table without the given rows.'''
+    columns = (table.names, table.proj_ids, table.hours, table.date_serials)
+    duplicate_sums = agg.aggregate_chunk(
+        *(array(column.typecode, (column[row] for row in rows)) for column in columns)
+    )
+    return agg.subtract_sums(aggregate, duplicate_sums)
+
+def format_duplicate_report(file_name: str, duplicates: DuplicateBookings) -> str:
+    '''Public module level. Formats the duplicate bookings of the file as one line.'''
+    action = "dropped" if duplicates.aggregate is not None else "kept"
+    return (
+        f"{file_name}: {len(duplicates)} bookings ({duplicates.hours:.2f} h) also in "
+        f"{', '.join(duplicates.duplicate_of)}, {action}"
+    )
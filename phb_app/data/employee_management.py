@@ -16,17 +16,20 @@ Description
 Data classes for managing employee names and hours in the given worksheet.
 '''
 #           --- Standard libraries ---
+from array import array
 from dataclasses import dataclass, field
-from typing import Optional
+from itertools import repeat
+from math import isnan
+from typing import Iterable, Iterator, Optional
 #           --- Third party libraries ---
-from PyQt6.QtGui import QColor
 from openpyxl import utils as xlutils
 #           --- First party libraries ---
 import phb_app.data.yaml_handler as yh
+import phb_app.wizard.constants.integer_enums as ie
 import phb_app.wizard.constants.ui_strings as st
 import phb_app.data.hours_deviation as hd
 
-@dataclass(eq=False, slots=True) # Set eq to false to allow lru caching of file_handling_utils.locate_employee_range(...)
+@dataclass(eq=False, slots=True) # Set eq to false to compare by identity
 class EmployeeRowAnchors(yh.YamlHandler):
     '''Data class to define the anchor strings of the row containing the employee names.'''
     start_anchor: str = ""
@@ -43,7 +46,7 @@ class EmployeeRowAnchors(yh.YamlHandler):
             if hasattr(self, key):
                 setattr(self, key, value)
 
-@dataclass(eq=False, slots=True) # Set eq to false to allow lru caching of file_handling_utils.locate_employee_range(...)
+@dataclass(eq=False, slots=True) # Set eq to false to compare by identity
 class EmployeeRange:
     '''Data class for the range within which the employee names are located.'''
     start_cell: str = ""
@@ -69,43 +72,235 @@ class EmployeeRange:
         '''Get the row integer of the end cell.'''
         return xlutils.coordinate_to_tuple(self.end_cell)[0]
 
-@dataclass(slots=True)
+# Flags of each row of an hours table
+_PREDICTED_RED = 1
+_ACCUMULATED_RED = 2
+# Missing hours in the hours columns
+_MISSING = float("nan")
+
+DEVIATION_TEXTS: dict[ie.DeviationClass, Optional[str]] = {
+    ie.DeviationClass.UNSET: None,
+    ie.DeviationClass.NO_HOURS: " ",
+    ie.DeviationClass.NEGLIGIBLE: "Negligible",
+    ie.DeviationClass.WEAK: "Weak deviation",
+    ie.DeviationClass.STRONG: "Warning! Strong deviation!"
+}
+
+class HoursTable:
+    '''Hours of many employees and months, one row each, kept column by column in flat
+    buffers rather than as one object per employee and month. Missing hours are NaN.'''
+    __slots__ = (
+        'predicted_hours', 'accumulated_hours', 'flags', 'deviations', 'hours_coords', '_thresholds'
+    )
+
+    def __init__(self) -> None:
+        self.predicted_hours = array('d')
+        self.accumulated_hours = array('d')
+        self.flags = array('B')
+        self.deviations = array('b')
+        self.hours_coords: list[Optional[str]] = []
+        self._thresholds: Optional[hd.HoursDeviation] = None
+
+    def __len__(self) -> int:
+        return len(self.flags)
+
+    @property
+    def thresholds(self) -> hd.HoursDeviation:
+        '''Deviation thresholds, read once for the whole table.'''
+        if self._thresholds is None:
+            self._thresholds = hd.HoursDeviation()
+        return self._thresholds
+
+    def add_rows(self, count: int) -> int:
+        '''Adds empty rows and returns the index of the first.'''
+        start = len(self)
+        self.predicted_hours.extend(repeat(_MISSING, count))
+        self.accumulated_hours.extend(repeat(_MISSING, count))
+        self.flags.extend(repeat(0, count))
+        self.deviations.extend(repeat(ie.DeviationClass.UNSET, count))
+        self.hours_coords.extend(repeat(None, count))
+        return start
+
+    def reset_rows(self, start: int, count: int) -> None:
+        '''Empties the rows, keeping their hours coordinates.'''
+        for row in range(start, start + count):
+            self.predicted_hours[row] = _MISSING
+            self.accumulated_hours[row] = _MISSING
+            self.flags[row] = 0
+            self.deviations[row] = ie.DeviationClass.UNSET
+
+    def copy_row(self, source: int, target: int) -> None:
+        '''Copies every column of the source row to the target row.'''
+        self.predicted_hours[target] = self.predicted_hours[source]
+        self.accumulated_hours[target] = self.accumulated_hours[source]
+        self.flags[target] = self.flags[source]
+        self.deviations[target] = self.deviations[source]
+        self.hours_coords[target] = self.hours_coords[source]
+
+    def finalise_rows(self, start: int, count: int) -> None:
+        '''Marks missing or zero accumulated hours red and sets the deviation of the rows.'''
+        for row in range(start, start + count):
+            acc_hrs = self.accumulated_hours[row]
+            if isnan(acc_hrs) or acc_hrs == 0.0:
+                self.flags[row] |= _ACCUMULATED_RED
+            self.set_deviation(row)
+
+    def set_deviation(self, row: int) -> None:
+        '''Sets the deviation of the row by percentage between predicted and accumulated hours.'''
+        pre_hrs = self.predicted_hours[row]
+        acc_hrs = self.accumulated_hours[row]
+        # Use only absolute values to ensure correct calculation of 1 - frac
+        pre_hrs = 0.0 if isnan(pre_hrs) else abs(pre_hrs)
+        acc_hrs = 0.0 if isnan(acc_hrs) else abs(acc_hrs)
+        if acc_hrs == 0 and pre_hrs == 0:
+            self.deviations[row] = ie.DeviationClass.NO_HOURS
+            return
+        frac = (min(acc_hrs, pre_hrs) / max(acc_hrs, pre_hrs))
+        if 1 - frac >= self.thresholds.strong_dev:
+            self.deviations[row] = ie.DeviationClass.STRONG
+        elif 1 - frac >= self.thresholds.weak_dev:
+            self.deviations[row] = ie.DeviationClass.WEAK
+        else:
+            self.deviations[row] = ie.DeviationClass.NEGLIGIBLE
+
 class EmployeeHours:
-    '''Data class for managing the predicted and accumulated hours
-    per employee.'''
-    predicted_hours: Optional[float|int] = None
-    pre_hours_colour: QColor = field(default_factory=lambda: st.DEFAULT_FONT_COLOUR)
-    accumulated_hours: Optional[float|int] = None
-    acc_hours_colour: QColor = field(default_factory=lambda: st.DEFAULT_FONT_COLOUR)
-    hours_coord: Optional[str] = None
-    thresholds: hd.HoursDeviation = field(default_factory=hd.HoursDeviation)
-    deviation: Optional[str] = None
+    '''View of the predicted and accumulated hours of an employee in a month,
+    i.e. of a row of an hours table. Without a table, the view has a table of its own.'''
+    __slots__ = ('table', 'row')
+
+    def __init__(self, table: Optional[HoursTable] = None, row: Optional[int] = None) -> None:
+        self.table = table if table is not None else HoursTable()
+        self.row = self.table.add_rows(1) if row is None else row
+
+    @property
+    def predicted_hours(self) -> Optional[float]:
+        '''Predicted hours, or None if not read yet.'''
+        pre_hrs = self.table.predicted_hours[self.row]
+        return None if isnan(pre_hrs) else pre_hrs
+
+    @predicted_hours.setter
+    def predicted_hours(self, value: Optional[float | int]) -> None:
+        self.table.predicted_hours[self.row] = _MISSING if value is None else value
+
+    @property
+    def accumulated_hours(self) -> Optional[float]:
+        '''Accumulated hours, or None if the employee has none on the selected projects.'''
+        acc_hrs = self.table.accumulated_hours[self.row]
+        return None if isnan(acc_hrs) else acc_hrs
+
+    @accumulated_hours.setter
+    def accumulated_hours(self, value: Optional[float | int]) -> None:
+        self.table.accumulated_hours[self.row] = _MISSING if value is None else value
+
+    @property
+    def pre_hours_colour(self) -> ie.HoursColour:
+        '''Colour of the predicted hours.'''
+        return self._get_colour(_PREDICTED_RED)
+
+    @pre_hours_colour.setter
+    def pre_hours_colour(self, colour: ie.HoursColour) -> None:
+        self._set_colour(_PREDICTED_RED, colour)
+
+    @property
+    def acc_hours_colour(self) -> ie.HoursColour:
+        '''Colour of the accumulated hours.'''
+        return self._get_colour(_ACCUMULATED_RED)
+
+    @acc_hours_colour.setter
+    def acc_hours_colour(self, colour: ie.HoursColour) -> None:
+        self._set_colour(_ACCUMULATED_RED, colour)
+
+    @property
+    def hours_coord(self) -> Optional[str]:
+        '''Coordinate of the hours in the budgeting file.'''
+        return self.table.hours_coords[self.row]
+
+    @hours_coord.setter
+    def hours_coord(self, coord: Optional[str]) -> None:
+        self.table.hours_coords[self.row] = coord
+
+    @property
+    def thresholds(self) -> hd.HoursDeviation:
+        '''Deviation thresholds of the table.'''
+        return self.table.thresholds
+
+    @property
+    def deviation_class(self) -> ie.DeviationClass:
+        '''Deviation between predicted and accumulated hours.'''
+        return ie.DeviationClass(self.table.deviations[self.row])
+
+    @property
+    def deviation(self) -> Optional[str]:
+        '''Deviation as shown in the summary and log, or None if not set yet.'''
+        return DEVIATION_TEXTS[self.deviation_class]
 
     def set_deviation(self) -> None:
         '''Sets the deviation by percentage between predicted and accumulated hours.'''
-        pre_hrs = self.predicted_hours
-        acc_hrs = self.accumulated_hours
-        if not isinstance(acc_hrs, (float, int)):
-            acc_hrs = 0
-        if acc_hrs == 0 and pre_hrs == 0:
-            self.deviation = " "
+        self.table.set_deviation(self.row)
+
+    def _get_colour(self, flag: int) -> ie.HoursColour:
+        '''Returns red if the flag is set.'''
+        return ie.HoursColour.RED if self.table.flags[self.row] & flag else ie.HoursColour.DEFAULT
+
+    def _set_colour(self, flag: int, colour: ie.HoursColour) -> None:
+        '''Sets the flag for red and clears it otherwise.'''
+        if colour == ie.HoursColour.RED:
+            self.table.flags[self.row] |= flag
         else:
-            # Use only absolute values to ensure correct calculation of 1 - frac
-            pre_hrs = abs(pre_hrs)
-            acc_hrs = abs(acc_hrs)
-            frac = (min(acc_hrs, pre_hrs) / max(acc_hrs, pre_hrs))
-            if 1 - frac >= self.thresholds.strong_dev:
-                self.deviation = "Warning! Strong deviation!"
-            elif 1 - frac >= self.thresholds.weak_dev:
-                self.deviation = "Weak deviation"
-            else:
-                self.deviation = "Negligible"
+            self.table.flags[self.row] &= ~flag
 
 @dataclass(slots=True)
 class Employee:
     '''Data class for managing employee name location and related hours
     in the given worksheet. Projects where the employee registered hours
-    will be saved here.'''
+    will be saved here. The hours are rows of an hours table, shared by the
+    employees selected together.'''
     name: str
     found_projects: dict[int|str, list[str]] = field(default_factory=dict)
-    hours: EmployeeHours = field(default_factory=EmployeeHours)
+    # Project IDs with hours in each month and year of the date range
+    month_projects: dict[tuple[int, int], list[int|str]] = field(default_factory=dict)
+    table: HoursTable = field(default_factory=HoursTable)
+    # Month and year of every month of the date range, one table row each from the first row
+    months: tuple[tuple[int, int], ...] = ()
+    first_row: int = -1
+    # Most similar input names with their similarity if the name is in no input
+    suggestions: list[tuple[str, float]] = field(default_factory=list)
+
+    @property
+    def hours(self) -> EmployeeHours:
+        '''Hours of the first month of the date range.'''
+        if self.first_row < 0:
+            self.first_row = self.table.add_rows(1)
+        return EmployeeHours(self.table, self.first_row)
+
+    @property
+    def hours_by_month(self) -> dict[tuple[int, int], EmployeeHours]:
+        '''Hours of every month of the date range by month and year.'''
+        return dict(self.yield_month_hours())
+
+    def set_date_range(self, months: Iterable[tuple[int, int]]) -> None:
+        '''Sets up the hours of each month and year of the date range. The first month
+        keeps the hours set before.'''
+        months = tuple(months)
+        allocated = max(len(self.months), 1) if self.first_row >= 0 else 0
+        if len(months) > allocated:
+            first_row = self.table.add_rows(len(months))
+            if self.first_row >= 0:
+                self.table.copy_row(self.first_row, first_row)
+            self.first_row = first_row
+        self.months = months
+
+    def reset_hours(self) -> None:
+        '''Empties the hours of every month of the date range.'''
+        if self.first_row >= 0:
+            self.table.reset_rows(self.first_row, max(len(self.months), 1))
+
+    def finalise_hours(self) -> None:
+        '''Marks missing accumulated hours and sets the deviation of every month.'''
+        if self.first_row >= 0:
+            self.table.finalise_rows(self.first_row, len(self.months))
+
+    def yield_month_hours(self) -> Iterator[tuple[tuple[int, int], EmployeeHours]]:
+        '''Yields the month and year with the hours of every month of the date range.'''
+        for idx, month in enumerate(self.months):
+            yield month, EmployeeHours(self.table, self.first_row + idx)
@@ -0,0 +1,91 @@
+'''
+Package
+-------
+Data Handling
+
+Module Name
+---------
+File Watcher
+
+Author
+-------
+Karl Goran Antony Zuvela
+
+Description
+-----------
+Watches the files of tracked workbooks and reports those which changed on disk.
+'''
+#           --- Standard libraries ---
+import threading
+from typing import Callable, Optional
+#           --- First party libraries ---
+import phb_app.utils.file_handling_utils as fu
+import phb_app.templating.types as t
+
+type ChangeCallback = Callable[[str], None]
+
+class FileWatcher:
+    '''Polls the fingerprints of the watched files in a background thread.
+    A change is only reported once the file has stopped changing for one
+    poll interval, so that a file still being exported is not read half written.
+    Polling is used instead of OS notifications, as these differ per platform
+    and the SAP extracts often lie on network drives, which do not support them.'''
+    __slots__ = (
+        '_callback', '_interval', '_fingerprints', '_pending', '_lock', '_stop_event', '_thread'
+    )
+
+    def __init__(self, callback: ChangeCallback, interval: float = 1.0) -> None:
+        self._callback = callback
+        self._interval = interval
+        self._fingerprints: dict[str, Optional[t.FileFingerprint]] = {}
+        self._pending: dict[str, t.FileFingerprint] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, file_path: str) -> None:
+        '''Start watching the given file. The thread is only started with the first file.'''
+        with self._lock:
+            self._fingerprints[file_path] = fu.get_file_fingerprint(file_path)
+            self._pending.pop(file_path, None)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="phb-file-watcher", daemon=True)
+            self._thread.start()
+
+    def unwatch(self, file_path: str) -> None:
+        '''Stop watching the given file.'''
+        with self._lock:
+            self._fingerprints.pop(file_path, None)
+            self._pending.pop(file_path, None)
+
+    def stop(self) -> None:
+        '''Stop the watcher thread.'''
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        '''Poll until stopped.'''
+        while not self._stop_event.wait(self._interval):
+            for file_path in self._poll():
+                self._callback(file_path)
+
+    def _poll(self) -> list[str]:
+        '''Returns the files which changed and have since been stable for one interval.'''
+        changed = []
+        with self._lock:
+            for file_path, known in self._fingerprints.items():
+                current = fu.get_file_fingerprint(file_path)
+                # A missing file is usually being replaced. Wait for it to return.
+                if current is None or current == known:
+                    self._pending.pop(file_path, None)
+                    continue
+                if self._pending.get(file_path) == current:
+                    # Stable since the last poll
+                    del self._pending[file_path]
+                    self._fingerprints[file_path] = current
+                    changed.append(file_path)
+                else:
+                    self._pending[file_path] = current
+        return changed
@@ -27,7 +27,8 @@ OUTPUT_COLUMN_WIDTHS = {
     ie.OutputTableHeaders.FILENAME: 250,
     ie.OutputTableHeaders.WORKSHEET: 150,
     ie.OutputTableHeaders.MONTH: 60,
-    ie.OutputTableHeaders.YEAR: 60
+    ie.OutputTableHeaders.YEAR: 60,
+    ie.OutputTableHeaders.MONTHS: 60
 }
 
 PROJECT_COLUMN_WIDTHS = {
@@ -49,7 +50,17 @@ SUMMARY_DATA_COLUMN_WIDTHS = {
     ie.SummaryDataTableHeaders.DEVIATION: 160,
     ie.SummaryDataTableHeaders.PROJECT_ID: 450,
     ie.SummaryDataTableHeaders.OUTPUT_WORKSHEET: 150,
-    ie.SummaryDataTableHeaders.COORDINATE: 80
+    ie.SummaryDataTableHeaders.COORDINATE: 80,
+    ie.SummaryDataTableHeaders.SUGGESTIONS: 300
+}
+
+CELL_CHANGE_COLUMN_WIDTHS = {
+    ie.CellChangeTableHeaders.SHEET: 120,
+    ie.CellChangeTableHeaders.COORDINATE: 80,
+    ie.CellChangeTableHeaders.OLD_VALUE: 120,
+    ie.CellChangeTableHeaders.NEW_VALUE: 120,
+    ie.CellChangeTableHeaders.OLD_STYLE: 250,
+    ie.CellChangeTableHeaders.NEW_STYLE: 250
 }
 
 DEFAULT_PADDING = 5
@@ -0,0 +1,326 @@
+'''
+Package
+-------
+Data Handling
+
+Module Name
+---------
+History Store
+
+Author
+-------
+Karl Goran Antony Zuvela
+
+Description
+-----------
+Keeps the bookings and the hours summed per employee, project and month of every
+ingested input workbook in a local SQLite database. A workbook is stored once per
+version on disk and locale, i.e. country, headers and CSV format, so that an
+unchanged workbook is taken from the store rather than read again. When several
+stored versions of a workbook cover the same month, the one stored last is taken for
+that month, while other workbooks of the country add their hours to it. Only the
+most recently stored versions are kept. The history is only kept if switched on in
+the settings. The store is shared by the wizard's threads, e.g. the reloader and the
+aggregation, so that every call is serialised.
+'''
+#           --- Standard libraries ---
+import json
+import sqlite3
+import threading
+from dataclasses import asdict
+from datetime import datetime
+from math import isnan
+from os import makedirs, path
+from typing import Iterable, Optional
+#           --- First party libraries ---
+import phb_app.data.aggregation as agg
+import phb_app.data.booking_management as bm
+import phb_app.data.ingestion_settings as ing
+import phb_app.data.location_management as loc
+import phb_app.templating.types as t
+
+DEFAULT_DB_DIR = ".project_hours_budgeter"
+DEFAULT_DB_NAME = "history.sqlite3"
+
+# Databases of another layout are recreated
+_SCHEMA_VERSION = 2
+_DROP_SCHEMA = """
+DROP TABLE IF EXISTS month_sources;
+DROP TABLE IF EXISTS aggregates;
+DROP TABLE IF EXISTS bookings;
+DROP TABLE IF EXISTS sources;
+"""
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    file_path TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    locale_key TEXT NOT NULL,
+    country TEXT NOT NULL,
+    stored_at TEXT NOT NULL,
+    UNIQUE (file_path, mtime_ns, size, locale_key)
+);
+CREATE TABLE IF NOT EXISTS bookings (
+    source_id INTEGER NOT NULL REFERENCES sources(id) ON DELETE CASCADE,
+    employee TEXT NOT NULL,
+    project_id TEXT NOT NULL,
+    description TEXT,
+    hours REAL,
+    date_serial REAL
+);
+CREATE TABLE IF NOT EXISTS aggregates (
+    source_id INTEGER NOT NULL REFERENCES sources(id) ON DELETE CASCADE,
+    employee TEXT NOT NULL,
+    project_id TEXT NOT NULL,
+    month_key INTEGER NOT NULL,
+    hours REAL NOT NULL,
+    UNIQUE (source_id, employee, project_id, month_key)
+);
+CREATE TABLE IF NOT EXISTS month_sources (
+    country TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    month_key INTEGER NOT NULL,
+    source_id INTEGER NOT NULL REFERENCES sources(id) ON DELETE CASCADE,
+    PRIMARY KEY (country, file_path, month_key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_bookings_source ON bookings (source_id);
+CREATE INDEX IF NOT EXISTS idx_bookings_employee ON bookings (employee);
+CREATE INDEX IF NOT EXISTS idx_bookings_project ON bookings (project_id);
+CREATE INDEX IF NOT EXISTS idx_bookings_date ON bookings (date_serial);
+CREATE INDEX IF NOT EXISTS idx_aggregates_employee ON aggregates (employee, month_key);
+CREATE INDEX IF NOT EXISTS idx_aggregates_project ON aggregates (project_id, month_key);
+CREATE INDEX IF NOT EXISTS idx_aggregates_month ON aggregates (month_key);
+PRAGMA user_version = {_SCHEMA_VERSION};
+"""
+
+class HistoryStore:
+    '''Stores and queries the bookings and summed hours of ingested input workbooks.'''
+    __slots__ = ('db_path', 'max_sources', '_conn', '_lock')
+
+    def __init__(self, db_path: str, max_sources: Optional[int] = None) -> None:
+        self.db_path = db_path
+        # Workbook versions kept; older ones are deleted once another is stored
+        self.max_sources = max_sources
+        if db_path != ":memory:":
+            makedirs(path.dirname(path.abspath(db_path)), exist_ok=True)
+        # Used by several threads, e.g. the GUI, the reloader and the daemon's, one at a time
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.RLock()
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+            self._conn.executescript(_DROP_SCHEMA)
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        '''Closes the database.'''
+        with self._lock:
+            self._conn.close()
+
+    def find_source(
+        self,
+        file_path: str,
+        fingerprint: Optional[t.FileFingerprint],
+        locale_key: str = ""
+    ) -> Optional[int]:
+        '''Returns the ID of the stored version of the workbook read with the locale, or None
+        if this version is not stored.'''
+        if fingerprint is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM sources "
+                "WHERE file_path = ? AND mtime_ns = ? AND size = ? AND locale_key = ?",
+                (path.abspath(file_path), *fingerprint, locale_key)
+            ).fetchone()
+        return row[0] if row else None
+
+    # One argument per column of a stored source
+    def save( # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        file_path: str,
+        fingerprint: Optional[t.FileFingerprint],
+        country: str,
+        table: bm.BookingTable,
+        aggregate: agg.BookingAggregate,
+        locale_key: str = ""
+    ) -> Optional[int]:
+        '''Stores the bookings and summed hours of the workbook version read with the locale
+        and makes it the workbook's source of the months it covers. Returns the ID of the source, or
+        None if the workbook cannot be accessed anymore.'''
+        if fingerprint is None:
+            return None
+        with self._lock:
+            # Already stored, e.g. if the file changed back on disk
+            if (source_id := self.find_source(file_path, fingerprint, locale_key)) is not None:
+                return source_id
+            source_id = self._insert_source(
+                file_path, fingerprint, country, table, aggregate, locale_key
+            )
+            if self.max_sources is not None:
+                self.prune(self.max_sources)
+        return source_id
+
+    def _insert_source( # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        file_path: str,
+        fingerprint: t.FileFingerprint,
+        country: str,
+        table: bm.BookingTable,
+        aggregate: agg.BookingAggregate,
+        locale_key: str
+    ) -> int:
+        '''Inserts the workbook version with its bookings and summed hours in one transaction.'''
+        pool = table.pool
+        file_path = path.abspath(file_path)
+        with self._conn:
+            source_id = self._conn.execute(
+                "INSERT INTO sources (file_path, mtime_ns, size, locale_key, country, stored_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    file_path, *fingerprint, locale_key, country,
+                    datetime.now().isoformat(timespec="seconds")
+                )
+            ).lastrowid
+            self._conn.executemany(
+                "INSERT INTO bookings VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        source_id,
+                        pool[name_ref],
+                        pool[proj_ref],
+                        None if desc_ref == bm.MISSING_REF else pool[desc_ref],
+                        None if isnan(hours) else hours,
+                        None if isnan(serial) else serial
+                    )
+                    for name_ref, proj_ref, desc_ref, hours, serial
+                    in zip(
+                        table.names, table.proj_ids, table.descriptions,
+                        table.hours, table.date_serials
+                    )
+                )
+            )
+            self._conn.executemany(
+                "INSERT INTO aggregates VALUES (?, ?, ?, ?, ?)",
+                (
+                    (source_id, pool[name_ref], pool[proj_ref], month_key, hours)
+                    for (name_ref, proj_ref, month_key), hours in aggregate.sums.items()
+                )
+            )
+            # Only a newer version of the same workbook supersedes the months of an older one
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO month_sources VALUES (?, ?, ?, ?)",
+                (
+                    (country, file_path, month_key, source_id)
+                    for month_key in {key[2] for key in aggregate.sums}
+                )
+            )
+        return source_id
+
+    def prune(self, max_sources: int) -> int:
+        '''Deletes all but the given number of most recently stored workbook versions with
+        their bookings and summed hours. Returns the number of versions deleted.'''
+        with self._lock, self._conn:
+            return self._conn.execute(
+                "DELETE FROM sources WHERE id NOT IN "
+                "(SELECT id FROM sources ORDER BY id DESC LIMIT ?)",
+                (max(max_sources, 0),)
+            ).rowcount
+
+    def load_bookings(self, source_id: int) -> bm.BookingTable:
+        '''Returns the stored bookings of the source in their original order.'''
+        table = bm.BookingTable()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT employee, project_id, description, hours, date_serial FROM bookings "
+                "WHERE source_id = ? ORDER BY rowid",
+                (source_id,)
+            ).fetchall()
+        for name, proj_id, description, hours, serial in rows:
+            table.append(name, proj_id, description, hours, serial)
+        return table
+
+    def load_aggregate(self, source_id: int, pool: bm.StringPool) -> agg.BookingAggregate:
+        '''Returns the stored summed hours of the source in their original order, referring
+        into the given string pool.'''
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT employee, project_id, month_key, hours FROM aggregates "
+                "WHERE source_id = ? ORDER BY rowid",
+                (source_id,)
+            ).fetchall()
+        return agg.BookingAggregate(
+            pool,
+            {
+                (pool.intern(name), pool.intern(proj_id), month_key): hours
+                for name, proj_id, month_key, hours in rows
+            }
+        )
+
+    def query_hours(
+        self,
+        employee: str,
+        proj_ids: Optional[Iterable[str]] = None,
+        start: Optional[tuple[int, int]] = None,
+        end: Optional[tuple[int, int]] = None
+    ) -> list[tuple[int, int, str, float]]:
+        '''Returns the year, month, project ID and hours of the employee per month from the
+        start to the end month, both given as month and year and both included, optionally
+        only on the given project IDs. Each month is summed over the latest stored version
+        of each workbook covering it.'''
+        query = [
+            "SELECT a.month_key, a.project_id, SUM(a.hours) FROM aggregates a",
+            "JOIN month_sources m ON m.source_id = a.source_id AND m.month_key = a.month_key",
+            "WHERE a.employee = ?"
+        ]
+        params: list = [employee]
+        if proj_ids is not None:
+            proj_ids = list(proj_ids)
+            query.append(f"AND a.project_id IN ({', '.join('?' * len(proj_ids))})")
+            params.extend(proj_ids)
+        if start is not None:
+            query.append("AND a.month_key >= ?")
+            params.append(agg.to_month_key(*start))
+        if end is not None:
+            query.append("AND a.month_key <= ?")
+            params.append(agg.to_month_key(*end))
+        query.append("GROUP BY a.month_key, a.project_id ORDER BY a.month_key, a.project_id")
+        with self._lock:
+            rows = self._conn.execute(" ".join(query), params).fetchall()
+        return [
+            (month_key // 12, month_key % 12 + 1, proj_id, hours)
+            for month_key, proj_id, hours in rows
+        ]
+
+#           --- MODULE FUNCTIONS ---
+
+def get_locale_key(locale_data: loc.InputLocaleData) -> str:
+    '''Public module level. Returns the country, worksheet, headers and CSV format the
+    workbook is read with, as a key of its stored versions.'''
+    return json.dumps([
+        locale_data.country,
+        locale_data.exp_sheet_name,
+        asdict(locale_data.filter_headers),
+        asdict(locale_data.csv_format)
+    ], sort_keys=True)
+
+def get_default_db_path() -> str:
+    '''Public module level. Returns the path of the history database in the user's
+    home directory.'''
+    return path.join(path.expanduser("~"), DEFAULT_DB_DIR, DEFAULT_DB_NAME)
+
+def open_history_store(
+    settings: Optional[ing.IngestionSettings] = None,
+    query_only: bool = False
+) -> Optional[HistoryStore]:
+    '''Public module level. Opens the configured history database. Returns None if
+    keeping the history is switched off or the database cannot be opened. To only
+    query it, an existing database is opened even if the history is switched off.'''
+    settings = settings or ing.get_ingestion_settings()
+    db_path = settings.history_db or get_default_db_path()
+    if not (settings.keep_history or (query_only and path.isfile(db_path))):
+        return None
+    try:
+        return HistoryStore(db_path, settings.history_max_sources)
+    except (OSError, sqlite3.Error):
+        return None
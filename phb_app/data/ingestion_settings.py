@@ -0,0 +1,70 @@
+'''
+Package
+-------
+Data Handling
+
+Module Name
+---------
+Ingestion Settings
+
+Author
+-------
+Karl Goran Antony Zuvela
+
+Description
+-----------
+Settings for reading the input workbooks in the project hours budgeting wizard.
+The configuration file is read once per process, through get_ingestion_settings.
+'''
+#           --- Standard libraries ---
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+#           --- First party libraries ---
+import phb_app.wizard.constants.ui_strings as st
+import phb_app.data.yaml_handler as yh
+
+# One attribute per setting of the configuration file
+@dataclass(slots=True)
+class IngestionSettings(yh.YamlHandler): # pylint: disable=too-many-instance-attributes
+    '''Data class for the input workbook ingestion settings.'''
+    input_backend: st.InputBackend = st.InputBackend.OPENPYXL
+    # Drop the workbook objects of inputs once their bookings are ingested
+    release_workbooks: bool = False
+    # Resident memory in MB above which ingested workbooks are dropped anyway
+    memory_budget_mb: Optional[int] = None
+    # Worker processes summing the bookings; 1 sums them in the wizard's process
+    aggregation_workers: int = 1
+    # Rows of bookings summed per chunk
+    aggregation_chunk_rows: int = 250_000
+    # Worker processes recording hours in budgeting files in batch runs
+    output_workers: int = 1
+    # Localhost port of the daemon keeping parsed inputs in memory
+    daemon_port: int = 47615
+    # Keep the bookings and summed hours of every input in the history database
+    keep_history: bool = False
+    # Path of the history database; by default in the user's home directory
+    history_db: Optional[str] = None
+    # Most recently stored input versions kept in the history database
+    history_max_sources: int = 50
+    # Journal the original cells of the budgeting file before hours are written
+    keep_backups: bool = True
+    # Leave out bookings of an input already in an earlier input, e.g. of overlapping extracts
+    drop_duplicate_bookings: bool = True
+
+    def __post_init__(self):
+        yh.YamlHandler.__init__(self)
+        self.input_backend = st.InputBackend(self.input_backend)
+
+    def _process_yaml(self, yaml_data) -> None:
+        '''Processes the yaml data.'''
+        settings: Optional[dict[str, str | int | bool]] = yaml_data.get(st.YamlEnum.INGESTION) or {}
+        for key, value in settings.items():
+            if hasattr(self, key):
+                setattr(self, key, value)
+
+@lru_cache(maxsize=1)
+def get_ingestion_settings() -> IngestionSettings:
+    '''Public module level. Returns the settings, read from the configuration file on the
+    first call only. They are shared, so they are not to be changed.'''
+    return IngestionSettings()
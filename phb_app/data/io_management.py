@@ -25,6 +25,7 @@ import phb_app.data.location_management as loc
 import phb_app.data.worksheet_management as ws
 import phb_app.utils.hours_utils as hu
 import phb_app.utils.page_utils as pu
+import phb_app.wizard.constants.colours as co
 import phb_app.wizard.constants.integer_enums as ie
 import phb_app.templating.types as t
 
@@ -53,6 +54,8 @@ class SelectedText:
     year: Optional[str] = None
     month: Optional[str] = None
     worksheet: Optional[str] = None
+    # Number of months from the selected month on
+    months: Optional[str] = None
 
 @dataclass(slots=True)
 class IOControls:
@@ -70,6 +73,7 @@ class Dropdowns:
     year: QComboBox
     month: QComboBox
     worksheet: QComboBox
+    months: QComboBox
     current_text: SelectedText = field(default_factory=SelectedText)
 
 @dataclass(slots=True)
@@ -111,6 +115,7 @@ class SummaryDataTableItems:
     proj_id: Optional[QTableWidgetItem] = None
     out_ws: Optional[QTableWidgetItem] = None
     coord: Optional[QTableWidgetItem] = None
+    suggestions: Optional[QTableWidgetItem] = None
 
 @dataclass(slots=True)
 class IOFileContext:
@@ -154,6 +159,7 @@ class SummaryDataContext:
     proj_id: Optional[t.ProjectId] = None
     out_ws_name: Optional[str] = None
     coord: Optional[str] = None
+    suggestions: Optional[str] = None
     table_items: Optional[SummaryDataTableItems] = field(default_factory=SummaryDataTableItems)
 
 type FileHandlerData = (
@@ -197,8 +203,9 @@ def _configure_input_file_row(
     ) -> None:
     '''Configure the input row in the table.'''
     import phb_app.data.workbook_management as wm # pylint: disable=import-outside-toplevel
-    ws.init_input_worksheet(wb_ctx)
+    # The locale is required to choose the worksheet and to read CSV files
     pu.update_handlers_country_details(ent_ctx.data.country_data, wb_ctx)
+    ws.init_input_worksheet(wb_ctx)
     ent_ctx.data.table_items.country = QTableWidgetItem(wb_ctx.locale_data.country)
     pu.insert_row_data_widget(ent_ctx.panel.table, ent_ctx.data.table_items.country, row, ie.InputTableHeaders.COUNTRY)
     ent_ctx.data.table_items.sheet_name = QTableWidgetItem(wb_ctx.managed_sheet.selected_sheet.sheet_name)
@@ -214,7 +221,10 @@ def _configure_output_file_row(
     '''Configure the output row in the table.'''
     import phb_app.data.workbook_management as wm # pylint: disable=import-outside-toplevel
     ws.init_output_worksheet(wb_ctx)
-    dropdowns = Dropdowns(pu.create_year_dropdown(), pu.create_month_dropdown(), pu.create_worksheet_dropdown(wb_ctx))
+    dropdowns = Dropdowns(
+        pu.create_year_dropdown(), pu.create_month_dropdown(),
+        pu.create_worksheet_dropdown(wb_ctx), pu.create_months_dropdown()
+    )
     pu.setup_dropdowns(ent_ctx.panel.table, row, dropdowns)
     ent_ctx.data.table_items.uuid = QTableWidgetItem(str(wb_ctx.mngd_wb.uuid))
     pu.insert_row_data_widget(ent_ctx.panel.table, ent_ctx.data.table_items.uuid, row, ie.InputTableHeaders.UNIQUE_ID)
@@ -271,10 +281,10 @@ def _configure_summary_data_row(
     ent_ctx.data.table_items.emp_name = QTableWidgetItem(ent_ctx.data.emp_name)
     pu.insert_row_data_widget(ent_ctx.panel.table, ent_ctx.data.table_items.emp_name, row, ie.SummaryDataTableHeaders.EMPLOYEE)
     ent_ctx.data.table_items.pred_hrs = QTableWidgetItem(hu.format_summary_data_row_hours(ent_ctx.data.pred_hrs, st.SpecialStrings.ZERO_HOURS))
-    ent_ctx.data.table_items.pred_hrs.setForeground(hours.pre_hours_colour)
+    ent_ctx.data.table_items.pred_hrs.setForeground(co.to_qcolor(hours.pre_hours_colour))
     pu.insert_row_data_widget(ent_ctx.panel.table, ent_ctx.data.table_items.pred_hrs, row, ie.SummaryDataTableHeaders.PREDICTED_HOURS)
     ent_ctx.data.table_items.acc_hrs = QTableWidgetItem(hu.format_summary_data_row_hours(ent_ctx.data.acc_hrs, st.SpecialStrings.MISSING))
-    ent_ctx.data.table_items.acc_hrs.setForeground(hours.acc_hours_colour)
+    ent_ctx.data.table_items.acc_hrs.setForeground(co.to_qcolor(hours.acc_hours_colour))
     pu.insert_row_data_widget(ent_ctx.panel.table, ent_ctx.data.table_items.acc_hrs, row, ie.SummaryDataTableHeaders.ACCUMULATED_HOURS)
     ent_ctx.data.table_items.dev = QTableWidgetItem(ent_ctx.data.dev)
     pu.insert_row_data_widget(ent_ctx.panel.table, ent_ctx.data.table_items.dev, row, ie.SummaryDataTableHeaders.DEVIATION)
@@ -284,6 +294,11 @@ def _configure_summary_data_row(
     pu.insert_row_data_widget(ent_ctx.panel.table, ent_ctx.data.table_items.out_ws, row, ie.SummaryDataTableHeaders.OUTPUT_WORKSHEET)
     ent_ctx.data.table_items.coord = QTableWidgetItem(ent_ctx.data.coord)
     pu.insert_row_data_widget(ent_ctx.panel.table, ent_ctx.data.table_items.coord, row, ie.SummaryDataTableHeaders.COORDINATE)
+    ent_ctx.data.table_items.suggestions = QTableWidgetItem(ent_ctx.data.suggestions)
+    pu.insert_row_data_widget(
+        ent_ctx.panel.table, ent_ctx.data.table_items.suggestions, row,
+        ie.SummaryDataTableHeaders.SUGGESTIONS
+    )
 
 def join_str_list(formatter: str, items: t.StrList) -> str:
     '''Public module function. Joins the items into a single string.'''
@@ -302,10 +317,11 @@ def update_current_text(dd: Dropdowns) -> None:
     dd.current_text.year = dd.year.currentText()
     dd.current_text.month = dd.month.currentText()
     dd.current_text.worksheet = dd.worksheet.currentText()
+    dd.current_text.months = dd.months.currentText()
 
 def connect_dropdowns(dd: Dropdowns, func: Callable) -> None:
     '''Public module function. Connect the dropdowns to the given function.'''
-    for dropdown in (dd.year, dd.month, dd.worksheet):
+    for dropdown in (dd.year, dd.month, dd.worksheet, dd.months):
         dropdown.currentTextChanged.connect(func)
 
 def get_selected_rows(table: QTableWidget) -> list[QModelIndex]:
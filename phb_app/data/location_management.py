@@ -27,6 +27,15 @@ class FilterHeaders:
     hours: str
     date: str
 
+@dataclass(slots=True)
+class CsvFormat:
+    '''Data class for the format of CSV and TSV exports.
+    These data are received from LocaleData.'''
+    delimiter: str = ","
+    decimal_separator: str = "."
+    encoding: str = "utf-8-sig" # Also reads files without a byte order mark
+    date_format: str = "%d.%m.%Y"
+
 @dataclass(slots=True)
 class FilePatternData:
     '''Parent data class for establishing the Excel file's naming.'''
@@ -34,6 +43,8 @@ class FilePatternData:
     file_type: str
     # Regular expresion to filter for file in open file dialog.
     file_patterns: list[str]
+    # Accepted file extensions, e.g. .xlsx or .csv
+    file_extensions: list[str]
 
 @dataclass(slots=True)
 class InputLocaleData(FilePatternData):
@@ -41,10 +52,13 @@ class InputLocaleData(FilePatternData):
     country: str # Country name
     exp_sheet_name: str # Expected worksheet name
     filter_headers: FilterHeaders = field(default_factory=dict)
+    csv_format: CsvFormat = field(default_factory=dict)
 
     def __post_init__(self):
-        '''Init the filter headers from the data received from the country data dataclass.'''
+        '''Init the filter headers and CSV format from the data received from the
+        country data dataclass.'''
         self.filter_headers = FilterHeaders(**self.filter_headers)
+        self.csv_format = CsvFormat(**self.csv_format)
 
 @dataclass(slots=True)
 class CountryData(yh.YamlHandler):
@@ -12,7 +12,7 @@ Description
 PHB Wizard logging data management.
 '''
 #           --- Standard libraries ---
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 
 @dataclass(slots=True)
@@ -23,6 +23,17 @@ class FileMetaData:
     input_workbooks: list[str]
     output_file_name: str
     output_worksheet_name: str
+    memory_report: list[str] = field(default_factory=list)
+    # Hits and misses of each result cache
+    cache_report: list[str] = field(default_factory=list)
+    # How the text dates of each input were read
+    date_report: list[str] = field(default_factory=list)
+    # Hours of each input which were not numbers
+    hours_report: list[str] = field(default_factory=list)
+    # Bookings of each input also in an earlier input
+    duplicate_report: list[str] = field(default_factory=list)
+    # Month and year of each log section
+    months: list[tuple[int, int]] = field(default_factory=list)
 
 @dataclass(slots=True)
 class TableStructure:
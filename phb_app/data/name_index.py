@@ -0,0 +1,108 @@
+'''
+Package
+-------
+Data Handling
+
+Module Name
+---------
+Name Index
+
+Author
+-------
+Karl Goran Antony Zuvela
+
+Description
+-----------
+Trigram index over the distinct employee names of the inputs. A budgeting file name
+without an exact match is compared only with the names sharing at least one trigram,
+found through the index's posting lists, rather than with every name. Names are
+compared case- and accent-insensitively and regardless of the order of their parts,
+e.g. "Wilmsen-Bolnbach, Karsten" matches "Karsten Wilmsen-Bolnbach".
+'''
+#           --- Standard libraries ---
+import heapq
+import re
+import unicodedata
+from typing import Iterable
+
+# Name and similarity between 0 and 1
+type NameSuggestion = tuple[str, float]
+
+DEFAULT_LIMIT = 3
+# Jaccard similarity of the trigram sets below which names are not suggested
+DEFAULT_MIN_SCORE = 0.3
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+class NameIndex:
+    '''Trigram index of names, suggesting the most similar names for a given one.'''
+    __slots__ = ('names', '_known', '_gram_counts', '_postings')
+
+    def __init__(self, names: Iterable[str] = ()) -> None:
+        self.names: list[str] = []
+        self._known: set[str] = set()
+        # Number of distinct trigrams of each name, by name index
+        self._gram_counts: list[int] = []
+        # Indices of the names containing each trigram
+        self._postings: dict[str, list[int]] = {}
+        for name in names:
+            self.add(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._known
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add(self, name: str) -> None:
+        '''Adds the name to the index, once.'''
+        if name in self._known:
+            return
+        idx = len(self.names)
+        self._known.add(name)
+        self.names.append(name)
+        grams = to_trigrams(name)
+        self._gram_counts.append(len(grams))
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(idx)
+
+    def suggest(
+        self,
+        name: str,
+        limit: int = DEFAULT_LIMIT,
+        min_score: float = DEFAULT_MIN_SCORE
+    ) -> list[NameSuggestion]:
+        '''Returns up to the limit of the most similar indexed names with their similarity,
+        best first.'''
+        grams = to_trigrams(name)
+        shared: dict[int, int] = {}
+        for gram in grams:
+            for idx in self._postings.get(gram, ()):
+                shared[idx] = shared.get(idx, 0) + 1
+        scored = (
+            (count / (len(grams) + self._gram_counts[idx] - count), idx)
+            for idx, count in shared.items()
+        )
+        best = heapq.nlargest(limit, (item for item in scored if item[0] >= min_score))
+        return [(self.names[idx], round(score, 2)) for score, idx in best]
+
+def normalise_name(name: str) -> str:
+    '''Public module level. Returns the name in lower case without accents or punctuation,
+    its parts in alphabetical order.'''
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(sorted(_NON_WORD.sub(" ", stripped.casefold()).split()))
+
+def to_trigrams(name: str) -> set[str]:
+    '''Public module level. Returns the trigrams of each part of the normalised name,
+    padded so that the start and end of each part count.'''
+    return {
+        padded[i:i + 3]
+        for part in normalise_name(name).split()
+        for padded in (f"  {part} ",)
+        for i in range(len(padded) - 2)
+    }
+
+def format_suggestions(suggestions: list[NameSuggestion]) -> str:
+    '''Public module level. Formats the suggestions as one line.'''
+    return ", ".join(f"{name} ({score:.0%})" for name, score in suggestions)
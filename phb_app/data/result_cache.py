@@ -0,0 +1,123 @@
+'''
+Package
+-------
+Data Handling
+
+Module Name
+---------
+Result Cache
+
+Author
+-------
+Karl Goran Antony Zuvela
+
+Description
+-----------
+Named caches of results read from the workbooks, e.g. through Excel. Entries are
+keyed explicitly by the file, its fingerprint (modification time and size), the
+worksheet and whatever else the result depends on, so a file changed on disk is
+never answered from the cache. Each cache keeps its most recently used entries up
+to a maximum. The workbook manager drops the entries of a file once it is added,
+reloaded or removed, and the hits and misses of every cache are written to the log.
+'''
+#           --- Standard libraries ---
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional
+#           --- First party libraries ---
+import phb_app.templating.types as t
+
+DEFAULT_MAX_ENTRIES = 16
+
+@dataclass(slots=True, frozen=True)
+class CacheKey:
+    '''Data class for the key of a cached result.'''
+    file_path: str
+    # None if the file could not be accessed
+    fingerprint: Optional[t.FileFingerprint]
+    sheet_name: str
+    # Anything else the result depends on, e.g. dates or coordinates
+    detail: Hashable = ()
+
+@dataclass(slots=True)
+class CacheStats:
+    '''Data class for the counters of a cache.'''
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+class NamedCache:
+    '''Cache of the most recently used results, keyed by CacheKey.'''
+    __slots__ = ('name', 'max_entries', 'stats', '_entries', '_lock')
+
+    def __init__(self, name: str, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.name = name
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+        self._entries: OrderedDict[CacheKey, object] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_compute[R](self, key: CacheKey, compute: Callable[[], R]) -> R:
+        '''Returns the cached result for the key, computing and caching it if missing.'''
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return self._entries[key]
+            self.stats.misses += 1
+        # Computed outside of the lock, as it may take long, e.g. through Excel
+        result = compute()
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+        return result
+
+    def invalidate_file(self, file_path: str) -> None:
+        '''Drops every entry of the file.'''
+        with self._lock:
+            stale = [key for key in self._entries if key.file_path == file_path]
+            for key in stale:
+                del self._entries[key]
+            self.stats.invalidations += len(stale)
+
+    def clear(self) -> None:
+        '''Drops every entry and resets the counters.'''
+        with self._lock:
+            self._entries.clear()
+            self.stats = CacheStats()
+
+_caches: dict[str, NamedCache] = {}
+_caches_lock = threading.Lock()
+
+def get_cache(name: str, max_entries: int = DEFAULT_MAX_ENTRIES) -> NamedCache:
+    '''Public module level. Returns the cache of the given name, created on first use.'''
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = NamedCache(name, max_entries)
+        return _caches[name]
+
+def invalidate_file(file_path: str) -> None:
+    '''Public module level. Drops the entries of the file from every cache.'''
+    for cache in list(_caches.values()):
+        cache.invalidate_file(file_path)
+
+def yield_caches() -> Iterator[NamedCache]:
+    '''Public module level. Yields every cache by name.'''
+    yield from sorted(_caches.values(), key=lambda cache: cache.name)
+
+def format_cache_stats(cache: NamedCache) -> str:
+    '''Public module level. Formats the counters of the cache as one line.'''
+    stats = cache.stats
+    return (
+        f"{cache.name}: {stats.hits} hits, {stats.misses} misses, {stats.evictions} evicted, "
+        f"{stats.invalidations} invalidated, {len(cache)}/{cache.max_entries} entries"
+    )
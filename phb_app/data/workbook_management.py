@@ -17,17 +17,36 @@ Provides workbook management.
 """
 #           --- Standard libraries ---
 from os import path
-from typing import Optional, Iterator
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Iterator, Callable, TYPE_CHECKING
 from uuid import UUID, uuid4
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+import gc
 #           --- Third party libraries ---
 from openpyxl import Workbook
 #           --- First party libraries ---
 import phb_app.wizard.constants.ui_strings as st
+import phb_app.templating.types as t
 import phb_app.data.location_management as loc
 import phb_app.logging.exceptions as ex
 import phb_app.data.worksheet_management as ws
 import phb_app.utils.file_handling_utils as fu
+import phb_app.data.file_watcher as fw
+import phb_app.data.ingestion_settings as ing
+import phb_app.utils.memory_utils as mu
+import phb_app.data.history_store as hs
+import phb_app.data.backup_journal as bj
+import phb_app.data.result_cache as rc
+import phb_app.data.booking_management as bm
+import phb_app.data.aggregation as agg
+
+if TYPE_CHECKING:
+    import phb_app.daemon as dmn
+
+type InvalidationHook = Callable[[st.IORole, UUID], None]
+# Whether duplicates are dropped, with the UUID and aggregate of each input in order
+type DuplicatesBasis = tuple[bool, list[tuple[UUID, Optional[agg.BookingAggregate]]]]
 
 #           --- DATA CONTAINERS ---
 
@@ -37,7 +56,13 @@ class ManagedWorkbook:
     file_path: str
     file_name: str
     uuid: UUID
-    workbook_object: Workbook
+    # None once released after ingestion
+    workbook_object: Optional[Workbook]
+    # Incremented each time the workbook is reloaded after a change on disk
+    revision: int = 0
+    # Fingerprint of the file when the workbook object was last loaded from it
+    fingerprint: Optional[t.FileFingerprint] = None
+    memory: mu.WorkbookMemory = field(default_factory=mu.WorkbookMemory)
 
 @dataclass(slots=True)
 class InputWorkbookContext:
@@ -47,13 +72,15 @@ class InputWorkbookContext:
     managed_sheet: Optional[ws.InputWorksheetContext] = None
     worksheet_service: Optional[ws.InputWorksheetService] = None
 
-# Set eq to false to allow lru caching of hours_utils.compute_predicted_hours(...)
+# Set eq to false to compare contexts by identity
 @dataclass(eq=False, slots=True)
 class OutputWorkbookContext:
     """Context data class for managing an output workbook."""
     mngd_wb: ManagedWorkbook
     managed_sheet: Optional[ws.OutputWorksheetContext] = None
     worksheet_service: Optional[ws.OutputWorksheetService] = None
+    # Layout of each worksheet by name, computed in the background once the file is added
+    layouts: Optional[Future[dict[str, ws.SheetLayout]]] = None
 
 #           --- MODULE FACTORY FUNCTIONS ---
 
@@ -65,16 +92,34 @@ def set_uuid() -> UUID:
     """Public module level. Returns a new UUID."""
     return uuid4()
 
-def _create_managed_workbook_from_file(file_path: str, writable: bool = False) -> ManagedWorkbook:
+def _create_managed_workbook_from_file(
+    file_path: str,
+    writable: bool = False,
+    backend: st.InputBackend = st.InputBackend.OPENPYXL
+) -> ManagedWorkbook:
     """Private module level. Creates a ManagedWorkbook instance from a file path, loading the workbook object."""
     file_name = get_file_name_from_path(file_path)
     uuid = set_uuid()
-    workbook_object = fu.try_load_workbook(file_path, file_name, writable=writable)
-    return ManagedWorkbook(file_path, file_name, uuid, workbook_object)
+    before = mu.get_memory_usage()
+    # Taken before loading, so that a change while loading counts as a newer version
+    fingerprint = fu.get_file_fingerprint(file_path)
+    workbook_object = fu.try_load_workbook(file_path, file_name, writable=writable, backend=backend)
+    mngd_wb = ManagedWorkbook(file_path, file_name, uuid, workbook_object, fingerprint=fingerprint)
+    _record_load_memory(mngd_wb, before)
+    return mngd_wb
+
+def _record_load_memory(mngd_wb: ManagedWorkbook, before: mu.MemoryUsage) -> None:
+    """Private module level. Records the memory added by loading the workbook."""
+    after = mu.get_memory_usage()
+    loaded = None
+    if after.resident is not None and before.resident is not None:
+        loaded = after.resident - before.resident
+    mngd_wb.memory = mu.WorkbookMemory(loaded=loaded)
 
 def _create_input_context(file_path: str) -> InputWorkbookContext:
     """Private module level. Creates an InputWorkbookContext for the given file path."""
-    core = _create_managed_workbook_from_file(file_path)
+    backend = ing.get_ingestion_settings().input_backend
+    core = _create_managed_workbook_from_file(file_path, backend=backend)
     return InputWorkbookContext(mngd_wb=core)
 
 def _create_output_context(file_path: str) -> OutputWorkbookContext:
@@ -82,6 +127,17 @@ def _create_output_context(file_path: str) -> OutputWorkbookContext:
     core = _create_managed_workbook_from_file(file_path, writable=True)
     return OutputWorkbookContext(mngd_wb=core)
 
+def get_sheet_layout(ctx: OutputWorkbookContext, sheet_name: str) -> Optional[ws.SheetLayout]:
+    """Public module level. Returns the precomputed layout of the worksheet, waiting for
+    it if still being computed, or None if it was not or could not be computed."""
+    if ctx.layouts is None or ctx.layouts.cancelled():
+        return None
+    try:
+        return ctx.layouts.result().get(sheet_name)
+    except ex.WorkbookLoadError:
+        # The sheet is then read from the loaded workbook
+        return None
+
 def create_wb_context_by_role(file_path: str, role: st.IORole) -> InputWorkbookContext | OutputWorkbookContext:
     """Public module level. Creates a context for the given file path and role."""
     dispatch = {
@@ -93,6 +149,31 @@ def create_wb_context_by_role(file_path: str, role: st.IORole) -> InputWorkbookC
     except KeyError as exc:
         raise ValueError(f"Invalid role: {role}") from exc
 
+def load_input_context(
+    file_path: str,
+    country_data: loc.CountryData,
+    country_name: Optional[str] = None,
+    wb_mngr: Optional["WorkbookManager"] = None
+) -> InputWorkbookContext:
+    """Public module level. Loads and ingests an input workbook without any UI.
+    The country is taken from the file name unless given. With a workbook manager,
+    a version of the file in its history store is not read again."""
+    context = _create_input_context(file_path)
+    if country_name is None:
+        country_name = fu.get_origin_from_file_name(
+            context.mngd_wb.file_name, country_data, st.CountriesEnum
+        )
+    set_locale_data(context, country_data, country_name)
+    if context.locale_data is None:
+        raise ex.CountryIdentifiersNotInFilename(context.mngd_wb.file_name)
+    ws.init_input_worksheet(context)
+    if wb_mngr is None:
+        context.worksheet_service.ingest_bookings(context.locale_data)
+    else:
+        wb_mngr.ingest_input_bookings(context)
+    context.worksheet_service.set_selectable_project_ids()
+    return context
+
 #           --- INPUT SERVICE MODULE FUNCTIONS ---
 
 def set_locale_data(
@@ -107,24 +188,68 @@ def set_locale_data(
         if locale.country == country_name),
         None)
 
+def release_input_workbook(context: InputWorkbookContext) -> None:
+    """Public module level. Drops the workbook object of an ingested input workbook,
+    keeping only its bookings and project IDs."""
+    workbook_object = context.mngd_wb.workbook_object
+    if workbook_object is None or context.managed_sheet is None:
+        return
+    if context.managed_sheet.bookings is None:
+        return
+    # Close open archives, e.g. of the fast xlsx reader
+    if hasattr(workbook_object, "close"):
+        workbook_object.close()
+    context.mngd_wb.workbook_object = None
+    if context.managed_sheet.selected_sheet:
+        context.managed_sheet.selected_sheet.sheet_object = None
+    context.mngd_wb.memory.released = True
+
 #           --- OUTPUT SERVICE MODULE FUNCTIONS ---
 
 def save_output_workbook(context: OutputWorkbookContext) -> None:
-    """Public module level. Saves the workbook with its given file path."""
+    """Public module level. Saves the workbook with its given file path
+    and journals the original state of the written cells."""
     context.mngd_wb.workbook_object.save(context.mngd_wb.file_path)
+    rc.invalidate_file(context.mngd_wb.file_path)
+    backup = context.managed_sheet.pending_backup
+    if backup is not None:
+        bj.BackupJournal(context.mngd_wb.file_path).append_backup(backup)
+        context.managed_sheet.pending_backup = None
 
 #            --- WORKBOOK MANAGER ---
 
 class WorkbookManager:
-    """Class for tracking workbooks."""
+    """Class for tracking workbooks. Input workbooks are watched on disk and
+    re-ingested in the background when they change."""
 
-    __slots_ = ('workbooks_ctxs',)
+    __slots_ = (
+        'workbooks_ctxs', '_lock', '_watcher', '_reloader', '_precomputer', '_aggregation',
+        '_invalidation_hooks', 'settings', 'history', 'memory', 'daemon', 'duplicates_basis'
+    )
 
-    def __init__(self) -> None:
+    def __init__(self, settings: Optional[ing.IngestionSettings] = None) -> None:
         self.workbooks_ctxs: dict[st.IORole, list[InputWorkbookContext | OutputWorkbookContext]] = {
             st.IORole.INPUTS: [],
             st.IORole.OUTPUT: []
         }
+        self._lock = threading.RLock()
+        self._watcher = fw.FileWatcher(self._on_file_changed)
+        # A single worker so that reloads of the same file are applied in order
+        self._reloader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="phb-reload")
+        # Worksheet layouts of the budgeting file, ready before a worksheet is selected
+        self._precomputer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="phb-precompute")
+        # Aggregation of the input bookings started ahead of the employee selection
+        self._aggregation: Optional[Future[None]] = None
+        self._invalidation_hooks: list[InvalidationHook] = []
+        self.settings = settings or ing.get_ingestion_settings()
+        # Bookings and summed hours of earlier runs; None if not kept
+        self.history: Optional[hs.HistoryStore] = hs.open_history_store(self.settings)
+        # Resident and peak memory of the process after the last ingestion
+        self.memory = mu.MemoryUsage()
+        # Client of a daemon whose parsed bookings are taken, if running; None in the daemon
+        self.daemon: Optional["dmn.DaemonClient"] = None
+        # What the duplicate bookings were last found for; None if not yet
+        self.duplicates_basis: Optional[DuplicatesBasis] = None
 
     def add_workbook(
         self,
@@ -132,8 +257,17 @@ class WorkbookManager:
         ctx: InputWorkbookContext | OutputWorkbookContext
     ) -> None:
         """Adds a workbook context to the manager by role."""
-        wb_ctx = self.get_workbook_ctx_by_role_and_uuid(role, ctx.mngd_wb.uuid)
-        self.workbooks_ctxs[role].append(ctx)
+        with self._lock:
+            wb_ctx = self.get_workbook_ctx_by_role_and_uuid(role, ctx.mngd_wb.uuid)
+            self.workbooks_ctxs[role].append(ctx)
+        # The file may have changed since results of it were cached
+        rc.invalidate_file(ctx.mngd_wb.file_path)
+        if role == st.IORole.INPUTS:
+            self._watcher.watch(ctx.mngd_wb.file_path)
+        elif not wb_ctx:
+            ctx.layouts = self._precomputer.submit(
+                ws.precompute_sheet_layouts, ctx.mngd_wb.file_path
+            )
         if wb_ctx:
             raise ex.WorkbookAlreadyTracked(ctx.mngd_wb.file_name)
 
@@ -163,7 +297,174 @@ class WorkbookManager:
 
     def remove_wb_ctx_by_uuid(self, role: st.IORole, uuid: UUID) -> None:
         """Removes a workbook context by file name and role."""
-        ctx = self.get_workbook_ctx_by_role_and_uuid(role, uuid)
+        with self._lock:
+            ctx = self.get_workbook_ctx_by_role_and_uuid(role, uuid)
+            if ctx:
+                self.workbooks_ctxs[role].remove(ctx)
         if ctx:
-            self.workbooks_ctxs[role].remove(ctx)
+            file_path = ctx.mngd_wb.file_path
+            if not any(other.mngd_wb.file_path == file_path for other in self.workbooks_ctxs[role]):
+                self._watcher.unwatch(file_path)
+            self._invalidate(role, ctx)
             del ctx
+
+    @property
+    def lock(self) -> threading.RLock:
+        """The lock under which reloads swap the worksheet of an input workbook. Hold it
+        to read several fields of the input worksheets as of one version of their files."""
+        return self._lock
+
+    def add_invalidation_hook(self, hook: InvalidationHook) -> None:
+        """Registers a function to be called with the role and UUID of a workbook
+        whose data changed or which was removed. Hooks may be called from a background thread."""
+        self._invalidation_hooks.append(hook)
+
+    def apply_memory_budget(self, ingested_ctx: Optional[InputWorkbookContext] = None) -> None:
+        """Records the memory of the process and releases the workbook objects of the ingested
+        input workbooks, with the given one not yet added, if configured so, or if the resident
+        memory exceeds the memory budget."""
+        settings = self.settings
+        with self._lock:
+            ctxs = self.workbooks_ctxs[st.IORole.INPUTS]
+            if ingested_ctx is not None and ingested_ctx not in ctxs:
+                ctxs = [*ctxs, ingested_ctx]
+            ingested = [
+                ctx for ctx in ctxs
+                if ctx.managed_sheet and ctx.managed_sheet.bookings is not None
+                and ctx.mngd_wb.workbook_object is not None
+            ]
+            self.memory = usage = mu.get_memory_usage()
+            over_budget = (
+                settings.memory_budget_mb is not None and usage.resident is not None and
+                mu.to_megabytes(usage.resident) > settings.memory_budget_mb
+            )
+            if not ingested or not (settings.release_workbooks or over_budget):
+                return
+            for ctx in ingested:
+                release_input_workbook(ctx)
+        # Workbook objects hold reference cycles, e.g. between sheets and their cells
+        gc.collect()
+
+    def find_history_source(self, ctx: InputWorkbookContext) -> Optional[int]:
+        """Returns the ID of the input workbook's current version in the history store,
+        or None if it is not stored or no history is kept."""
+        if self.history is None:
+            return None
+        return self.history.find_source(
+            ctx.mngd_wb.file_path,
+            fu.get_file_fingerprint(ctx.mngd_wb.file_path),
+            hs.get_locale_key(ctx.locale_data)
+        )
+
+    def fetch_daemon_bookings(self, ctx: InputWorkbookContext) -> Optional[bm.BookingTable]:
+        """Returns the bookings of the input workbook as parsed by the daemon, or None if
+        no daemon is running or it could not read them."""
+        if self.daemon is None:
+            return None
+        spec = {"path": path.abspath(ctx.mngd_wb.file_path), "country": ctx.locale_data.country}
+        try:
+            result = self.daemon.request({"op": "bookings", "inputs": [spec]})
+            return bm.decode_booking_table(result[spec["path"]])
+        except (
+            ex.DaemonUnavailable, ex.DaemonRequestError,
+            OSError, KeyError, TypeError, ValueError
+        ):
+            # Read the file here instead
+            return None
+
+    def ingest_input_bookings(self, ctx: InputWorkbookContext) -> None:
+        """Ingests the bookings of the input workbook. A version of the file found in
+        the history store is taken from there, else from a running daemon, rather than
+        read again. The memory budget is checked after each workbook, so that it holds
+        while the next ones are read."""
+        source_id = self.find_history_source(ctx)
+        if source_id is not None:
+            ctx.managed_sheet.bookings = self.history.load_bookings(source_id)
+        elif (bookings := self.fetch_daemon_bookings(ctx)) is not None:
+            ctx.managed_sheet.bookings = bookings
+        else:
+            ctx.worksheet_service.ingest_bookings(ctx.locale_data)
+        self.apply_memory_budget(ctx)
+
+    def start_aggregation(self, aggregate: Callable[["WorkbookManager"], None]) -> None:
+        """Starts aggregating the input bookings in the background, unless already running.
+        It runs on the reload worker, so that it never runs alongside the re-ingestion
+        of a workbook."""
+        with self._lock:
+            if self._aggregation is None or self._aggregation.done():
+                self._aggregation = self._reloader.submit(aggregate, self)
+
+    def wait_for_aggregation(self) -> None:
+        """Waits for the aggregation started in the background, if any.
+        Its errors are raised here."""
+        with self._lock:
+            aggregation, self._aggregation = self._aggregation, None
+        if aggregation is not None:
+            aggregation.result()
+
+    def close(self) -> None:
+        """Stops watching files and waits for running reloads to finish."""
+        self._watcher.stop()
+        self._reloader.shutdown(wait=True)
+        self._precomputer.shutdown(wait=True, cancel_futures=True)
+        if self.history:
+            self.history.close()
+
+    def _invalidate(
+        self,
+        role: st.IORole,
+        ctx: InputWorkbookContext | OutputWorkbookContext
+    ) -> None:
+        """Drops the cached results of the given workbook and calls
+        every invalidation hook for it."""
+        rc.invalidate_file(ctx.mngd_wb.file_path)
+        for hook in self._invalidation_hooks:
+            hook(role, ctx.mngd_wb.uuid)
+
+    def _on_file_changed(self, file_path: str) -> None:
+        """Queues the re-ingestion of every input workbook loaded from the changed file."""
+        with self._lock:
+            changed = [
+                ctx for ctx in self.workbooks_ctxs[st.IORole.INPUTS]
+                if ctx.mngd_wb.file_path == file_path
+            ]
+        for ctx in changed:
+            self._reloader.submit(self._reingest_input, ctx)
+
+    def _reingest_input(self, ctx: InputWorkbookContext) -> None:
+        """Reloads the input workbook from disk and rebuilds its worksheet data, then swaps
+        it in under the lock. Only this workbook is touched; the other inputs keep their data."""
+        before = mu.get_memory_usage()
+        fingerprint = fu.get_file_fingerprint(ctx.mngd_wb.file_path)
+        try:
+            workbook_object = fu.try_load_workbook(
+                ctx.mngd_wb.file_path,
+                ctx.mngd_wb.file_name,
+                backend=self.settings.input_backend
+            )
+        except ex.WorkbookLoadError:
+            # The file is unreadable for now, e.g. locked by Excel.
+            # The next change on disk triggers another attempt.
+            return
+        # Parse outside the lock, so that the wizard keeps reading the previous data meanwhile.
+        # Without locale data, the worksheet was never initialised.
+        reloaded = None
+        if ctx.locale_data:
+            try:
+                reloaded = ws.build_reloaded_input_worksheet(ctx, workbook_object)
+            except KeyError:
+                # The expected sheet is missing in the new export. Keep the last good data.
+                return
+        with self._lock:
+            if ctx not in self.workbooks_ctxs[st.IORole.INPUTS]:
+                # Removed while loading
+                return
+            ctx.mngd_wb.workbook_object = workbook_object
+            if reloaded is not None:
+                ws.swap_input_worksheet(ctx, *reloaded)
+            ctx.mngd_wb.revision += 1
+            ctx.mngd_wb.fingerprint = fingerprint
+            _record_load_memory(ctx.mngd_wb, before)
+        # Release the new workbook object as well, if its bookings were ingested again
+        self.apply_memory_budget()
+        self._invalidate(st.IORole.INPUTS, ctx)
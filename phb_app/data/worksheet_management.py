@@ -17,18 +17,31 @@ Provides worksheet management.
 '''
 #           --- Standard libraries ---
 from dataclasses import dataclass, field
+from os import path
 from typing import Optional, Iterator, TYPE_CHECKING
 #           --- Third party libraries ---
+from openpyxl import Workbook
+from openpyxl.cell.cell import Cell
 from openpyxl.worksheet.worksheet import Worksheet
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QColor
 #           --- First party libraries ---
+import phb_app.data.aggregation as agg
+import phb_app.data.backup_journal as bj
+import phb_app.data.booking_management as bm
+import phb_app.data.csv_workbook as cw
+import phb_app.data.duplicate_bookings as dd
 import phb_app.data.selected_date as sd
 import phb_app.data.employee_management as emp
+import phb_app.logging.exceptions as ex
 import phb_app.templating.types as t
+import phb_app.utils.date_utils as du
 import phb_app.utils.employee_utils as eu
+import phb_app.utils.file_handling_utils as fu
+import phb_app.utils.style_utils as su
+import phb_app.wizard.constants.integer_enums as ie
+import phb_app.wizard.constants.ui_strings as st
 
 if TYPE_CHECKING:
+    import phb_app.data.location_management as loc
     import phb_app.data.workbook_management as wm
 
 #           --- DATA CONTAINERS ---
@@ -47,6 +60,17 @@ class InputWorksheetContext:
     selectable_project_ids: t.ProjectsDict = field(default_factory=dict)
     selected_project_ids: t.ProjectsDict = field(default_factory=dict)
     indexed_headers: dict[str, int] = field(default_factory=dict)
+    bookings: Optional[bm.BookingTable] = None
+    aggregate: Optional[agg.BookingAggregate] = None
+    # Bookings also in the inputs before this one; None if there are none
+    duplicates: Optional[dd.DuplicateBookings] = None
+
+    @property
+    def unique_aggregate(self) -> Optional[agg.BookingAggregate]:
+        '''Summed hours without the bookings dropped as duplicates of earlier inputs.'''
+        if self.duplicates is not None and self.duplicates.aggregate is not None:
+            return self.duplicates.aggregate
+        return self.aggregate
 
 @dataclass(slots=True)
 class OutputWorksheetContext:
@@ -54,9 +78,27 @@ class OutputWorksheetContext:
     selected_sheet: Optional[SelectedSheet] = None
     sheet_names: list[str] = field(default_factory=list)
     selected_date: sd.SelectedDate = field(default_factory=sd.SelectedDate)
+    # Every month for which hours are recorded; the first is the selected date
+    date_range: list[sd.SelectedDate] = field(default_factory=list)
     employee_row_anchors: emp.EmployeeRowAnchors = field(default_factory=emp.EmployeeRowAnchors)
     employee_range: emp.EmployeeRange = field(default_factory=emp.EmployeeRange)
     selected_employees: dict[t.CellCoord, emp.Employee] = field(default_factory=dict)
+    # Font classes of the workbook's style table by font ID
+    font_classes: tuple[ie.FontClass, ...] = ()
+    # Original state of the cells about to be written, journaled once saved
+    pending_backup: Optional[bj.Backup] = None
+    # Coordinate and name of the employees of the selected sheet if precomputed
+    sheet_employees: Optional[list[tuple[t.CellCoord, str]]] = None
+
+@dataclass(slots=True)
+class SheetLayout:
+    '''Data class for the layout of an output worksheet, precomputed in the background.'''
+    employee_range: emp.EmployeeRange = field(default_factory=emp.EmployeeRange)
+    employees: list[tuple[t.CellCoord, str]] = field(default_factory=list)
+    # Month, year and row of each budgeting date; empty if Excel never computed them
+    budgeting_dates: list[tuple[int, int, int]] = field(default_factory=list)
+    # Misaligned or missing employee row anchors, raised once the sheet is selected
+    error: Optional[Exception] = None
 
 #           --- SERVICE CLASSES ---
 
@@ -74,44 +116,69 @@ class InputWorksheetService:
     def index_headers(self) -> None:
         '''Indexes the headers in the selected worksheet.'''
         if self.worksheet.selected_sheet:
-            for idx, cell in enumerate(self.worksheet.selected_sheet.sheet_object[1]):
-                if isinstance(cell.value, str):
-                    self.worksheet.indexed_headers[cell.value] = idx
+            sheet_object = self.worksheet.selected_sheet.sheet_object
+            header_row = next(sheet_object.iter_rows(min_row=1, max_row=1, values_only=True), ())
+            for idx, value in enumerate(header_row):
+                if isinstance(value, str):
+                    self.worksheet.indexed_headers[value] = idx
+
+    def yield_rows(
+        self,
+        columns: tuple[int, ...],
+        serial_columns: frozenset[int] = frozenset()
+    ) -> Iterator[tuple]:
+        '''Yields the values of the given zero-based columns of each row, skipping the header.
+        Sheets which can project columns themselves, e.g. from the fast xlsx reader,
+        only read those columns and return the dates of the serial columns as Excel
+        serial numbers. Cells missing from short rows are returned as None.'''
+        sheet_object = self.worksheet.selected_sheet.sheet_object
+        if hasattr(sheet_object, "iter_projected_rows"):
+            yield from sheet_object.iter_projected_rows(
+                columns, min_row=2, serial_columns=serial_columns
+            )
+            return
+        for row in sheet_object.iter_rows(min_row=2, values_only=True):
+            yield tuple(row[col] if col < len(row) else None for col in columns)
 
     def yield_project_id_and_desc(self) -> Iterator[t.ProjectsTup]:
         '''Yields from the project ID and description, one at a time in a tuple.'''
         yield from self.worksheet.selectable_project_ids.items()
 
-    def set_selectable_project_ids(self, proj_id: str, proj_desc: str, name: str) -> None:
-        '''Extracts all project IDs in the selected worksheet and saves the 
-        data in the selectable project IDs dictionary.'''
+    def ingest_bookings(self, locale_data: "loc.InputLocaleData") -> None:
+        '''Reads the filter columns of the selected worksheet once into the booking table.'''
         # Return early if no worksheet is selected
         if not self.worksheet.selected_sheet:
             return
-        # Get the worksheet object
-        sheet_object = self.worksheet.selected_sheet.sheet_object
-        # Get the column indices for project ID, description, and person
-        project_id_col = self.worksheet.indexed_headers.get(proj_id)
-        project_desc_col = self.worksheet.indexed_headers.get(proj_desc)
-        person_col = self.worksheet.indexed_headers.get(name)
-        # Iterate over each row in the worksheet, skipping the header
-        for row in sheet_object.iter_rows(min_row=2):
-            # Extract values for project ID, description, and person from the row
-            id_value = row[project_id_col].value
-            desc_value = row[project_desc_col].value
-            person_value = row[person_col].value
-            # Only process rows where all three values are present
-            if id_value and desc_value and person_value:
-                # Convert values to strings for consistency
-                id_value = str(id_value)
-                desc_value = str(desc_value)
-                person_value = str(person_value)
-                # If this project ID is not yet in the dictionary, add it with an empty list
-                if id_value not in self.worksheet.selectable_project_ids:
-                    self.worksheet.selectable_project_ids[id_value] = []
-                # If this description is not already associated with the project ID, append it
-                if desc_value not in self.worksheet.selectable_project_ids[id_value]:
-                    self.worksheet.selectable_project_ids[id_value].append(desc_value)
+        headers = locale_data.filter_headers
+        filter_headers = (
+            headers.name, headers.proj_id, headers.description, headers.hours, headers.date
+        )
+        columns = tuple(self.worksheet.indexed_headers.get(header) for header in filter_headers)
+        # Keep the dates as serial numbers where the sheet allows it
+        rows = self.yield_rows(columns, serial_columns=frozenset((columns[-1],)))
+        self.worksheet.bookings = bm.build_booking_table(rows, locale_data.csv_format)
+
+    def aggregate_bookings(self, workers: int, chunk_rows: int) -> None:
+        '''Sums the ingested bookings per employee, project and month.'''
+        if self.worksheet.bookings is not None:
+            self.worksheet.aggregate = agg.aggregate_bookings(
+                self.worksheet.bookings, workers, chunk_rows
+            )
+
+    def set_selectable_project_ids(self) -> None:
+        '''Extracts all project IDs from the ingested bookings and saves the
+        data in the selectable project IDs dictionary.'''
+        # Return early if no bookings were ingested
+        if self.worksheet.bookings is None:
+            return
+        # The strings are pooled, so the dictionary shares them with the booking table
+        for id_value, desc_value in self.worksheet.bookings.yield_project_ids_and_descs():
+            # If this project ID is not yet in the dictionary, add it with an empty list
+            if id_value not in self.worksheet.selectable_project_ids:
+                self.worksheet.selectable_project_ids[id_value] = []
+            # If this description is not already associated with the project ID, append it
+            if desc_value not in self.worksheet.selectable_project_ids[id_value]:
+                self.worksheet.selectable_project_ids[id_value].append(desc_value)
 
 class OutputWorksheetService:
     '''Service class for managing an output worksheet.'''
@@ -132,39 +199,67 @@ class OutputWorksheetService:
     def compute_employee_range(self) -> None:
         '''Create the employee range.'''
         self.worksheet.employee_range = emp.EmployeeRange()
+        self.worksheet.sheet_employees = None
         eu.set_employee_range(self.worksheet.selected_sheet.sheet_object, self.worksheet.employee_range, self.worksheet.employee_row_anchors)
 
+    def apply_sheet_layout(self, layout: SheetLayout) -> None:
+        '''Takes the employee range and employees of the selected sheet
+        from its precomputed layout.'''
+        if layout.error is not None:
+            raise layout.error
+        self.worksheet.employee_range = layout.employee_range
+        self.worksheet.sheet_employees = layout.employees
+
+    def yield_sheet_employees(self) -> Iterator[tuple[t.CellCoord, str]]:
+        '''Yields the coordinate and name of each employee in the employee row.'''
+        if self.worksheet.sheet_employees is not None:
+            yield from self.worksheet.sheet_employees
+            return
+        yield from _yield_row_employees(
+            self.worksheet.selected_sheet.sheet_object, self.worksheet.employee_range
+        )
+
     def set_selected_employees(self, coord_name: list[tuple[str, str]]) -> None:
         '''Save the coordinate in the worksheet with the selected employee.'''
+        months = [(date.month, date.year) for date in self.worksheet.date_range]
+        # The hours of the employees selected together are rows of one table
+        table = emp.HoursTable()
         for coord, name in coord_name:
-            self.worksheet.selected_employees[coord] = emp.Employee(name)
+            employee = emp.Employee(name, table=table)
+            employee.set_date_range(months)
+            self.worksheet.selected_employees[coord] = employee
 
-    def set_predicted_hours(self, coord_hours: dict[str, float|int]) -> None:
-        '''Sets the predicted hours for each employee based on their coordinates.'''
-        for coord, hours in coord_hours.items():
-            employee = self.worksheet.selected_employees.get(coord)
-            if employee:
-                pred_hrs = float(hours) if isinstance(hours, (float, int)) else 0.0
-                employee.hours.predicted_hours = pred_hrs
+    def set_predicted_hours(self, row_coord_hours: dict[int, dict[str, float|int]]) -> None:
+        '''Sets the predicted hours for each employee and month based on the date rows
+        and the employees' coordinates.'''
+        for date in self.worksheet.date_range:
+            for coord, hours in row_coord_hours.get(date.row, {}).items():
+                employee = self.worksheet.selected_employees.get(coord)
+                if employee:
+                    pred_hrs = float(hours) if isinstance(hours, (float, int)) else 0.0
+                    employee.hours_by_month[(date.month, date.year)].predicted_hours = pred_hrs
 
     def set_predicted_hours_colour(self) -> None:
         '''Set the color formatting of the employee's predicted hours.'''
+        sheet_obj = self.worksheet.selected_sheet.sheet_object
         for employee in self.yield_from_selected_employees():
-            if employee.hours.hours_coord:
+            for _, hours in employee.yield_month_hours():
                 # Check each employee's predicted hours colour
-                sheet_obj = self.worksheet.selected_sheet.sheet_object
-                font_colour = sheet_obj[employee.hours.hours_coord].font.color
-                if not font_colour or (
-                    font_colour.type == 'theme' and
-                    font_colour.theme == 1 and
-                    font_colour.tint == 0.0
-                ) or (
-                    font_colour.type == 'rgb' and
-                    font_colour.rgb == 'FF000000'
-                ):
+                if not hours.hours_coord:
+                    continue
+                if self.get_font_class(sheet_obj[hours.hours_coord]) == ie.FontClass.RECORDED:
                     # Default (black): Already recorded.
                     # Show red to get the user's attention in summary
-                    employee.hours.pre_hours_colour = QColor(Qt.GlobalColor.red)
+                    hours.pre_hours_colour = ie.HoursColour.RED
+
+    def get_font_class(self, cell: Cell) -> ie.FontClass:
+        '''Returns the class of the cell's font by looking up its font ID. The workbook's
+        fonts are classified once, and again only when fonts were added since.'''
+        font_id = su.get_font_id(cell)
+        if font_id >= len(self.worksheet.font_classes):
+            workbook = self.worksheet.selected_sheet.sheet_object.parent
+            self.worksheet.font_classes = su.classify_fonts(workbook)
+        return self.worksheet.font_classes[font_id]
 
     def clear_selected_employees(self) -> None:
         '''Clears the recorded employee names and respective hours.'''
@@ -174,6 +269,48 @@ class OutputWorksheetService:
         '''Yields from the selected employees.'''
         yield from self.worksheet.selected_employees.values()
 
+#           --- MODULE FUNCTIONS ---
+
+def _yield_row_employees(
+    sheet_obj: Worksheet,
+    emp_range: emp.EmployeeRange
+) -> Iterator[tuple[t.CellCoord, str]]:
+    '''Private module level. Yields the coordinate and name of each employee in the employee row.'''
+    for col in range(emp_range.start_col_idx, emp_range.end_col_idx + ie.CONST_1):
+        cell = sheet_obj.cell(row=emp_range.start_row_idx, column=col)
+        if cell.value and cell.value not in st.NON_NAMES:
+            yield cell.coordinate, cell.value
+
+def compute_sheet_layout(sheet_obj: Worksheet, anchors: emp.EmployeeRowAnchors) -> SheetLayout:
+    '''Public module level. Computes the employee range, the employees and the budgeting
+    dates of a worksheet loaded with the values Excel last computed.'''
+    layout = SheetLayout()
+    try:
+        eu.set_employee_range(sheet_obj, layout.employee_range, anchors)
+    except (ex.EmployeeRowAnchorsMisalignment, ex.MissingEmployeeRow) as exc:
+        layout.error = exc
+        return layout
+    layout.employees = list(_yield_row_employees(sheet_obj, layout.employee_range))
+    layout.budgeting_dates = du.read_budgeting_dates(sheet_obj)
+    return layout
+
+def precompute_sheet_layouts(
+    file_path: str,
+    anchors: Optional[emp.EmployeeRowAnchors] = None
+) -> dict[str, SheetLayout]:
+    '''Public module level. Computes the layout of every worksheet of a budgeting file.
+    The file is loaded again, with the values Excel last computed, so that this may run
+    in the background while the wizard reads the loaded workbook.'''
+    anchors = anchors or emp.EmployeeRowAnchors()
+    workbook = fu.try_load_workbook(file_path, path.basename(file_path), cached_values=True)
+    try:
+        return {
+            sheet_name: compute_sheet_layout(workbook[sheet_name], anchors)
+            for sheet_name in workbook.sheetnames
+        }
+    finally:
+        workbook.close()
+
 #           --- MODULE FACTORY FUNCTIONS ---
 
 def _create_input_worksheet_context(
@@ -196,9 +333,18 @@ def _create_output_worksheet_context() -> OutputWorksheetContext:
     '''Private module level. Creates an empty OutputWorksheet, ready for sheet selection in the UI.'''
     return OutputWorksheetContext()
 
-def init_input_worksheet(in_wb_ctx: "wm.InputWorkbookContext") -> None:
-    """Public module level. Init input worksheet."""
-    sheetnames = in_wb_ctx.mngd_wb.workbook_object.sheetnames
+def _build_input_worksheet(
+    in_wb_ctx: "wm.InputWorkbookContext",
+    workbook_object: Optional[Workbook] = None
+) -> tuple[InputWorksheetContext, InputWorksheetService]:
+    '''Private module level. Builds the input worksheet context and its service from the
+    given workbook object, else the workbook context's, without assigning them to the
+    workbook context.'''
+    if workbook_object is None:
+        workbook_object = in_wb_ctx.mngd_wb.workbook_object
+    if isinstance(workbook_object, cw.CsvWorkbook):
+        workbook_object.set_format(in_wb_ctx.locale_data.csv_format)
+    sheetnames = workbook_object.sheetnames
     # If there is only one sheet, use that;
     # otherwise, use the locale data's expected sheet name.
     sheet_name = (
@@ -206,10 +352,47 @@ def init_input_worksheet(in_wb_ctx: "wm.InputWorkbookContext") -> None:
         if len(sheetnames) <= 1
         else in_wb_ctx.locale_data.exp_sheet_name
     )
-    sheet_obj = in_wb_ctx.mngd_wb.workbook_object[sheet_name]
+    sheet_obj = workbook_object[sheet_name]
     managed_sheet = _create_input_worksheet_context(sheet_name, sheet_obj)
     service = InputWorksheetService(worksheet=managed_sheet)
-    service.set_sheet_names(in_wb_ctx.mngd_wb.workbook_object.sheetnames)
-    in_wb_ctx.managed_sheet = managed_sheet
-    in_wb_ctx.worksheet_service = service
+    service.set_sheet_names(sheetnames)
     service.index_headers()
+    return managed_sheet, service
+
+def init_input_worksheet(in_wb_ctx: "wm.InputWorkbookContext") -> None:
+    """Public module level. Init input worksheet."""
+    in_wb_ctx.managed_sheet, in_wb_ctx.worksheet_service = _build_input_worksheet(in_wb_ctx)
+
+def build_reloaded_input_worksheet(
+    in_wb_ctx: "wm.InputWorkbookContext",
+    workbook_object: Workbook
+) -> tuple[InputWorksheetContext, InputWorksheetService]:
+    """Public module level. Builds the input worksheet of the reloaded workbook object without
+    touching the workbook context, so that the file is parsed without holding the manager's
+    lock. The bookings and project IDs are only extracted again if they had been before."""
+    previous = in_wb_ctx.managed_sheet
+    managed_sheet, service = _build_input_worksheet(in_wb_ctx, workbook_object)
+    if previous and previous.bookings is not None:
+        service.ingest_bookings(in_wb_ctx.locale_data)
+        service.set_selectable_project_ids()
+    return managed_sheet, service
+
+def swap_input_worksheet(
+    in_wb_ctx: "wm.InputWorkbookContext",
+    managed_sheet: InputWorksheetContext,
+    service: InputWorksheetService
+) -> None:
+    """Public module level. Replaces the input worksheet by the reloaded one, in which the
+    previously selected project IDs stay selected if they still exist. Called with the
+    manager's lock held, so that readers never see a half built worksheet."""
+    previous = in_wb_ctx.managed_sheet
+    if previous and previous.bookings is not None and managed_sheet.bookings is None:
+        # Ingested while the file was reloaded
+        service.ingest_bookings(in_wb_ctx.locale_data)
+        service.set_selectable_project_ids()
+    if previous:
+        selectable = managed_sheet.selectable_project_ids
+        for proj_id in previous.selected_project_ids:
+            if proj_id in selectable:
+                managed_sheet.selected_project_ids[proj_id] = selectable[proj_id]
+    in_wb_ctx.managed_sheet, in_wb_ctx.worksheet_service = managed_sheet, service
@@ -0,0 +1,327 @@
+'''
+Package
+-------
+Data Handling
+
+Module Name
+---------
+Fast Xlsx Workbook
+
+Author
+-------
+Karl Goran Antony Zuvela
+
+Description
+-----------
+Read-only workbook and worksheet for xlsx files, parsing the worksheet XML
+inside the zip archive directly. Unlike openpyxl, no cell objects are created:
+when columns are projected, every other cell is dropped while parsing and only
+the values of the projected columns are converted. Shared strings are only read
+once the first string cell is met. Mirrors the parts of the openpyxl interface
+used for input workbooks.
+'''
+#           --- Standard libraries ---
+import posixpath
+import zipfile
+from contextlib import ExitStack
+from functools import lru_cache
+from typing import Iterator, Optional, Any
+from xml.etree import ElementTree
+#           --- Third party libraries ---
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format
+from openpyxl.utils.cell import column_index_from_string
+from openpyxl.utils.datetime import (
+    CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900, from_excel, from_ISO8601, to_excel
+)
+
+type CellValue = Optional[str | int | float | bool | Any]
+type RowValues = tuple[CellValue, ...]
+
+_MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_SHEET_DATA = f"{_MAIN_NS}sheetData"
+_ROW = f"{_MAIN_NS}row"
+_CELL = f"{_MAIN_NS}c"
+_VALUE = f"{_MAIN_NS}v"
+_INLINE_STRING = f"{_MAIN_NS}is"
+_TEXT = f"{_MAIN_NS}t"
+_RICH_RUN = f"{_MAIN_NS}r"
+# Days between the epochs of the 1900 and 1904 date systems
+_MAC_1904_OFFSET = 1462
+
+class _WorkbookParts:
+    '''Shared state of an opened xlsx file: the archive, shared strings and date styles.'''
+    __slots__ = ('archive', 'epoch', 'date_styles', '_shared_strings_path', '_shared_strings')
+
+    def __init__(
+        self,
+        archive: zipfile.ZipFile,
+        epoch,
+        date_styles: frozenset[int],
+        shared_strings_path: Optional[str]
+    ) -> None:
+        self.archive = archive
+        self.epoch = epoch
+        self.date_styles = date_styles
+        self._shared_strings_path = shared_strings_path
+        self._shared_strings: Optional[list[str]] = None
+
+    @property
+    def shared_strings(self) -> list[str]:
+        '''The shared strings table, read on first use.'''
+        if self._shared_strings is None:
+            self._shared_strings = _read_shared_strings(self.archive, self._shared_strings_path)
+        return self._shared_strings
+
+class FastXlsxWorksheet:
+    '''A worksheet read straight from its XML. Rows are parsed on each iteration
+    and released immediately, so memory use does not grow with the sheet size.'''
+    __slots__ = ('title', '_parts', '_sheet_path')
+
+    def __init__(self, title: str, parts: _WorkbookParts, sheet_path: str) -> None:
+        self.title = title
+        self._parts = parts
+        self._sheet_path = sheet_path
+
+    def iter_rows(
+        self,
+        min_row: int = 1,
+        max_row: Optional[int] = None,
+        values_only: bool = True
+    ) -> Iterator[RowValues]:
+        '''Yields the rows from min_row to max_row (both one-based and inclusive) as tuples
+        of all their values, up to the last filled cell. Only values can be returned.'''
+        if not values_only:
+            raise NotImplementedError("Fast xlsx worksheets only provide values.")
+        for _, cells in self._iter_row_cells(min_row, max_row):
+            if not cells:
+                yield ()
+                continue
+            values: list[CellValue] = [None] * (max(cells) + 1)
+            for col, cell in cells.items():
+                values[col] = self._convert(cell)
+            yield tuple(values)
+
+    def iter_projected_rows(
+        self,
+        columns: tuple[int, ...],
+        min_row: int = 1,
+        max_row: Optional[int] = None,
+        serial_columns: frozenset[int] = frozenset()
+    ) -> Iterator[RowValues]:
+        '''Yields the values of the given zero-based columns only, in the given order.
+        Cells in other columns are discarded without being converted. Dates in the
+        serial columns are returned as Excel serial numbers of the 1900 date system,
+        without creating datetimes.'''
+        wanted = frozenset(columns)
+        as_serial = tuple(col in serial_columns for col in columns)
+        for _, cells in self._iter_row_cells(min_row, max_row, wanted):
+            yield tuple(
+                self._convert(cells[col], serial) if col in cells else None
+                for col, serial in zip(columns, as_serial)
+            )
+
+    def _iter_row_cells(
+        self,
+        min_row: int,
+        max_row: Optional[int],
+        wanted: Optional[frozenset[int]] = None
+    ) -> Iterator[tuple[int, dict[int, ElementTree.Element]]]:
+        '''Yields the one-based row number and the cell elements by zero-based column
+        of each row.'''
+        row_idx = 0
+        sheet_data: Optional[ElementTree.Element] = None
+        with self._parts.archive.open(self._sheet_path) as sheet_xml:
+            for event, element in ElementTree.iterparse(sheet_xml, events=("start", "end")):
+                if event == "start":
+                    if element.tag == _SHEET_DATA:
+                        sheet_data = element
+                    continue
+                if element.tag != _ROW:
+                    continue
+                row_ref = element.get("r")
+                row_idx = int(row_ref) if row_ref else row_idx + 1
+                if max_row is not None and row_idx > max_row:
+                    break
+                if row_idx >= min_row:
+                    yield row_idx, _collect_cells(element, wanted)
+                # Release the parsed row with its cells; sheetData only holds rows
+                if sheet_data is not None:
+                    sheet_data.clear()
+                else:
+                    element.clear()
+
+    # One return per cell type, kept flat as it runs for every cell
+    def _convert( # pylint: disable=too-many-return-statements
+        self,
+        cell: ElementTree.Element,
+        as_serial: bool = False
+    ) -> CellValue:
+        '''Converts the cell element to its typed value. Dates are only converted
+        to datetimes if not requested as serial numbers.'''
+        cell_type = cell.get("t", "n")
+        if cell_type == "inlineStr":
+            inline = cell.find(_INLINE_STRING)
+            return _join_text(inline) if inline is not None else None
+        raw = cell.findtext(_VALUE)
+        if not raw:
+            return None
+        if cell_type == "s":
+            return self._parts.shared_strings[int(raw)]
+        if cell_type == "str":
+            return raw
+        if cell_type == "b":
+            return raw == "1"
+        if cell_type == "e":
+            return raw
+        if cell_type == "d":
+            # ISO 8601 date, e.g. as openpyxl writes with iso_dates
+            value = from_ISO8601(raw)
+            return float(to_excel(value)) if as_serial else value
+        number = float(raw) if any(char in raw for char in ".eE") else int(raw)
+        style = cell.get("s")
+        if style is None or int(style) not in self._parts.date_styles:
+            return number
+        if as_serial:
+            return number + _MAC_1904_OFFSET if self._parts.epoch == CALENDAR_MAC_1904 else number
+        return from_excel(number, self._parts.epoch)
+
+class FastXlsxWorkbook:
+    '''An xlsx file opened for fast, read-only access to its worksheets.'''
+    __slots__ = ('file_path', '_parts', '_sheet_paths')
+
+    def __init__(self, file_path: str) -> None:
+        self.file_path = file_path
+        # The archive is closed on any error, else kept open until the workbook is closed
+        with ExitStack() as on_error:
+            archive = on_error.enter_context(zipfile.ZipFile(file_path))
+            try:
+                workbook_path, sheet_rel_ids, epoch = _read_workbook(archive)
+                rels = _read_relationships(archive, workbook_path)
+                shared_strings_path = _find_target(rels, "/sharedStrings")
+                self._sheet_paths = {
+                    name: rels[rel_id][1] for name, rel_id in sheet_rel_ids.items()
+                }
+                date_styles = _read_date_styles(archive, _find_target(rels, "/styles"))
+            except (KeyError, ElementTree.ParseError) as exc:
+                raise zipfile.BadZipFile(f"Not a valid xlsx file: {exc}") from exc
+            on_error.pop_all()
+        self._parts = _WorkbookParts(archive, epoch, date_styles, shared_strings_path)
+
+    @property
+    def sheetnames(self) -> list[str]:
+        '''The worksheet names in workbook order.'''
+        return list(self._sheet_paths)
+
+    def __getitem__(self, sheet_name: str) -> FastXlsxWorksheet:
+        return FastXlsxWorksheet(sheet_name, self._parts, self._sheet_paths[sheet_name])
+
+    def close(self) -> None:
+        '''Closes the underlying archive.'''
+        self._parts.archive.close()
+
+#           --- MODULE PARSING FUNCTIONS ---
+
+def _collect_cells(
+    row: ElementTree.Element,
+    wanted: Optional[frozenset[int]]
+) -> dict[int, ElementTree.Element]:
+    '''Private module level. Maps the zero-based column of each cell in the row to its element,
+    keeping only the wanted columns if given.'''
+    cells = {}
+    col = -1
+    for cell in row:
+        if cell.tag != _CELL:
+            continue
+        ref = cell.get("r")
+        col = _column_from_reference(ref) if ref else col + 1
+        if wanted is None or col in wanted:
+            cells[col] = cell
+    return cells
+
+def _column_from_reference(ref: str) -> int:
+    '''Private module level. Returns the zero-based column of a cell reference such as "AB12".'''
+    return _column_from_letters(ref.rstrip("0123456789"))
+
+@lru_cache(maxsize=None)
+def _column_from_letters(letters: str) -> int:
+    '''Private module level. Returns the zero-based column of the column letters.'''
+    return column_index_from_string(letters) - 1
+
+def _join_text(element: ElementTree.Element) -> str:
+    '''Private module level. Joins the text of a string item, including rich text runs
+    but excluding phonetic hints.'''
+    parts = [element.findtext(_TEXT) or ""]
+    parts.extend(run.findtext(_TEXT) or "" for run in element.iter(_RICH_RUN))
+    return "".join(parts)
+
+def _resolve_target(base_path: str, target: str) -> str:
+    '''Private module level. Resolves a relationship target to a path in the archive.'''
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base_path), target))
+
+def _read_workbook(archive: zipfile.ZipFile) -> tuple[str, dict[str, str], Any]:
+    '''Private module level. Returns the workbook part path, the relationship ID per sheet name
+    and the date epoch of the workbook.'''
+    root_rels = ElementTree.fromstring(archive.read("_rels/.rels"))
+    workbook_path = next(
+        rel.get("Target").lstrip("/") for rel in root_rels.iter(f"{_PKG_REL_NS}Relationship")
+        if rel.get("Type", "").endswith("/officeDocument")
+    )
+    workbook = ElementTree.fromstring(archive.read(workbook_path))
+    properties = workbook.find(f"{_MAIN_NS}workbookPr")
+    is_1904 = properties is not None and properties.get("date1904") in ("1", "true")
+    epoch = CALENDAR_MAC_1904 if is_1904 else CALENDAR_WINDOWS_1900
+    sheets = {
+        sheet.get("name"): sheet.get(f"{_REL_NS}id") for sheet in workbook.iter(f"{_MAIN_NS}sheet")
+    }
+    return workbook_path, sheets, epoch
+
+def _read_relationships(archive: zipfile.ZipFile, workbook_path: str) -> dict[str, tuple[str, str]]:
+    '''Private module level. Returns the type and resolved target per relationship ID
+    of the workbook.'''
+    rels_name = posixpath.basename(workbook_path) + ".rels"
+    rels_path = posixpath.join(posixpath.dirname(workbook_path), "_rels", rels_name)
+    rels = ElementTree.fromstring(archive.read(rels_path))
+    return {
+        rel.get("Id"): (rel.get("Type", ""), _resolve_target(workbook_path, rel.get("Target")))
+        for rel in rels.iter(f"{_PKG_REL_NS}Relationship")
+    }
+
+def _find_target(rels: dict[str, tuple[str, str]], type_suffix: str) -> Optional[str]:
+    '''Private module level. Returns the target of the first relationship of the type, if any.'''
+    return next(
+        (target for rel_type, target in rels.values() if rel_type.endswith(type_suffix)), None
+    )
+
+def _read_date_styles(archive: zipfile.ZipFile, styles_path: Optional[str]) -> frozenset[int]:
+    '''Private module level. Returns the indices of the cell styles with a date number format.'''
+    if styles_path is None:
+        return frozenset()
+    styles = ElementTree.fromstring(archive.read(styles_path))
+    formats = dict(BUILTIN_FORMATS)
+    num_fmts = styles.find(f"{_MAIN_NS}numFmts")
+    if num_fmts is not None:
+        for num_fmt in num_fmts:
+            formats[int(num_fmt.get("numFmtId"))] = num_fmt.get("formatCode", "")
+    cell_xfs = styles.find(f"{_MAIN_NS}cellXfs")
+    if cell_xfs is None:
+        return frozenset()
+    return frozenset(
+        idx for idx, xf in enumerate(cell_xfs)
+        if is_date_format(formats.get(int(xf.get("numFmtId", 0)), ""))
+    )
+
+def _read_shared_strings(archive: zipfile.ZipFile, shared_strings_path: Optional[str]) -> list[str]:
+    '''Private module level. Reads the shared strings table, releasing each item once read.'''
+    if shared_strings_path is None:
+        return []
+    strings = []
+    with archive.open(shared_strings_path) as sst_xml:
+        for _, element in ElementTree.iterparse(sst_xml, events=("end",)):
+            if element.tag == f"{_MAIN_NS}si":
+                strings.append(_join_text(element))
+                element.clear()
+    return strings
@@ -0,0 +1,264 @@
+'''
+Package
+-------
+Project Hours Budgeting
+
+Module Name
+---------
+Engine
+
+Author
+-------
+Karl Goran Antony Zuvela
+
+Description
+-----------
+Headless API of the project hours budgeting, for scripts and notebooks. It runs the
+same computation as the wizard without constructing any widget: projects and
+employees are selected by value rather than read back from tables, and predicted
+hours are read as the values Excel last computed, so that Excel is not needed.
+
+    with BudgetEngine() as engine:
+        engine.add_input("German_SAPX_Extract_July_August_2024.xlsx")
+        engine.select_projects(["TEST_API_AUT"])
+        engine.set_output("budget_Deutschland.xlsx", month=7, year=2024, months=2)
+        engine.select_employees(["Karsten Wilmsen-Bolnbach"])
+        result = engine.compute()
+        for row in result.rows():
+            print(row.name, row.month, row.year, row.accumulated_hours)
+        columns = result.as_numpy()
+
+The numeric columns of the result are kept in flat buffers; as_numpy returns NumPy
+arrays over those buffers without copying them. NumPy is only needed for as_numpy.
+'''
+#           --- Standard libraries ---
+import math
+from array import array
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional, TYPE_CHECKING
+#           --- First party libraries ---
+import phb_app.data.location_management as loc
+import phb_app.data.workbook_management as wm
+import phb_app.data.name_index as nx
+import phb_app.logging.exceptions as ex
+import phb_app.utils.hours_utils as hu
+import phb_app.utils.output_utils as ou
+import phb_app.utils.project_utils as pu
+import phb_app.wizard.constants.integer_enums as ie
+import phb_app.wizard.constants.ui_strings as st
+
+if TYPE_CHECKING:
+    import numpy as np
+
+_MISSING = float("nan")
+
+#           --- RESULTS ---
+
+@dataclass(slots=True, frozen=True)
+class ProjectInfo:
+    '''Data class for a selectable project of an input workbook.'''
+    proj_id: str
+    descriptions: tuple[str, ...]
+    file_name: str
+
+# One attribute per column of the result
+@dataclass(slots=True, frozen=True)
+class EmployeeMonth: # pylint: disable=too-many-instance-attributes
+    '''Data class for the hours of an employee in a month.'''
+    name: str
+    coord: str
+    month: int
+    year: int
+    predicted_hours: float
+    # None if the employee has no hours on the selected projects in the month
+    accumulated_hours: Optional[float]
+    deviation: Optional[str]
+    hours_coord: Optional[str]
+    # Predicted hours already recorded; only flagged, as in the wizard's summary, and still
+    # overwritten by the accumulated hours on writing
+    already_recorded: bool
+    # Selected projects on which the employee has hours in the month
+    projects: tuple[str, ...]
+
+# One attribute per column, so that each is kept in its own buffer
+@dataclass(slots=True)
+class BudgetResult: # pylint: disable=too-many-instance-attributes
+    '''Data class for the computed hours, one row per employee and month, kept column by column.
+    Missing accumulated hours are NaN in the numeric columns.'''
+    names: list[str] = field(default_factory=list)
+    coords: list[str] = field(default_factory=list)
+    hours_coords: list[Optional[str]] = field(default_factory=list)
+    deviations: list[Optional[str]] = field(default_factory=list)
+    projects: list[tuple[str, ...]] = field(default_factory=list)
+    months: array = field(default_factory=lambda: array('q'))
+    years: array = field(default_factory=lambda: array('q'))
+    predicted_hours: array = field(default_factory=lambda: array('d'))
+    accumulated_hours: array = field(default_factory=lambda: array('d'))
+    # 1 where the predicted hours are already recorded; flagged only
+    already_recorded: array = field(default_factory=lambda: array('b'))
+    # Most similar input names of the employees found in no input
+    suggestions: dict[str, list[nx.NameSuggestion]] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def rows(self) -> Iterator[EmployeeMonth]:
+        '''Yields each row as a typed result object.'''
+        for idx, name in enumerate(self.names):
+            acc_hrs = self.accumulated_hours[idx]
+            yield EmployeeMonth(
+                name=name,
+                coord=self.coords[idx],
+                month=self.months[idx],
+                year=self.years[idx],
+                predicted_hours=self.predicted_hours[idx],
+                accumulated_hours=None if math.isnan(acc_hrs) else acc_hrs,
+                deviation=self.deviations[idx],
+                hours_coord=self.hours_coords[idx],
+                already_recorded=bool(self.already_recorded[idx]),
+                projects=self.projects[idx]
+            )
+
+    def as_numpy(self) -> dict[str, "np.ndarray"]:
+        '''Returns the numeric columns as NumPy arrays sharing the result's buffers.
+        The arrays are views: they are only valid while the result is not appended to.'''
+        import numpy as np # pylint: disable=import-outside-toplevel
+        return {
+            "month": np.frombuffer(self.months, dtype=np.int64),
+            "year": np.frombuffer(self.years, dtype=np.int64),
+            "predicted_hours": np.frombuffer(self.predicted_hours, dtype=np.float64),
+            "accumulated_hours": np.frombuffer(self.accumulated_hours, dtype=np.float64),
+            "already_recorded": np.frombuffer(self.already_recorded, dtype=np.int8).view(np.bool_)
+        }
+
+#           --- ENGINE ---
+
+class BudgetEngine:
+    '''Headless budgeting of the hours of the input workbooks into a budgeting file.'''
+    __slots__ = ('country_data', 'wb_mngr', '_output', '_cached_sheet')
+
+    def __init__(self, country_data: Optional[loc.CountryData] = None) -> None:
+        self.country_data = country_data or loc.CountryData()
+        self.wb_mngr = wm.WorkbookManager()
+        self._output: Optional[wm.OutputWorkbookContext] = None
+        self._cached_sheet = None
+
+    def __enter__(self) -> "BudgetEngine":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        '''Stops watching the input workbooks and closes the history store.'''
+        self.wb_mngr.close()
+
+    def add_input(self, file_path: str, country: Optional[str] = None) -> None:
+        '''Loads an input workbook and ingests its bookings. The country is taken from
+        the file name if not given.'''
+        ctx = wm.load_input_context(file_path, self.country_data, country, self.wb_mngr)
+        self.wb_mngr.add_workbook(st.IORole.INPUTS, ctx)
+        pu.set_project_ids_each_input_wb(self.wb_mngr)
+
+    def projects(self) -> list[ProjectInfo]:
+        '''Returns the selectable projects of every input workbook.'''
+        return [
+            ProjectInfo(str(proj_id), tuple(descs), ctx.mngd_wb.file_name)
+            for ctx in self.wb_mngr.yield_workbook_ctxs_by_role(st.IORole.INPUTS)
+            for proj_id, descs in ctx.managed_sheet.selectable_project_ids.items()
+        ]
+
+    def select_projects(self, proj_ids: Iterable[str]) -> None:
+        '''Selects the projects whose hours are summed, in every input workbook having them.
+        Raises ProjectNotFound for an ID in no input workbook.'''
+        proj_ids = list(proj_ids)
+        inputs = self.wb_mngr.yield_workbook_ctxs_by_role(st.IORole.INPUTS)
+        sheets = [ctx.managed_sheet for ctx in inputs]
+        # Validate every ID first, so that a failed selection keeps the previous one
+        for proj_id in proj_ids:
+            if not any(proj_id in sheet.selectable_project_ids for sheet in sheets):
+                raise ex.ProjectNotFound(proj_id)
+        for sheet in sheets:
+            selectable = sheet.selectable_project_ids
+            sheet.selected_project_ids = {
+                proj_id: selectable[proj_id] for proj_id in proj_ids if proj_id in selectable
+            }
+
+    def set_output(
+        self,
+        file_path: str,
+        month: int,
+        year: int,
+        months: int = 1,
+        sheet_name: Optional[str] = None
+    ) -> None:
+        '''Sets the budgeting file with its worksheet, the first if not given, and the months
+        from the given month on.'''
+        self._output, self._cached_sheet = ou.open_output_context(
+            file_path, month, year, months, sheet_name
+        )
+
+    def employees(self) -> list[str]:
+        '''Returns the names of the employees of the budgeting file's worksheet.'''
+        return [name for _, name in self._get_output().worksheet_service.yield_sheet_employees()]
+
+    def select_employees(self, names: Optional[Iterable[str]] = None) -> None:
+        '''Selects the employees by name, or all if none are given.
+        Raises EmployeeNotFound for a name not in the worksheet.'''
+        service = self._get_output().worksheet_service
+        sheet_employees = list(service.yield_sheet_employees())
+        if names is not None:
+            names = list(names)
+            known = {name for _, name in sheet_employees}
+            for name in names:
+                if name not in known:
+                    raise ex.EmployeeNotFound(name)
+            sheet_employees = [(coord, name) for coord, name in sheet_employees if name in names]
+        service.clear_selected_employees()
+        service.set_selected_employees(sheet_employees)
+
+    def compute(self) -> BudgetResult:
+        '''Computes the predicted and accumulated hours of the selected employees in each month.'''
+        output = self._get_output()
+        # Start from fresh hours, so that computing again reflects a changed selection
+        for employee in output.worksheet_service.yield_from_selected_employees():
+            employee.found_projects.clear()
+            employee.month_projects.clear()
+            employee.reset_hours()
+        ou.set_cached_predicted_hours(output, self._cached_sheet)
+        hu.compute_accumulated_hours_for_selected_employees(self.wb_mngr, output)
+        result = BudgetResult()
+        for coord, employee in output.managed_sheet.selected_employees.items():
+            if employee.suggestions:
+                result.suggestions[employee.name] = employee.suggestions
+            for (month, year), hours in employee.yield_month_hours():
+                result.names.append(employee.name)
+                result.coords.append(coord)
+                result.hours_coords.append(hours.hours_coord)
+                result.deviations.append(hours.deviation)
+                projects = employee.month_projects.get((month, year), ())
+                result.projects.append(tuple(str(proj_id) for proj_id in projects))
+                result.months.append(month)
+                result.years.append(year)
+                result.predicted_hours.append(float(hours.predicted_hours or 0.0))
+                acc_hrs = hours.accumulated_hours
+                result.accumulated_hours.append(_MISSING if acc_hrs is None else float(acc_hrs))
+                result.already_recorded.append(hours.pre_hours_colour == ie.HoursColour.RED)
+        return result
+
+    def diff(self) -> list[hu.CellChange]:
+        '''Returns the cells writing the computed hours would change, without changing them.'''
+        return hu.diff_hours_to_output_file(self._get_output())
+
+    def write(self) -> None:
+        '''Writes the computed hours into the budgeting file and saves it. Like the wizard,
+        it also overwrites the predicted hours flagged as already recorded.'''
+        output = self._get_output()
+        hu.write_hours_to_output_file(output)
+        wm.save_output_workbook(output)
+
+    def _get_output(self) -> wm.OutputWorkbookContext:
+        '''Returns the budgeting file set by set_output.'''
+        if self._output is None:
+            raise ex.WorkbookLoadError("No budgeting file set; call set_output first.")
+        return self._output
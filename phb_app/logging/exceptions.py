@@ -13,8 +13,10 @@ PHB Wizard specific exceptions handling.
 '''
 #           --- Standard libraries ---
 from datetime import datetime
-# First party libraries
-import phb_app.data.io_management as io
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import phb_app.data.io_management as io
 
 ##############################
 ### IOSelection Exceptions ###
@@ -61,7 +63,7 @@ class TooManyOutputFilesSelected(Exception):
 class BudgetingDatesNotFound(Exception):
     '''Custom exception for when the chosen month and year are not in the output file.'''
 
-    def __init__(self, dropdown_handler: io.SelectedText, file: str):
+    def __init__(self, dropdown_handler: "io.SelectedText", file: str):
         super().__init__(f"{dropdown_handler.month} or {dropdown_handler.year} not found in sheet {dropdown_handler.worksheet} of file {file}.")
 
 ######################################
@@ -127,3 +129,50 @@ class ProjectNotFound(Exception):
 
     def __init__(self, proj_id: int|str):
         super().__init__("Project ID", proj_id)
+
+#########################
+### Daemon Exceptions ###
+#########################
+
+class DaemonRequestError(Exception):
+    '''Custom exception for a request which the daemon could not answer.'''
+
+    def __init__(self, message: str):
+        super().__init__(f"Daemon request failed: {message}")
+
+class DaemonUnavailable(Exception):
+    '''Custom exception for when no daemon is listening on the configured port.'''
+
+    def __init__(self, port: int):
+        super().__init__(f"No daemon is running on localhost port {port}.")
+
+##########################
+### History Exceptions ###
+##########################
+
+class HistoryUnavailable(Exception):
+    '''Custom exception for when the history store is switched off or cannot be opened.'''
+
+    def __init__(self):
+        super().__init__("The history store is switched off or cannot be opened.")
+
+#########################
+### Backup Exceptions ###
+#########################
+
+class BackupNotFound(Exception):
+    '''Custom exception for when the backup journal has no run to restore.'''
+
+    def __init__(self, file_path: str, backup_id: Optional[int] = None):
+        what = "no run left to restore" if backup_id is None else f"no run with ID {backup_id}"
+        super().__init__(f"The backup journal of {file_path} has {what}.")
+
+class BudgetingFileChanged(Exception):
+    '''Custom exception for when the budgeting file changed since its backup journal's
+    last record.'''
+
+    def __init__(self, file_path: str):
+        super().__init__(
+            f"{file_path} was changed since the last recorded run. "
+            "Restore with --force to apply the backup anyway."
+        )
@@ -14,17 +14,25 @@ Logs wizard summary results.
 #           --- Standard libraries ---
 from os import path
 from datetime import datetime
-#           --- Third party libraries ---
-from PyQt6.QtWidgets import QTableWidget
+from typing import TYPE_CHECKING
 #           --- First party libraries ---
 import phb_app.utils.date_utils as du
 import phb_app.utils.hours_utils as hu
 import phb_app.data.months_dict as md
 import phb_app.data.workbook_management as wm
 import phb_app.data.log_management as lm
+import phb_app.data.booking_management as bm
+import phb_app.data.date_parsing as dp
+import phb_app.data.duplicate_bookings as dd
+import phb_app.data.name_index as nx
+import phb_app.data.result_cache as rc
 import phb_app.wizard.constants.ui_strings as st
 import phb_app.data.employee_management as emp
 import phb_app.data.header_management as hm
+import phb_app.utils.memory_utils as mu
+
+if TYPE_CHECKING:
+    from PyQt6.QtWidgets import QTableWidget
 
 def get_time_stamp() -> str:
     '''Returns a formatted current time stamp.'''
@@ -49,15 +57,40 @@ def get_file_data(wb_mng: wm.WorkbookManager) -> lm.FileMetaData:
     selected_date = out_wb.managed_sheet.selected_date
     log_file_path = generate_log_file_name(output_dir, selected_date)
     input_workbooks = [wb.mngd_wb.file_name for wb in wb_mng.yield_workbook_ctxs_by_role(st.IORole.INPUTS)]
+    memory_report = [
+        mu.format_workbook_memory(wb.mngd_wb.file_name, wb.mngd_wb.memory)
+        for wb in wb_mng.yield_workbook_ctxs_by_role(st.IORole.INPUTS)
+    ]
+    memory_report.append(mu.format_process_memory(wb_mng.memory))
     return lm.FileMetaData(
         log_file_path=log_file_path,
         selected_date=selected_date,
         input_workbooks=input_workbooks,
         output_file_name=output_file_name,
-        output_worksheet_name=output_worksheet_name
+        output_worksheet_name=output_worksheet_name,
+        memory_report=memory_report,
+        cache_report=[rc.format_cache_stats(cache) for cache in rc.yield_caches()],
+        date_report=[
+            dp.format_date_report(wb.mngd_wb.file_name, wb.managed_sheet.bookings.date_report)
+            for wb in wb_mng.yield_workbook_ctxs_by_role(st.IORole.INPUTS)
+            if wb.managed_sheet.bookings is not None
+            and wb.managed_sheet.bookings.date_report is not None
+        ],
+        hours_report=[
+            bm.format_hours_report(wb.mngd_wb.file_name, wb.managed_sheet.bookings.hours_report)
+            for wb in wb_mng.yield_workbook_ctxs_by_role(st.IORole.INPUTS)
+            if wb.managed_sheet.bookings is not None
+            and wb.managed_sheet.bookings.hours_report is not None
+        ],
+        duplicate_report=[
+            dd.format_duplicate_report(wb.mngd_wb.file_name, wb.managed_sheet.duplicates)
+            for wb in wb_mng.yield_workbook_ctxs_by_role(st.IORole.INPUTS)
+            if wb.managed_sheet.duplicates is not None
+        ],
+        months=[(date.month, date.year) for date in out_wb.managed_sheet.date_range]
     )
 
-def get_table_structure(table: QTableWidget,
+def get_table_structure(table: "QTableWidget",
                         max_proj_id_list_len: int) -> lm.TableStructure:
     '''Gets table headers and column widths.'''
 
@@ -79,7 +112,7 @@ def get_max_project_id_list_length(employees: list[emp.Employee]) -> int:
                 default=0
               )
 
-def get_max_table_item_length(table: QTableWidget,
+def get_max_table_item_length(table: "QTableWidget",
                               col: int) -> int:
     '''Returns the max length of the table item from all
     selected employees. If the item is empty, a default length of 0 is returned.'''
@@ -96,7 +129,7 @@ def add_spacings(header: str,
 
     return max(len(header), max_table_item_length) + hm.DEFAULT_PADDING
 
-def calculate_table_widths(table: QTableWidget,
+def calculate_table_widths(table: "QTableWidget",
                             headers: list[str],
                             max_proj_id_list_len: int) -> list[int]:
     '''Calculates column widths based on the longest value in each column.'''
@@ -121,19 +154,25 @@ def get_employee_data(wb_mng: wm.WorkbookManager) -> list[emp.Employee]:
     return list(out_wb.managed_sheet.selected_employees.values())
 
 def format_row(employees: list[emp.Employee],
-               table_structure: lm.TableStructure) -> list[str]:
-    '''Formats a single row of table data with correct spacing.'''
+               table_structure: lm.TableStructure,
+               month: tuple[int, int]) -> list[str]:
+    '''Formats a single row of table data of the given month and year with correct spacing.'''
     formatted_rows = []
     # For each employee, get the name, predicted hours, accumulated hours, project IDs,
     # then put in a row value list and format the spacing of each list element using
     # the table structure
     for employee in employees:
         name = employee.name
-        predicted_hours = hu.format_log_row_hours(employee.hours.predicted_hours, st.SpecialStrings.ZERO_HOURS, employee.hours.pre_hours_colour)
-        accumulated_hours = hu.format_log_row_hours(employee.hours.accumulated_hours, st.SpecialStrings.MISSING, employee.hours.acc_hours_colour)
+        hours = employee.hours_by_month.get(month, employee.hours)
+        predicted_hours = hu.format_log_row_hours(
+            hours.predicted_hours, st.SpecialStrings.ZERO_HOURS, hours.pre_hours_colour
+        )
+        accumulated_hours = hu.format_log_row_hours(
+            hours.accumulated_hours, st.SpecialStrings.MISSING, hours.acc_hours_colour
+        )
         project_info = ", ".join(f"{proj_id}" for proj_id in employee.found_projects.keys()) if employee.found_projects else " "
-        coord = employee.hours.hours_coord
-        deviation = employee.hours.deviation
+        coord = hours.hours_coord
+        deviation = hours.deviation
         row_values = [name, predicted_hours, accumulated_hours, deviation, project_info, coord]
         formatted_row = "".join(str(value).rjust(width) for value, width in zip(row_values, table_structure.tab_widths))
         formatted_rows.append(formatted_row)
@@ -146,20 +185,44 @@ def write_log_file(file_meta: lm.FileMetaData,
 
     with open(file_meta.log_file_path, "w", encoding="utf-8") as log_file:
         datetime_now_str = get_time_stamp()
-        month = du.abbr_month(file_meta.selected_date.month, md.LOCALIZED_MONTHS_SHORT)
-        log_file.write(f"* Selected date: {month} {file_meta.selected_date.year}; Log created: {datetime_now_str}\n\n")
+        months = file_meta.months or [(file_meta.selected_date.month, file_meta.selected_date.year)]
+        month_names = [
+            f"{du.abbr_month(month, md.LOCALIZED_MONTHS_SHORT)} {year}" for month, year in months
+        ]
+        selected = month_names[0]
+        if len(month_names) > 1:
+            selected = f"{month_names[0]} - {month_names[-1]}"
+        log_file.write(f"* Selected date: {selected}; Log created: {datetime_now_str}\n\n")
         log_file.write(f"* Input workbook(s): {'\n'.join(file_meta.input_workbooks)}\n")
         log_file.write(f"* Output workbook: {file_meta.output_file_name}\n")
-        log_file.write(f"* Output worksheet: {file_meta.output_worksheet_name}\n\n")
+        log_file.write(f"* Output worksheet: {file_meta.output_worksheet_name}\n")
+        log_file.write(f"* Memory: {'\n'.join(file_meta.memory_report)}\n")
+        if file_meta.date_report:
+            log_file.write(f"* Text dates: {'\n'.join(file_meta.date_report)}\n")
+        if file_meta.hours_report:
+            log_file.write(f"* Text hours: {'\n'.join(file_meta.hours_report)}\n")
+        if file_meta.duplicate_report:
+            log_file.write(f"* Duplicate bookings: {'\n'.join(file_meta.duplicate_report)}\n")
+        log_file.write(f"* Caches: {'\n'.join(file_meta.cache_report) or 'none used'}\n\n")
         header_line = "".join(table_structure.headers[col].rjust(table_structure.tab_widths[col])
                               for col in range(len(table_structure.headers)))
-        log_file.write(header_line + "\n")
-        log_file.write("-" * len(header_line) + "\n")
-        formatted_rows = format_row(employees, table_structure)
-        for row in formatted_rows:
-            log_file.write(row + "\n")
-
-def print_log(table: QTableWidget,
+        # One section per month
+        for month, month_name in zip(months, month_names):
+            if len(months) > 1:
+                log_file.write(f"* Month: {month_name}\n")
+            log_file.write(header_line + "\n")
+            log_file.write("-" * len(header_line) + "\n")
+            formatted_rows = format_row(employees, table_structure, month)
+            for row in formatted_rows:
+                log_file.write(row + "\n")
+            log_file.write("\n")
+        unmatched = [employee for employee in employees if employee.suggestions]
+        if unmatched:
+            log_file.write("* Not found in the inputs; most similar input names:\n")
+            for employee in unmatched:
+                log_file.write(f"{employee.name}: {nx.format_suggestions(employee.suggestions)}\n")
+
+def print_log(table: "QTableWidget",
               wb_mng: wm.WorkbookManager) -> None:
     '''Coordinates the log file generation and writing.'''
 
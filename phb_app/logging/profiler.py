@@ -0,0 +1,130 @@
+'''
+Module Name
+---------
+Session Profiler
+
+Author
+-------
+Karl Goran Antony Zuvela
+
+Description
+-----------
+Profiles a wizard session or batch run with --profile, so that a run which is slow
+on a user's machine can be attached to a performance ticket. The profile is written
+as a pstats file, e.g. for python -m pstats or snakeviz, next to the log of the run,
+with a text summary holding the sizes of the inputs and the slowest functions.
+The profiler is deterministic and, from Python 3.12 on, covers every thread of the
+process, e.g. the reloader and precompute workers, but not worker processes.
+'''
+#           --- Standard libraries ---
+import cProfile
+import io
+import os
+import platform
+import pstats
+import time
+from os import path
+from typing import Iterable, Optional
+#           --- First party libraries ---
+import phb_app.data.workbook_management as wm
+import phb_app.logging.logger as lg
+import phb_app.wizard.constants.ui_strings as st
+
+type ProfileTags = dict[str, str]
+
+# Functions listed in the summary, by cumulative time
+TOP_FUNCTIONS = 40
+
+class SessionProfiler:
+    '''Profiles the process from start to stop and writes the profile with its tags.'''
+    __slots__ = ('profile', 'elapsed', '_started')
+
+    def __init__(self) -> None:
+        self.profile = cProfile.Profile()
+        self.elapsed = 0.0
+        self._started: Optional[float] = None
+
+    def __enter__(self) -> "SessionProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        '''Starts profiling.'''
+        self._started = time.perf_counter()
+        self.profile.enable()
+
+    def stop(self) -> None:
+        '''Stops profiling, adding the time since the start to the elapsed time.'''
+        self.profile.disable()
+        if self._started is not None:
+            self.elapsed += time.perf_counter() - self._started
+            self._started = None
+
+    def write(self, output_dir: str, tags: ProfileTags) -> str:
+        '''Writes the profile and its summary into the directory. Returns the profile's path.'''
+        stem = path.join(output_dir, f"profile_{lg.get_time_stamp()}")
+        self.profile.dump_stats(f"{stem}.prof")
+        with open(f"{stem}.txt", "w", encoding="utf-8") as file:
+            elapsed = {"Elapsed": f"{self.elapsed:.2f} s"}
+            file.write(format_profile_summary(self.profile, {**elapsed, **tags}))
+        return f"{stem}.prof"
+
+def get_file_tags(file_paths: Iterable[str], label: str) -> ProfileTags:
+    '''Public module level. Returns the size of each file, tagged by its label and name.'''
+    return {
+        f"{label} {path.basename(file_path)}": _get_file_size(file_path)
+        for file_path in file_paths
+    }
+
+def get_session_tags(wb_mngr: wm.WorkbookManager) -> ProfileTags:
+    '''Public module level. Returns the sizes of the session's workbooks, with the bookings
+    of each input and the employees selected in the budgeting file.'''
+    tags = get_platform_tags()
+    for ctx in wb_mngr.yield_workbook_ctxs_by_role(st.IORole.INPUTS):
+        size = _get_file_size(ctx.mngd_wb.file_path)
+        if ctx.managed_sheet is not None and ctx.managed_sheet.bookings is not None:
+            size += f", {len(ctx.managed_sheet.bookings)} bookings"
+        tags[f"Input {ctx.mngd_wb.file_name}"] = size
+    out_ctx = wb_mngr.get_output_workbook_ctx()
+    if out_ctx is not None:
+        size = _get_file_size(out_ctx.mngd_wb.file_path)
+        if out_ctx.managed_sheet is not None:
+            sheet = out_ctx.managed_sheet
+            months = len(sheet.date_range) or 1
+            size += f", {len(sheet.selected_employees)} employees over {months} months"
+        tags[f"Budgeting file {out_ctx.mngd_wb.file_name}"] = size
+    return tags
+
+def get_platform_tags() -> ProfileTags:
+    '''Public module level. Returns the Python version and platform of the run.'''
+    return {"Python": platform.python_version(), "Platform": platform.platform()}
+
+def get_session_profile_dir(wb_mngr: wm.WorkbookManager) -> str:
+    '''Public module level. Returns the directory of the budgeting file, where the log is
+    written, else of the first input, else the working directory.'''
+    out_ctx = wb_mngr.get_output_workbook_ctx()
+    if out_ctx is not None:
+        return path.dirname(path.abspath(out_ctx.mngd_wb.file_path))
+    in_ctx = next(wb_mngr.yield_workbook_ctxs_by_role(st.IORole.INPUTS), None)
+    if in_ctx is not None:
+        return path.dirname(path.abspath(in_ctx.mngd_wb.file_path))
+    return os.getcwd()
+
+def _get_file_size(file_path: str) -> str:
+    '''Private module level. Returns the size of the file as text.'''
+    try:
+        return f"{os.stat(file_path).st_size} bytes"
+    except OSError:
+        return "not accessible"
+
+def format_profile_summary(profile: cProfile.Profile, tags: ProfileTags) -> str:
+    '''Public module level. Formats the tags and the slowest functions of the profile.'''
+    stream = io.StringIO()
+    stream.writelines(f"* {key}: {value}\n" for key, value in tags.items())
+    stream.write("\n")
+    stats = pstats.Stats(profile, stream=stream)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(TOP_FUNCTIONS)
+    return stream.getvalue()
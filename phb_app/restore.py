@@ -0,0 +1,71 @@
+'''
+Package
+-------
+Project Hours Budgeting
+
+Module Name
+---------
+Restore
+
+Author
+-------
+Karl Goran Antony Zuvela
+
+Description
+-----------
+Restores the cells of a budgeting file to their state before a run wrote hours into
+them, from the backup journal next to the file. By default the latest run not yet
+restored is undone; running it again steps back one more run.
+
+python -m phb_app.restore BUDGET.xlsx [--list] [--id ID] [--force]
+'''
+#           --- Standard libraries ---
+import argparse
+import sys
+from typing import Optional
+#           --- First party libraries ---
+import phb_app.data.backup_journal as bj
+import phb_app.logging.exceptions as ex
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    '''Parses the command line.'''
+    parser = argparse.ArgumentParser(
+        description="Restores the cells of a budgeting file written by a run."
+    )
+    parser.add_argument("budget", help="Budgeting file (xlsx)")
+    parser.add_argument("--list", action="store_true", help=(
+        "List the journaled runs instead of restoring"
+    ))
+    parser.add_argument("--id", type=int, dest="backup_id", help=(
+        "Restore this run instead of the latest not yet restored"
+    ))
+    parser.add_argument("--force", action="store_true", help=(
+        "Restore even if the file was changed since the last run"
+    ))
+    return parser.parse_args(argv)
+
+def format_backup(backup: bj.Backup) -> str:
+    '''Formats a journaled run as one line.'''
+    cells = f"{len(backup.cells)} cells"
+    return f"{backup.backup_id:>4}  {backup.created}  [{backup.sheet_name}]  {cells}"
+
+def main(argv: Optional[list[str]] = None) -> int:
+    '''Restores or lists the runs. Returns the exit code.'''
+    args = parse_args(argv)
+    journal = bj.BackupJournal(args.budget)
+    if args.list:
+        lines = [format_backup(backup) for backup in journal.yield_backups()]
+        print("\n".join(lines) if lines else "No runs journaled.")
+        return 0
+    try:
+        backup = journal.restore(args.backup_id, args.force)
+    except (
+        ex.BackupNotFound, ex.BudgetingFileChanged, ex.WorkbookLoadError, KeyError, OSError
+    ) as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    print(f"Restored {len(backup.cells)} cells of run {backup.backup_id} ({backup.created}).")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
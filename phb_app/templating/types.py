@@ -1,6 +1,9 @@
 """Generic types"""
-#           --- Third party libraries ---
-from PyQt6.QtWidgets import QPushButton
+#           --- Standard libraries ---
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from PyQt6.QtWidgets import QPushButton
 
 type CellCoord = str
 type ButtonsList = list[QPushButton]
@@ -9,3 +12,4 @@ type CountryName = str
 type ProjectsDict = dict[str, list[str]]
 type ProjectId = str | int
 type ProjectsTup = tuple[str, list[str]]
+type FileFingerprint = tuple[int, int]
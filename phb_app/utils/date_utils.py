@@ -12,19 +12,29 @@ Description
 PHB Wizard date utility functions.
 '''
 #           --- Standard libraries ---
+import calendar
+import re
 from datetime import datetime
-from typing import TYPE_CHECKING
-from functools import lru_cache
+from itertools import repeat
+from typing import Iterator, Optional, TYPE_CHECKING
 #           --- Third party libraries ---
 import xlwings as xw
 #           --- First party libraries ---
 import phb_app.data.months_dict as md
+import phb_app.data.result_cache as rc
+import phb_app.data.selected_date as sd
 import phb_app.logging.exceptions as ex
+import phb_app.utils.file_handling_utils as fu
 
 if TYPE_CHECKING:
+    from openpyxl.worksheet.worksheet import Worksheet
     import phb_app.data.io_management as io
     import phb_app.data.workbook_management as wm
 
+# Formulae of the budgeting dates: the first date of a year and the months after it
+_DATE_FORMULA = re.compile(r"=\s*DATE\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*\)\s*$", re.IGNORECASE)
+_EDATE_FORMULA = re.compile(r"=\s*EDATE\(\s*\$?A\$?(\d+)\s*,\s*(-?\d+)\s*\)\s*$", re.IGNORECASE)
+
 def abbr_month(month_number: int, months: dict) -> str:
     '''
     Change a month number to its short name.
@@ -34,13 +44,43 @@ def abbr_month(month_number: int, months: dict) -> str:
             return month_key
     return ""
 
-# Cache the function results
-# Only cache one result to minimise memory use
-@lru_cache(maxsize=1)
+def to_datetime(value: datetime|str, date_format: str) -> Optional[datetime]:
+    '''
+    Returns the value as a datetime. Text is read with the given date format,
+    falling back to ISO 8601, as some timesheets mix both.
+    None is returned if the value is not a date.
+    '''
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        text = value.strip()
+        try:
+            return datetime.strptime(text, date_format)
+        except ValueError:
+            pass
+        try:
+            return datetime.fromisoformat(text)
+        except ValueError:
+            return None
+    return None
+
 def get_budgeting_dates(file_path: str, sheet_name: str) -> list[tuple[int, int, int]]:
     '''
     Returns a list of tuples, each tuple containing the month, year and coordinate
-    retreived from the possible budgeting dates in the budgeting file.
+    retreived from the possible budgeting dates in the budgeting file. The dates are
+    only read through Excel again once the file changed.
+    '''
+    key = rc.CacheKey(file_path, fu.get_file_fingerprint(file_path), sheet_name)
+    return rc.get_cache("budgeting_dates").get_or_compute(
+        key, lambda: _read_budgeting_dates_with_excel(file_path, sheet_name)
+    )
+
+def _read_budgeting_dates_with_excel(
+    file_path: str,
+    sheet_name: str
+) -> list[tuple[int, int, int]]:
+    '''
+    Reads the month, year and row of the budgeting dates through Excel, which computes them.
     '''
     # Do not diplay Excel while computing
     app = xw.App(visible=False)
@@ -59,16 +99,100 @@ def get_budgeting_dates(file_path: str, sheet_name: str) -> list[tuple[int, int,
     # Excel will quit if no other workbooks are open
     return months_years_rows
 
-def set_budgeting_date(wb_ctx: "wm.OutputWorkbookContext", dropdown_text: "io.SelectedText") -> None:
-    '''Sets the budgeting date with the row it is located in the worksheet.'''
+def yield_range_months(month: int, year: int, months: int) -> Iterator[tuple[int, int]]:
+    '''
+    Yields the month and year of each month of the range starting at the given month.
+    '''
+    for offset in range(months):
+        yield (month - 1 + offset) % 12 + 1, year + (month - 1 + offset) // 12
+
+def read_budgeting_dates(
+    sheet: "Worksheet",
+    formula_sheet: Optional["Worksheet"] = None
+) -> list[tuple[int, int, int]]:
+    '''
+    Returns the month, year and row of the budgeting dates in a worksheet loaded with
+    cached values, i.e. without Excel. Like get_budgeting_dates, reads down from A8
+    to the first empty cell. Dates without a cached value, as once the file was saved
+    by openpyxl, are computed from their formulae in the formula sheet, if given.
+    '''
+    formulae = (
+        formula_sheet.iter_rows(min_row=8, max_col=1, values_only=True)
+        if formula_sheet is not None else repeat((None,))
+    )
+    dates: dict[int, datetime] = {}
+    for (cell,), (formula,) in zip(sheet.iter_rows(min_row=8, max_col=1), formulae):
+        value = cell.value
+        if value is None and isinstance(formula, str):
+            value = evaluate_date_formula(formula, dates)
+        elif value is None:
+            break
+        if isinstance(value, datetime):
+            dates[cell.row] = value
+    return [(date.month, date.year, row) for row, date in dates.items()]
+
+def evaluate_date_formula(formula: str, dates: dict[int, datetime]) -> Optional[datetime]:
+    '''
+    Returns the date of a budgeting date formula, =DATE(year, month, day) or =EDATE(A<row>, months)
+    of a date in the given rows of column A, or None for any other formula.
+    '''
+    if match := _DATE_FORMULA.match(formula):
+        year, month, day = (int(group) for group in match.groups())
+        return datetime(year, month, day)
+    if (match := _EDATE_FORMULA.match(formula)) and int(match[1]) in dates:
+        return add_months(dates[int(match[1])], int(match[2]))
+    return None
+
+def add_months(date: datetime, months: int) -> datetime:
+    '''
+    Returns the date the given months later, on the last day of the month if the day
+    does not exist in it, as Excel's EDATE.
+    '''
+    year, month = divmod(date.year * 12 + date.month - 1 + months, 12)
+    day = min(date.day, calendar.monthrange(year, month + 1)[1])
+    return date.replace(year=year, month=month + 1, day=day)
+
+def set_budgeting_date(
+    wb_ctx: "wm.OutputWorkbookContext",
+    dropdown_text: "io.SelectedText",
+    budgeting_dates: Optional[list[tuple[int, int, int]]] = None
+) -> None:
+    '''Sets the budgeting date with the row it is located in the worksheet. If more than one
+    month is selected, every month of the range is located; the first is the selected date.
+    The budgeting dates are read through Excel unless already given, e.g. precomputed.'''
     # Convert dates to integers and put in a tuple
     month_year = (md.LOCALIZED_MONTHS_SHORT.get(dropdown_text.month), int(dropdown_text.year))
-    budgeting_dates = get_budgeting_dates(wb_ctx.mngd_wb.file_path, dropdown_text.worksheet)
-    for tup in budgeting_dates:
-        if tup[:2] == month_year:
-            month, year, row = tup
-            break
-    else:
-        raise ex.BudgetingDatesNotFound(dropdown_text, wb_ctx.mngd_wb.file_name)
+    months = int(dropdown_text.months) if dropdown_text.months else 1
+    if not budgeting_dates:
+        budgeting_dates = get_budgeting_dates(wb_ctx.mngd_wb.file_path, dropdown_text.worksheet)
+    set_date_range(wb_ctx, budgeting_dates, *month_year, months)
+
+def set_date_range(
+    wb_ctx: "wm.OutputWorkbookContext",
+    budgeting_dates: list[tuple[int, int, int]],
+    month: int,
+    year: int,
+    months: int = 1
+) -> None:
+    '''Locates every month of the range in the budgeting dates of the selected worksheet.
+    The first month is the selected date.'''
+    rows = {tup[:2]: tup[2] for tup in reversed(budgeting_dates)}
+    date_range = []
+    for range_month, range_year in yield_range_months(month, year, months):
+        if (range_month, range_year) not in rows:
+            import phb_app.data.io_management as io # pylint: disable=import-outside-toplevel
+            missing = io.SelectedText(
+                str(range_year),
+                abbr_month(range_month, md.LOCALIZED_MONTHS_SHORT),
+                wb_ctx.managed_sheet.selected_sheet.sheet_name
+            )
+            raise ex.BudgetingDatesNotFound(missing, wb_ctx.mngd_wb.file_name)
+        selected_date = sd.SelectedDate()
+        selected_date.month, selected_date.year = range_month, range_year
+        selected_date.row = rows[(range_month, range_year)]
+        date_range.append(selected_date)
     selected_date = wb_ctx.managed_sheet.selected_date
-    selected_date.month, selected_date.year, selected_date.row = month, year, row
+    first = date_range[0]
+    selected_date.month, selected_date.year, selected_date.row = first.month, first.year, first.row
+    # The selected date itself stands for the first month
+    wb_ctx.managed_sheet.date_range = [selected_date] + date_range[1:]
@@ -16,11 +16,8 @@ Description
 All functions necessary for managing employee data.
 '''
 #           --- Standard libraries ---
-from typing import Iterator
-from functools import lru_cache
+from typing import Iterator, TYPE_CHECKING
 #          --- Third party libraries ---
-from PyQt6.QtWidgets import QTableWidget
-from PyQt6.QtCore import  QModelIndex
 import openpyxl.utils as xlutils
 import xlwings as xw
 from openpyxl.worksheet.worksheet import Worksheet
@@ -29,11 +26,15 @@ import phb_app.data.workbook_management as wm
 import phb_app.wizard.constants.integer_enums as ie
 import phb_app.logging.exceptions as ex
 import phb_app.data.employee_management as emp
+import phb_app.data.result_cache as rc
+import phb_app.data.selected_date as sd
 import phb_app.templating.types as t
+import phb_app.utils.file_handling_utils as fu
+
+if TYPE_CHECKING:
+    from PyQt6.QtWidgets import QTableWidget
+    from PyQt6.QtCore import QModelIndex
 
-# Cache the function results
-# Only cache one result to minimise memory use
-@lru_cache(maxsize=1)
 def set_employee_range(sheet_obj: Worksheet, emp_range: emp.EmployeeRange, anchors: emp.EmployeeRowAnchors) -> None:
     '''
     Finds the row range where the employee names should be located.
@@ -71,32 +72,63 @@ def yield_hours_coord(coord: t.CellCoord, row: int) -> Iterator[str]:
     # The first item ([0] -> col) in the tuple from `coordinate_from_string` is used
     yield f"{str(xlutils.cell.coordinate_from_string(coord)[0])}{str(row)}"
 
-@lru_cache(maxsize=1)
-def find_predicted_hours(emp_coords: tuple[t.CellCoord, ...], row: int, file_path: str, sheet_name: str) -> dict[str, int]:
+def find_predicted_hours(
+    emp_coords: tuple[t.CellCoord, ...],
+    rows: tuple[int, ...],
+    file_path: str,
+    sheet_name: str
+) -> dict[int, dict[str, int]]:
+    '''
+    Goes through all given coordinates of a worksheet in each of the given date rows,
+    computes any formulae and returns the hours by date row and employee name coordinate.
+    The workbook is opened once for all rows, and only again once the file changed.
+    '''
+    key = rc.CacheKey(file_path, fu.get_file_fingerprint(file_path), sheet_name, (emp_coords, rows))
+    return rc.get_cache("predicted_hours").get_or_compute(
+        key, lambda: _compute_predicted_hours_with_excel(emp_coords, rows, file_path, sheet_name)
+    )
+
+def _compute_predicted_hours_with_excel(
+    emp_coords: tuple[t.CellCoord, ...],
+    rows: tuple[int, ...],
+    file_path: str,
+    sheet_name: str
+) -> dict[int, dict[str, int]]:
     '''
-    Goes through all given coordinates of a worksheet, computes
-    any formulae and returns the hours by employee name coordinate.
+    Opens the workbook in Excel, which computes any formulae, and reads the hours of
+    each employee name coordinate in each date row.
     '''
     # Do not diplay Excel while computing
     app = xw.App(visible=False)
     wb = app.books.open(file_path)
     sheet = wb.sheets[sheet_name]
-    # Prepare a dictionary of coord:hours
+    # Prepare a dictionary of row:coord:hours
     pre_hours = {}
-    for emp_coord in emp_coords:
-        # Create a coordinate from the date's row and employee's column
-        hours_coord = next(yield_hours_coord(emp_coord, row))
-        # Save the computed value
-        pre_hours[emp_coord] = sheet.range(hours_coord).value
+    for row in rows:
+        pre_hours[row] = {}
+        for emp_coord in emp_coords:
+            # Create a coordinate from the date's row and employee's column
+            hours_coord = next(yield_hours_coord(emp_coord, row))
+            # Save the computed value
+            pre_hours[row][emp_coord] = sheet.range(hours_coord).value
     wb.close()
     return pre_hours
 
-def set_employee_hours(coord_emps: dict[t.CellCoord, emp.Employee], row: int) -> None:
-    """Save the coordinate of the hours for each employee."""
+def set_employee_hours(
+    coord_emps: dict[t.CellCoord, emp.Employee],
+    date_range: list[sd.SelectedDate]
+) -> None:
+    """Save the coordinate of the hours for each employee and month of the date range."""
     for coord, empl in coord_emps.items():
-        empl.hours.hours_coord = next(yield_hours_coord(coord, row))
+        for date in date_range:
+            hours_coord = next(yield_hours_coord(coord, date.row))
+            empl.hours_by_month[(date.month, date.year)].hours_coord = hours_coord
 
-def compute_selected_employees(table: QTableWidget, out_wb_ctx: "wm.OutputWorkbookContext", selected_rows: list[QModelIndex]) -> None:
+def compute_selected_employees(
+    table: "QTableWidget",
+    out_wb_ctx: "wm.OutputWorkbookContext",
+    selected_rows: list["QModelIndex"]
+) -> None:
     """Find selected employees in the table and set them as selected in the managed output workbook."""
     selected_employees = [
         (table.item(row.row(), ie.EmployeeTableHeaders.COORDINATE).text(),
@@ -105,7 +137,7 @@ def compute_selected_employees(table: QTableWidget, out_wb_ctx: "wm.OutputWorkbo
     ]
     out_wb_ctx.worksheet_service.set_selected_employees(selected_employees)
 
-def pop_unselected_employees(table: QTableWidget, out_wb_ctx: "wm.OutputWorkbookContext") -> None:
+def pop_unselected_employees(table: "QTableWidget", out_wb_ctx: "wm.OutputWorkbookContext") -> None:
     """Pop unselected employees from the managed output workbook."""
     unselected_coords = []
     for row in range(table.rowCount()):
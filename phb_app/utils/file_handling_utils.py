@@ -16,18 +16,24 @@ Description
 Provides file handling utility functions in the project hours budgeting wizard.
 '''
 #           --- Standard libraries ---
+import os
 import zipfile
+from typing import Optional, TYPE_CHECKING
 #           --- Third party libraries ---``
 from openpyxl import load_workbook
 from openpyxl.utils.exceptions import ReadOnlyWorkbookException, InvalidFileException
 from openpyxl.workbook import Workbook
-from PyQt6.QtWidgets import QTableWidget
 #           --- First party libraries ---
+import phb_app.data.csv_workbook as cw
+import phb_app.data.xlsx_workbook as xw
 import phb_app.data.location_management as loc
 import phb_app.logging.exceptions as ex
 import phb_app.wizard.constants.ui_strings as st
 import phb_app.templating.types as t
 
+if TYPE_CHECKING:
+    from PyQt6.QtWidgets import QTableWidget
+
 def get_origin_from_file_name(
     file_name: str,
     country_data: loc.CountryData,
@@ -35,11 +41,13 @@ def get_origin_from_file_name(
 ) -> t.CountryName:
     '''    Checks the workbook's origin. Returns the country of origin.'''
     file_name_lower = file_name.lower()
+    extension = os.path.splitext(file_name_lower)[1]
     for country in countries_enum:
         locale = country_data.get_locale_by_country(country)
         # Assumes every locale has a .file_patterns attribute
         patterns = locale.file_patterns
-        if all(pattern in file_name_lower for pattern in patterns):
+        if (extension in locale.file_extensions
+                and all(pattern in file_name_lower for pattern in patterns)):
             return country
     raise ex.CountryIdentifiersNotInFilename(file_name)
 
@@ -52,15 +60,36 @@ def is_workbook_open(file_path:str) -> bool:
         return True
     return False
 
-def try_load_workbook(file_path: str, file_name: str, writable: bool = False) -> Workbook:
-    '''Template for attempting to load the workbook.'''
+def get_file_fingerprint(file_path: str) -> Optional[t.FileFingerprint]:
+    '''Returns the modification time and size of the file, or None if it cannot be accessed.'''
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def try_load_workbook(
+    file_path: str,
+    file_name: str,
+    writable: bool = False,
+    backend: st.InputBackend = st.InputBackend.OPENPYXL,
+    cached_values: bool = False
+) -> Workbook | cw.CsvWorkbook | xw.FastXlsxWorkbook:
+    '''Template for attempting to load the workbook. CSV and TSV files can only be
+    loaded as input workbooks. They are streamed, so loading them reads no rows.
+    The fast backend is only used for input workbooks, as it cannot write.
+    With cached values, formulae are read as the values Excel last computed.'''
     try:
         if writable:
             # We only care about the output workbook, which is writable
             # being open as we will not write to the input workbook
             with open(file_path, 'r+', encoding='utf-8'):
                 pass
-        return load_workbook(file_path)
+        elif cw.is_csv_file(file_path):
+            return cw.CsvWorkbook(file_path)
+        elif backend == st.InputBackend.FAST:
+            return xw.FastXlsxWorkbook(file_path)
+        return load_workbook(file_path, data_only=cached_values)
     except ReadOnlyWorkbookException as e:
         raise ex.WorkbookLoadError(f"Workbook '{file_name}' is read-only: {str(e)}.") from e
     except InvalidFileException as e:
@@ -72,7 +101,7 @@ def try_load_workbook(file_path: str, file_name: str, writable: bool = False) ->
     except zipfile.BadZipFile as e:
         raise ex.WorkbookLoadError(f"Corrupted Excel file '{file_name}': {str(e)}") from e
 
-def is_file_already_in_table(file_path: str, col: int, table: QTableWidget) -> bool:
+def is_file_already_in_table(file_path: str, col: int, table: "QTableWidget") -> bool:
     '''Check if there are two or more of the same file in the given table and return
     a respective boolean.'''
     return 1 < sum(
@@ -17,91 +17,219 @@ Utility functions the the calculation of hours of each employee
 in the project hours budgeting wizard.
 '''
 #           --- Standard libraries ---
-from typing import Optional, TYPE_CHECKING
-from datetime import datetime
+from dataclasses import dataclass
+from typing import Collection, Iterable, Iterator, Optional, TYPE_CHECKING
 #           --- Third party libraries ---
 from openpyxl.styles import Font
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QColor
 #           --- First party libraries ---
+import phb_app.data.backup_journal as bj
+import phb_app.data.duplicate_bookings as dd
+import phb_app.data.history_store as hs
 import phb_app.data.employee_management as em
+import phb_app.data.ingestion_settings as ing
+import phb_app.data.name_index as nx
 import phb_app.utils.employee_utils as eu
+import phb_app.utils.file_handling_utils as fu
+import phb_app.utils.style_utils as su
+import phb_app.wizard.constants.integer_enums as ie
 import phb_app.wizard.constants.ui_strings as st
 
 if TYPE_CHECKING:
     import phb_app.data.workbook_management as wm
 
+# Style of the written hours
+OUTPUT_FONT = Font(name='Arial', size=12, color='FF000000')
+OUTPUT_NUMBER_FORMAT = '0.00 "h"'
+
+@dataclass(slots=True)
+class CellChange:
+    '''Data class for a cell of the budgeting file which writing the hours would change.'''
+    sheet_name: str
+    coord: str
+    old_value: object
+    new_value: float
+    old_style: str
+    new_style: str
+
 def compute_predicted_hours(out_wb_ctx: "wm.OutputWorkbookContext") -> None:
     '''Compute the predicted hours for each employee in the output workbook. Selected rows are purely for cacheing purposes.'''
     coords = tuple(out_wb_ctx.managed_sheet.selected_employees.keys())
+    date_range = out_wb_ctx.managed_sheet.date_range
     pre_hours = eu.find_predicted_hours(
         coords,
-        out_wb_ctx.managed_sheet.selected_date.row,
+        tuple(date.row for date in date_range),
         out_wb_ctx.mngd_wb.file_path,
         out_wb_ctx.managed_sheet.selected_sheet.sheet_name
     )
-    eu.set_employee_hours(
-        out_wb_ctx.managed_sheet.selected_employees,
-        out_wb_ctx.managed_sheet.selected_date.row
-    )
+    eu.set_employee_hours(out_wb_ctx.managed_sheet.selected_employees, date_range)
     out_wb_ctx.worksheet_service.set_predicted_hours(pre_hours)
     out_wb_ctx.worksheet_service.set_predicted_hours_colour()
 
 def compute_accumulated_hours_for_selected_employees(wbs: "wm.WorkbookManager", out_wb_ctx: "wm.OutputWorkbookContext") -> None:
     """Compute the hours for each selected employee in the output workbook. Selected rows are purely for cacheing purposes."""
+    # Aggregation started ahead leaves only the inputs changed since to aggregate
+    wbs.wait_for_aggregation()
+    # Reloads swap the input worksheets on the reload worker, so every sum reads them under the lock
+    with wbs.lock:
+        aggregate_input_bookings(wbs)
+        for emp in out_wb_ctx.worksheet_service.yield_from_selected_employees():
+            _sum_hours_selected_employee(wbs, emp)
+            finalise_employee_hours(emp)
+        suggest_unmatched_employees(wbs, out_wb_ctx)
+
+def recompute_hours_for_selected_employees(
+    wbs: "wm.WorkbookManager",
+    out_wb_ctx: "wm.OutputWorkbookContext"
+) -> None:
+    """Compute the hours of each selected employee again from fresh hours,
+    e.g. after an input workbook was reloaded."""
+    for emp in out_wb_ctx.worksheet_service.yield_from_selected_employees():
+        emp.found_projects.clear()
+        emp.month_projects.clear()
+        emp.reset_hours()
+    compute_predicted_hours(out_wb_ctx)
+    compute_accumulated_hours_for_selected_employees(wbs, out_wb_ctx)
+
+def suggest_unmatched_employees(
+    wbs: "wm.WorkbookManager",
+    out_wb_ctx: "wm.OutputWorkbookContext"
+) -> None:
+    """Suggest the most similar input names for every selected employee whose name
+    is in no input."""
+    index = nx.NameIndex(
+        name
+        for in_wb in wbs.yield_workbook_ctxs_by_role(st.IORole.INPUTS)
+        if in_wb.managed_sheet.aggregate is not None
+        for name in in_wb.managed_sheet.aggregate.yield_names()
+    )
     for emp in out_wb_ctx.worksheet_service.yield_from_selected_employees():
-        _sum_hours_selected_employee(wbs, out_wb_ctx, emp)
-        _format_accumulated_hours(emp)
-        emp.hours.set_deviation()
-
-def _sum_hours_selected_employee(wbs: "wm.WorkbookManager", out_wb_ctx: "wm.OutputWorkbookContext", sel_emp: em.Employee) -> None:
-    '''Sum the hours of each employee by project ID if they are
-    found in the given worksheets.'''
-    selected_date = out_wb_ctx.managed_sheet.selected_date
+        emp.suggestions = [] if emp.name in index else index.suggest(emp.name)
+
+def finalise_employee_hours(emp: em.Employee) -> None:
+    """Format the accumulated hours of each month of the employee and set their deviation."""
+    emp.finalise_hours()
+
+def start_aggregating_input_bookings(wbs: "wm.WorkbookManager") -> None:
+    """Start aggregating the input bookings in the background. The sums cover every employee,
+    project and month, so they do not depend on the selections still to be made."""
+    wbs.start_aggregation(aggregate_input_bookings)
+
+def aggregate_input_bookings(
+    wbs: "wm.WorkbookManager",
+    in_wbs: Optional[list["wm.InputWorkbookContext"]] = None
+) -> None:
+    """Sum the bookings of each input workbook per employee, project and month, once.
+    The workbooks are ingested first if not done yet. Workbook versions found in the
+    history store are taken from it; new ones are stored. Duplicate bookings are found
+    among the given input workbooks only, in their order; by default among all.
+    The whole aggregation holds the manager lock, so that it is never run twice at once."""
+    # It runs on the reload worker when started ahead, and on the GUI thread otherwise
+    with wbs.lock:
+        settings = wbs.settings
+        if in_wbs is None:
+            in_wbs = list(wbs.yield_workbook_ctxs_by_role(st.IORole.INPUTS))
+        for in_wb in in_wbs:
+            sheet = in_wb.managed_sheet
+            if sheet.bookings is None:
+                wbs.ingest_input_bookings(in_wb)
+            if sheet.aggregate is not None:
+                continue
+            source_id = wbs.find_history_source(in_wb)
+            if source_id is not None:
+                sheet.aggregate = wbs.history.load_aggregate(source_id, sheet.bookings.pool)
+                continue
+            in_wb.worksheet_service.aggregate_bookings(
+                settings.aggregation_workers, settings.aggregation_chunk_rows
+            )
+            if wbs.history and sheet.aggregate is not None:
+                wbs.history.save(
+                    in_wb.mngd_wb.file_path,
+                    fu.get_file_fingerprint(in_wb.mngd_wb.file_path),
+                    in_wb.locale_data.country,
+                    sheet.bookings,
+                    sheet.aggregate,
+                    hs.get_locale_key(in_wb.locale_data)
+                )
+        # Only found again once an aggregate was rebuilt or the inputs or their order changed
+        basis = (
+            settings.drop_duplicate_bookings,
+            [(in_wb.mngd_wb.uuid, in_wb.managed_sheet.aggregate) for in_wb in in_wbs]
+        )
+        if not _is_same_duplicates_basis(wbs.duplicates_basis, basis):
+            find_duplicate_bookings(in_wbs, settings.drop_duplicate_bookings)
+            wbs.duplicates_basis = basis
+
+def _is_same_duplicates_basis(
+    previous: Optional["wm.DuplicatesBasis"],
+    basis: "wm.DuplicatesBasis"
+) -> bool:
+    """Whether the duplicate bookings were found with the same setting, among the same inputs
+    in the same order and with the same aggregates, which are compared by identity."""
+    if previous is None or previous[0] != basis[0] or len(previous[1]) != len(basis[1]):
+        return False
+    return all(
+        uuid == previous_uuid and aggregate is previous_aggregate
+        for (previous_uuid, previous_aggregate), (uuid, aggregate) in zip(previous[1], basis[1])
+    )
+
+def find_duplicate_bookings(in_wbs: Iterable["wm.InputWorkbookContext"], drop: bool) -> None:
+    """Find the bookings of each input workbook already in the workbooks before it, in the
+    order given, and leave them out of its summed hours if they are to be dropped."""
+    in_wbs = [
+        in_wb for in_wb in in_wbs
+        if in_wb.managed_sheet.bookings is not None and in_wb.managed_sheet.aggregate is not None
+    ]
+    # A single input duplicates nothing
+    duplicates = (
+        dd.find_duplicate_rows([in_wb.managed_sheet.bookings for in_wb in in_wbs])
+        if len(in_wbs) > 1 else []
+    )
+    if not duplicates:
+        for in_wb in in_wbs:
+            in_wb.managed_sheet.duplicates = None
+    for in_wb, (rows, sources) in zip(in_wbs, duplicates):
+        sheet = in_wb.managed_sheet
+        if not rows:
+            sheet.duplicates = None
+            continue
+        sheet.duplicates = dd.DuplicateBookings(
+            rows=rows,
+            hours=dd.sum_duplicate_hours(sheet.bookings, rows),
+            duplicate_of=[in_wbs[idx].mngd_wb.file_name for idx in sorted(sources)],
+            aggregate=(
+                dd.drop_duplicate_rows(sheet.bookings, sheet.aggregate, rows) if drop else None
+            )
+        )
+
+def _sum_hours_selected_employee(wbs: "wm.WorkbookManager", sel_emp: em.Employee) -> None:
+    '''Sum the hours of each employee by project ID and month of the date range
+    if they are found in the given worksheets.'''
     # Get the selected employee objects
     for in_wb in wbs.yield_workbook_ctxs_by_role(st.IORole.INPUTS):
-        # Get the localised filter headings from the managed input workbook
-        employee_name_col = in_wb.managed_sheet.indexed_headers.get(in_wb.locale_data.filter_headers.name)
-        proj_id_col = in_wb.managed_sheet.indexed_headers.get(in_wb.locale_data.filter_headers.proj_id)
-        hours_col = in_wb.managed_sheet.indexed_headers.get(in_wb.locale_data.filter_headers.hours)
-        date_col = in_wb.managed_sheet.indexed_headers.get(in_wb.locale_data.filter_headers.date)
+        # The bookings are summed once per workbook; every employee and month reuses the sums
+        if in_wb.managed_sheet.aggregate is None:
+            aggregate_input_bookings(wbs)
+        # One version of the worksheet, even if a reload swaps it meanwhile
+        sheet = in_wb.managed_sheet
         # Selected project ID iterator
-        proj_id_dict = in_wb.managed_sheet.selected_project_ids
-        # Go through each row of the selected worksheet, skipping the header row (row 1)
-        for row in in_wb.managed_sheet.selected_sheet.sheet_object.iter_rows(min_row=2):
-            # Skip rows with missing data
-            if (not row[employee_name_col].value or
-                not row[proj_id_col].value or
-                not row[hours_col].value or
-                not row[date_col].value
-            ):
-                continue
-            # Get the value in the row with the given column header
-            employee_name_val: str = row[employee_name_col].value
-            proj_id_val: str|int = row[proj_id_col].value
-            hours_val: float = row[hours_col].value
-            date_val: datetime = row[date_col].value
-            # Skip rows with non-matching date and project ID
-            if (date_val.month != selected_date.month or
-                date_val.year != selected_date.year or
-                proj_id_val not in proj_id_dict.keys()):
-                continue
-            # Get the first employee with the matching name
-            if employee_name_val == sel_emp.name:
+        proj_id_dict = sheet.selected_project_ids
+        aggregate = sheet.unique_aggregate
+        for (month, year), month_hours in sel_emp.yield_month_hours():
+            # Go through the employee's summed hours on the selected projects in the month
+            month_bookings = aggregate.yield_hours(sel_emp.name, proj_id_dict, month, year)
+            for proj_id_val, hours_val in month_bookings:
                 # Match found!
                 if proj_id_val not in sel_emp.found_projects:
                     sel_emp.found_projects[proj_id_val] = proj_id_dict[proj_id_val]
-                if sel_emp.hours.accumulated_hours is None:
+                month_projects = sel_emp.month_projects.setdefault((month, year), [])
+                if proj_id_val not in month_projects:
+                    month_projects.append(proj_id_val)
+                if month_hours.accumulated_hours is None:
                     # Init recorded hours to 0 if the selected employee is found
                     # in the search for the first time
-                    sel_emp.hours.accumulated_hours = 0
+                    month_hours.accumulated_hours = 0
                 # Accumulate found hours
-                sel_emp.hours.accumulated_hours += hours_val
-
-def _format_accumulated_hours(emp: em.Employee) -> None:
-    '''Format the accumulated hours.'''
-    if emp.hours.accumulated_hours is None or emp.hours.accumulated_hours == 0.0:
-        emp.hours.acc_hours_colour = QColor(Qt.GlobalColor.red)
+                month_hours.accumulated_hours += hours_val
 
 def format_summary_data_row_hours(hours: Optional[float], text: str) -> str:
     '''Formats hours for the summary data table.'''
@@ -109,26 +237,63 @@ def format_summary_data_row_hours(hours: Optional[float], text: str) -> str:
         return text
     return f"{hours:.2f}"
 
-def format_log_row_hours(hours: Optional[float], text: str, colour: QColor) -> str:
+def format_log_row_hours(hours: Optional[float], text: str, colour: ie.HoursColour) -> str:
     '''Formats hours for the summary data table.'''
     if hours is None:
         return text
     formatted = f"{hours:.2f}"
-    return f"*{formatted}*" if colour == QColor(Qt.GlobalColor.red) else formatted
+    return f"*{formatted}*" if colour == ie.HoursColour.RED else formatted
+
+def yield_hours_to_write(
+    output_file: "wm.OutputWorkbookContext",
+    names: Optional[Collection[str]] = None
+) -> Iterator[em.EmployeeHours]:
+    '''Yields the hours of every month of the date range which are written to the output
+    budgeting file, optionally only of the given employees.'''
+    for employee in output_file.managed_sheet.selected_employees.values():
+        if names is not None and employee.name not in names:
+            continue
+        for _, hours in employee.yield_month_hours():
+            # If the employee is not missing in the input file
+            # write the hours at the coordinate of the month
+            if hours.accumulated_hours is not None and hours.hours_coord:
+                yield hours
 
 def write_hours_to_output_file(output_file: "wm.OutputWorkbookContext") -> None:
-    '''Write recorded hours to output budgeting file.'''
-    emp_dict = output_file.managed_sheet.selected_employees
-    date_row = output_file.managed_sheet.selected_date.row
+    '''Write recorded hours of every month of the date range to output budgeting file.'''
     sheet = output_file.managed_sheet.selected_sheet.sheet_object
-    for emp_coord in emp_dict.keys():
-        acc_hours = emp_dict.get(emp_coord).hours.accumulated_hours
-        if acc_hours is not None:
-            # If the employee is not missing in the input file
-            # get the associated coordinate to write hours in
-            # the output file
-            hours_coord = next(eu.yield_hours_coord(emp_coord, date_row))
-            cell = sheet[hours_coord]
-            cell.value = acc_hours
-            cell.font = Font(name='Arial', size=12, color='FF000000')
-            cell.number_format = '0.00 "h"'
+    written = list(yield_hours_to_write(output_file))
+    if ing.get_ingestion_settings().keep_backups:
+        output_file.managed_sheet.pending_backup = bj.capture_cells(
+            sheet, [hours.hours_coord for hours in written], output_file.mngd_wb.file_path
+        )
+    for hours in written:
+        cell = sheet[hours.hours_coord]
+        cell.value = hours.accumulated_hours
+        cell.font = OUTPUT_FONT
+        cell.number_format = OUTPUT_NUMBER_FORMAT
+
+def diff_hours_to_output_file(
+    output_file: "wm.OutputWorkbookContext",
+    names: Optional[Collection[str]] = None
+) -> list[CellChange]:
+    '''Returns the cells which writing the hours would change, from what to what, without
+    changing the workbook. Optionally only of the given employees.'''
+    sheet = output_file.managed_sheet.selected_sheet.sheet_object
+    fonts = sheet.parent._fonts # pylint: disable=protected-access
+    new_style = su.describe_style(OUTPUT_NUMBER_FORMAT, OUTPUT_FONT)
+    # Cells share few styles; describe each once
+    old_styles: dict[tuple[int, str], str] = {}
+    changes = []
+    for hours in yield_hours_to_write(output_file, names):
+        cell = sheet[hours.hours_coord]
+        key = (su.get_font_id(cell), cell.number_format)
+        if key not in old_styles:
+            old_styles[key] = su.describe_style(key[1], fonts[key[0]])
+        old_style = old_styles[key]
+        if cell.value != hours.accumulated_hours or old_style != new_style:
+            changes.append(CellChange(
+                sheet.title, hours.hours_coord, cell.value, hours.accumulated_hours,
+                old_style, new_style
+            ))
+    return changes
@@ -0,0 +1,122 @@
+'''
+Package
+-------
+General Function Utilities
+
+Module Name
+---------
+Memory Utilities
+
+Author
+-------
+Karl Goran Antony Zuvela
+
+Description
+-----------
+Provides the resident and peak memory of the wizard's process and keeps
+track of the memory used per workbook.
+'''
+#           --- Standard libraries ---
+import ctypes
+import sys
+from dataclasses import dataclass
+from os import path
+from typing import Optional
+
+_PROC_STATUS = "/proc/self/status"
+_BYTES_PER_MB = 1024 * 1024
+
+#           --- DATA CONTAINERS ---
+
+@dataclass(slots=True)
+class MemoryUsage:
+    '''Data class for the memory of the process in bytes. None if the platform does not tell.'''
+    resident: Optional[int] = None
+    peak: Optional[int] = None
+
+@dataclass(slots=True)
+class WorkbookMemory:
+    '''Data class for the memory used for a workbook in bytes.'''
+    # Resident memory added by loading the workbook
+    loaded: Optional[int] = None
+    # Whether the workbook object was dropped after ingestion
+    released: bool = False
+
+class _ProcessMemoryCounters(ctypes.Structure):
+    '''PROCESS_MEMORY_COUNTERS of the Windows process status API.'''
+    _fields_ = [
+        ("cb", ctypes.c_ulong),
+        ("PageFaultCount", ctypes.c_ulong),
+        ("PeakWorkingSetSize", ctypes.c_size_t),
+        ("WorkingSetSize", ctypes.c_size_t),
+        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+        ("PagefileUsage", ctypes.c_size_t),
+        ("PeakPagefileUsage", ctypes.c_size_t)
+    ]
+
+    def __init__(self) -> None:
+        super().__init__()
+        # The API requires the size of the structure
+        self.cb = ctypes.sizeof(self)
+
+#           --- MODULE FUNCTIONS ---
+
+def get_memory_usage() -> MemoryUsage:
+    '''Public module level. Returns the current resident and the peak memory of the process.'''
+    try:
+        if sys.platform == "win32":
+            return _get_windows_memory_usage()
+        if path.exists(_PROC_STATUS):
+            return _get_proc_memory_usage()
+        return _get_rusage_memory_usage()
+    except (OSError, ValueError, AttributeError):
+        return MemoryUsage()
+
+def to_megabytes(num_bytes: Optional[int]) -> Optional[float]:
+    '''Public module level. Converts bytes to megabytes.'''
+    return None if num_bytes is None else num_bytes / _BYTES_PER_MB
+
+def format_workbook_memory(file_name: str, memory: WorkbookMemory) -> str:
+    '''Public module level. Formats the memory of a workbook for the log.'''
+    released = "; released after ingestion" if memory.released else ""
+    return f"{file_name}: loaded {_format_megabytes(memory.loaded)}{released}"
+
+def format_process_memory(usage: MemoryUsage) -> str:
+    '''Public module level. Formats the memory of the process for the log.'''
+    resident, peak = _format_megabytes(usage.resident), _format_megabytes(usage.peak)
+    return f"Process: resident {resident}, peak {peak}"
+
+def _format_megabytes(num_bytes: Optional[int]) -> str:
+    '''Private module level. Formats bytes as megabytes, or n/a if unknown.'''
+    return "n/a" if num_bytes is None else f"{to_megabytes(num_bytes):.1f} MB"
+
+def _get_windows_memory_usage() -> MemoryUsage:
+    '''Private module level. Reads the working set of the process from the Windows API.'''
+    counters = _ProcessMemoryCounters()
+    handle = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+        return MemoryUsage()
+    return MemoryUsage(resident=counters.WorkingSetSize, peak=counters.PeakWorkingSetSize)
+
+def _get_proc_memory_usage() -> MemoryUsage:
+    '''Private module level. Reads the resident set and its high water mark from procfs.'''
+    usage = MemoryUsage()
+    with open(_PROC_STATUS, 'r', encoding='ascii') as status:
+        for line in status:
+            # Values are given in kB
+            if line.startswith("VmRSS:"):
+                usage.resident = int(line.split()[1]) * 1024
+            elif line.startswith("VmHWM:"):
+                usage.peak = int(line.split()[1]) * 1024
+    return usage
+
+def _get_rusage_memory_usage() -> MemoryUsage:
+    '''Private module level. Reads the peak resident set of the process, e.g. on macOS.
+    The current resident set is not available this way.'''
+    import resource # pylint: disable=import-outside-toplevel
+    # Bytes on macOS, kB elsewhere
+    scale = 1 if sys.platform == "darwin" else 1024
+    return MemoryUsage(peak=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale)
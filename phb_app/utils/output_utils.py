@@ -0,0 +1,250 @@
+'''
+Package
+-------
+General Function Utilities
+
+Module Name
+---------
+Output Utilities
+
+Author
+-------
+Karl Goran Antony Zuvela
+
+Description
+-----------
+Records the hours of the shared input workbooks in any number of budgeting files
+without the wizard. The inputs are ingested and summed once; each budgeting file
+only receives the hours per employee and month. Budgeting files are processed in
+worker processes if more than one worker is configured. Formulae, e.g. of the
+dates and predicted hours, are read as the values Excel last computed, so that
+Excel is not needed. Saving with openpyxl drops those values, so the budgeting dates
+are then computed from their formulae.
+'''
+#           --- Standard libraries ---
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Collection, Optional
+#           --- Third party libraries ---
+from openpyxl.worksheet.worksheet import Worksheet
+#           --- First party libraries ---
+import phb_app.data.aggregation as agg
+import phb_app.data.name_index as nx
+import phb_app.data.workbook_management as wm
+import phb_app.data.worksheet_management as ws
+import phb_app.logging.exceptions as ex
+import phb_app.utils.date_utils as du
+import phb_app.utils.employee_utils as eu
+import phb_app.utils.file_handling_utils as fu
+import phb_app.utils.hours_utils as hu
+import phb_app.wizard.constants.ui_strings as st
+
+# Hours by month and year, employee name and project ID
+type MonthHours = dict[tuple[int, int], dict[str, dict[str, float]]]
+
+#           --- DATA CONTAINERS ---
+
+@dataclass(slots=True)
+class OutputJob:
+    '''Data class for a budgeting file to record hours in.'''
+    file_path: str
+    month: int
+    year: int
+    months: int = 1
+    # The first worksheet if not given
+    sheet_name: Optional[str] = None
+    # Only compute the cells which would change, without saving
+    dry_run: bool = False
+    # Only the hours of these project IDs; of every project if not given
+    proj_ids: Optional[tuple[str, ...]] = None
+
+@dataclass(slots=True)
+class OutputEntry:
+    '''Data class for the hours of an employee in a month of a budgeting file.'''
+    name: str
+    month: int
+    year: int
+    predicted_hours: Optional[float]
+    accumulated_hours: Optional[float]
+    deviation: Optional[str]
+    hours_coord: Optional[str]
+
+@dataclass(slots=True)
+class OutputResult:
+    '''Data class for the outcome of recording hours in a budgeting file.'''
+    file_path: str
+    sheet_name: Optional[str] = None
+    entries: list[OutputEntry] = field(default_factory=list)
+    error: Optional[str] = None
+    # Cells the run would change; only of dry runs
+    changes: list[hu.CellChange] = field(default_factory=list)
+    # Most similar input names of the employees found in no input
+    suggestions: dict[str, list[nx.NameSuggestion]] = field(default_factory=dict)
+
+    @property
+    def written(self) -> int:
+        '''Number of cells written.'''
+        return sum(
+            1 for entry in self.entries if entry.accumulated_hours is not None and entry.hours_coord
+        )
+
+#           --- MODULE FUNCTIONS ---
+
+def collect_range_hours(
+    wb_mngr: wm.WorkbookManager,
+    months: Collection[tuple[int, int]],
+    proj_ids: Optional[Collection[str]] = None
+) -> MonthHours:
+    '''Public module level. Collects the hours per employee and project of every input
+    workbook in each month and year, optionally only on the given project IDs.'''
+    hu.aggregate_input_bookings(wb_mngr)
+    aggregates = [
+        ctx.managed_sheet.unique_aggregate
+        for ctx in wb_mngr.yield_workbook_ctxs_by_role(st.IORole.INPUTS)
+    ]
+    return {
+        (month, year): agg.collect_month_hours(aggregates, month, year, proj_ids)
+        for month, year in months
+    }
+
+def collect_input_names(wb_mngr: wm.WorkbookManager) -> list[str]:
+    '''Public module level. Collects the name of every employee with hours in any input
+    workbook, whatever the months and projects, as the wizard matches names against.'''
+    return list(dict.fromkeys(
+        name
+        for ctx in wb_mngr.yield_workbook_ctxs_by_role(st.IORole.INPUTS)
+        if ctx.managed_sheet.aggregate is not None
+        for name in ctx.managed_sheet.aggregate.yield_names()
+    ))
+
+def select_month_projects(
+    month_hours: MonthHours,
+    proj_ids: Optional[Collection[str]]
+) -> MonthHours:
+    '''Public module level. Returns the hours of only the given project IDs,
+    or of all if none are given.'''
+    if not proj_ids:
+        return month_hours
+    return {
+        month: {
+            name: selected
+            for name, projects in hours.items()
+            if (selected := {
+                proj_id: proj_hours
+                for proj_id, proj_hours in projects.items()
+                if proj_id in proj_ids
+            })
+        }
+        for month, hours in month_hours.items()
+    }
+
+def open_output_context(
+    file_path: str,
+    month: int,
+    year: int,
+    months: int = 1,
+    sheet_name: Optional[str] = None
+) -> tuple[wm.OutputWorkbookContext, Worksheet]:
+    '''Public module level. Loads the budgeting file with the worksheet, the first if not
+    given, and the months from the given month on selected. Returns it with the worksheet
+    as read with the values Excel last computed.'''
+    ctx = wm.create_wb_context_by_role(file_path, st.IORole.OUTPUT)
+    ws.init_output_worksheet(ctx)
+    service = ctx.worksheet_service
+    sheet_name = sheet_name or ctx.managed_sheet.sheet_names[0]
+    service.set_selected_sheet(ctx, sheet_name)
+    service.compute_employee_range()
+    cached_workbook = fu.try_load_workbook(
+        ctx.mngd_wb.file_path, ctx.mngd_wb.file_name, cached_values=True
+    )
+    cached_sheet = cached_workbook[sheet_name]
+    budgeting_dates = du.read_budgeting_dates(cached_sheet, ctx.mngd_wb.workbook_object[sheet_name])
+    du.set_date_range(ctx, budgeting_dates, month, year, months)
+    return ctx, cached_sheet
+
+def set_cached_predicted_hours(ctx: wm.OutputWorkbookContext, cached_sheet: Worksheet) -> None:
+    '''Public module level. Sets the hours coordinates and predicted hours of the selected
+    employees in each month from the values Excel last computed, without Excel.'''
+    date_range = ctx.managed_sheet.date_range
+    eu.set_employee_hours(ctx.managed_sheet.selected_employees, date_range)
+    ctx.worksheet_service.set_predicted_hours({
+        date.row: {
+            coord: cached_sheet[next(eu.yield_hours_coord(coord, date.row))].value
+            for coord in ctx.managed_sheet.selected_employees
+        }
+        for date in date_range
+    })
+    ctx.worksheet_service.set_predicted_hours_colour()
+
+def process_output(
+    job: OutputJob,
+    month_hours: MonthHours,
+    input_names: Optional[Collection[str]] = None
+) -> OutputResult:
+    '''Public module level. Records the hours of every employee of the budgeting file
+    in each month of the job, on its project IDs if given, and saves the file, or in a
+    dry run only returns the cells which would change. Employees in none of the input
+    names, by default those with hours, are given the most similar names. Errors are
+    returned in the result, so that one bad file does not stop the others.'''
+    result = OutputResult(job.file_path, job.sheet_name)
+    month_hours = select_month_projects(month_hours, job.proj_ids)
+    try:
+        ctx, cached_sheet = open_output_context(
+            job.file_path, job.month, job.year, job.months, job.sheet_name
+        )
+        service = ctx.worksheet_service
+        result.sheet_name = ctx.managed_sheet.selected_sheet.sheet_name
+        service.set_selected_employees(list(service.yield_sheet_employees()))
+        set_cached_predicted_hours(ctx, cached_sheet)
+        for employee in service.yield_from_selected_employees():
+            for month, hours in employee.yield_month_hours():
+                projects = month_hours.get(month, {}).get(employee.name)
+                if projects:
+                    hours.accumulated_hours = sum(projects.values())
+                    employee.found_projects.update(dict.fromkeys(projects, []))
+                    employee.month_projects[month] = list(projects)
+            hu.finalise_employee_hours(employee)
+        if input_names is None:
+            input_names = [name for hours in month_hours.values() for name in hours]
+        index = nx.NameIndex(input_names)
+        result.suggestions = {
+            employee.name: index.suggest(employee.name)
+            for employee in service.yield_from_selected_employees()
+            if employee.name not in index
+        }
+        if job.dry_run:
+            result.changes = hu.diff_hours_to_output_file(ctx)
+        else:
+            hu.write_hours_to_output_file(ctx)
+            wm.save_output_workbook(ctx)
+    except (ex.WorkbookLoadError, ex.EmployeeRowAnchorsMisalignment, ex.MissingEmployeeRow,
+            ex.BudgetingDatesNotFound, KeyError, IndexError, OSError) as exc:
+        result.error = str(exc)
+        return result
+    result.entries = [
+        OutputEntry(
+            employee.name, month, year, hours.predicted_hours, hours.accumulated_hours,
+            hours.deviation, hours.hours_coord
+        )
+        for employee in service.yield_from_selected_employees()
+        for (month, year), hours in employee.yield_month_hours()
+    ]
+    return result
+
+def process_outputs(
+    jobs: list[OutputJob],
+    month_hours: MonthHours,
+    workers: int = 1,
+    input_names: Optional[Collection[str]] = None
+) -> list[OutputResult]:
+    '''Public module level. Records the hours in every budgeting file, in worker processes
+    if there is more than one worker and file. Results are returned in the order of the jobs.'''
+    if workers <= 1 or len(jobs) <= 1:
+        return [process_output(job, month_hours, input_names) for job in jobs]
+    # Spawn rather than fork: the wizard runs Qt and watcher threads
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=context) as executor:
+        return list(executor.map(
+            process_output, jobs, [month_hours] * len(jobs), [input_names] * len(jobs)
+        ))
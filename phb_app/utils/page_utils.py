@@ -28,22 +28,26 @@ from PyQt6.QtGui import QPixmap, QColor
 from PyQt6.QtWidgets import (
     QWizardPage, QBoxLayout, QHBoxLayout, QComboBox,
     QWidget, QLabel, QFileDialog, QVBoxLayout,
-    QTableWidget, QTableWidgetItem, QHeaderView
+    QTableWidget, QTableWidgetItem, QHeaderView,
+    QDialog, QDialogButtonBox
 )
 #           --- First party libraries ---
 import phb_app.data.header_management as hm
 import phb_app.data.location_management as loc
 import phb_app.data.months_dict as md
+import phb_app.data.name_index as nx
 import phb_app.logging.error_manager as em
 import phb_app.logging.exceptions as ex
 import phb_app.utils.date_utils as du
 import phb_app.utils.file_handling_utils as fu
+import phb_app.wizard.constants.colours as co
 import phb_app.wizard.constants.integer_enums as ie
 import phb_app.wizard.constants.ui_strings as st
 
 if TYPE_CHECKING:
     import phb_app.data.io_management as io
     import phb_app.data.workbook_management as wm
+    import phb_app.utils.hours_utils as hu
 
 #           --- Title Setup ---
 
@@ -153,18 +157,24 @@ def create_interaction_panel(panel: "io.IOControls", max_height: Optional[int] =
 
 #           --- File Handling ---
 
-def _setup_file_dialog(page: QWizardPage, file_mode: QFileDialog.FileMode) -> QFileDialog:
+def _setup_file_dialog(
+    page: QWizardPage,
+    file_mode: QFileDialog.FileMode,
+    name_filter: str
+) -> QFileDialog:
     '''Set up and return a file dialog.'''
     file_dialog = QFileDialog(page)
     file_dialog.setWindowTitle(st.ADD_FILE)
-    file_dialog.setNameFilter(st.EXCEL_FILE)
+    file_dialog.setNameFilter(name_filter)
     file_dialog.setFileMode(file_mode)
     file_dialog.setViewMode(QFileDialog.ViewMode.Detail)
     return file_dialog
 
 def _add_file_dialog(page: QWizardPage, wb_mngr: "wm.WorkbookManager", file_mode: QFileDialog.FileMode, file_ctx: "io.EntryContext") -> None:
     '''Add files to either the input or output selection tables.'''
-    file_dialog = _setup_file_dialog(page, file_mode)
+    # Only input files may be CSV exports
+    name_filter = st.INPUT_FILE if file_ctx.panel.role == st.IORole.INPUTS else st.EXCEL_FILE
+    file_dialog = _setup_file_dialog(page, file_mode, name_filter)
     if file_dialog.exec():
         _populate_file_table(page, wb_mngr, file_dialog.selectedFiles(), file_ctx)
 
@@ -274,11 +284,21 @@ def create_month_dropdown() -> QComboBox:
     default_month = du.abbr_month((datetime.now() + relativedelta(months=-ie.CONST_1)).month, md.LOCALIZED_MONTHS_SHORT)
     return _create_dropdown(list(md.LOCALIZED_MONTHS_SHORT.keys()), default_month)
 
+def create_months_dropdown() -> QComboBox:
+    '''
+    Create a dropdown for selecting the number of months, from the selected month on,
+    for which hours are recorded in one run. The default is the selected month only.
+    '''
+    return _create_dropdown(
+        [str(months) for months in range(2, ie.MAX_RANGE_MONTHS + 1)], str(ie.CONST_1)
+    )
+
 def setup_dropdowns(table:QTableWidget, row: int, dds: "io.Dropdowns") -> None:
-    '''Set up year, month, and worksheet dropdowns.'''
+    '''Set up year, month, months and worksheet dropdowns.'''
     table.setCellWidget(row, ie.OutputTableHeaders.WORKSHEET, dds.worksheet)
     table.setCellWidget(row, ie.OutputTableHeaders.MONTH, dds.month)
     table.setCellWidget(row, ie.OutputTableHeaders.YEAR, dds.year)
+    table.setCellWidget(row, ie.OutputTableHeaders.MONTHS, dds.months)
 
 def _handle_load_file_error(row: int, file_ctx: "io.EntryContext", error: Exception) -> None:
     '''Handle errors during file selection and update the UI accordingly.'''
@@ -299,11 +319,17 @@ def handle_dropdown_selection(file_ctx: "io.EntryContext", wb_ctx: "wm.OutputWor
     # Remove the error if it is still there (if retrying)
     _clear_row_error_status(file_ctx, row, ie.OutputTableHeaders.FILENAME)
     import phb_app.data.io_management as io # pylint: disable=import-outside-toplevel
+    import phb_app.data.workbook_management as wm # pylint: disable=import-outside-toplevel
     io.update_current_text(dropdowns)
     try:
         wb_ctx.worksheet_service.set_selected_sheet(wb_ctx, dropdowns.current_text.worksheet)
-        wb_ctx.worksheet_service.compute_employee_range()
-        du.set_budgeting_date(wb_ctx, dropdowns.current_text)
+        layout = wm.get_sheet_layout(wb_ctx, dropdowns.current_text.worksheet)
+        if layout is None:
+            wb_ctx.worksheet_service.compute_employee_range()
+            du.set_budgeting_date(wb_ctx, dropdowns.current_text)
+        else:
+            wb_ctx.worksheet_service.apply_sheet_layout(layout)
+            du.set_budgeting_date(wb_ctx, dropdowns.current_text, layout.budgeting_dates)
     except (ex.EmployeeRowAnchorsMisalignment, ex.MissingEmployeeRow, ex.BudgetingDatesNotFound,
             KeyError) as exc:
         _handle_selection_error(row, file_ctx, exc)
@@ -353,17 +379,12 @@ def populate_project_table(page: QWizardPage, proj_ctx: "io.EntryContext", wb_mn
 def populate_employee_table(page: QWizardPage, emp_ctx: "io.EntryContext", wb_mngr: "wm.WorkbookManager") -> None:
     '''Populate the employee table with employees.'''
     wb_ctx = wb_mngr.get_output_workbook_ctx()
-    ws_ctx = wb_ctx.managed_sheet.selected_sheet.sheet_object
-    start_col = wb_ctx.managed_sheet.employee_range.start_col_idx
-    end_col = wb_ctx.managed_sheet.employee_range.end_col_idx + ie.CONST_1
-    for col in range(start_col, end_col):
-        cell = ws_ctx.cell(row=wb_ctx.managed_sheet.employee_range.start_row_idx, column=col)
-        if cell.value and cell.value not in st.NON_NAMES:
-            row = _insert_row(emp_ctx.panel)
-            emp_ctx.data.emp_name = cell.value
-            emp_ctx.data.worksheet = wb_ctx.managed_sheet.selected_sheet.sheet_name
-            emp_ctx.data.coord = cell.coordinate
-            emp_ctx.configure_row(emp_ctx, row)
+    for coord, name in wb_ctx.worksheet_service.yield_sheet_employees():
+        row = _insert_row(emp_ctx.panel)
+        emp_ctx.data.emp_name = name
+        emp_ctx.data.worksheet = wb_ctx.managed_sheet.selected_sheet.sheet_name
+        emp_ctx.data.coord = coord
+        emp_ctx.configure_row(emp_ctx, row)
     page.completeChanged.emit()
 
 def populate_io_summary_table(page: QWizardPage, sum_io_ctx: "io.EntryContext", wb_mngr: "wm.WorkbookManager") -> None:
@@ -374,9 +395,13 @@ def populate_io_summary_table(page: QWizardPage, sum_io_ctx: "io.EntryContext",
     sum_io_ctx.data.in_file_names = io.join_str_list('\n', in_wb_names)
     out_wb_names = wb_mngr.get_wb_names_list_by_role(st.IORole.OUTPUT)
     sum_io_ctx.data.out_file_names = io.join_str_list('\n', out_wb_names)
-    date = wb_mngr.get_output_workbook_ctx().managed_sheet.selected_date
-    month = du.abbr_month(date.month, md.LOCALIZED_MONTHS_SHORT)
-    sum_io_ctx.data.date = f"{month} {date.year}"
+    date_range = wb_mngr.get_output_workbook_ctx().managed_sheet.date_range
+    # First and last month of the range, or just the one month
+    dates = dict.fromkeys(
+        f"{du.abbr_month(date.month, md.LOCALIZED_MONTHS_SHORT)} {date.year}"
+        for date in (date_range[0], date_range[-1])
+    )
+    sum_io_ctx.data.date = " - ".join(dates)
     sum_io_ctx.configure_row(sum_io_ctx, col)
     page.completeChanged.emit()
     
@@ -394,9 +419,47 @@ def populate_summary_data_table(page: QWizardPage, sum_data_ctx: "io.EntryContex
         sum_data_ctx.data.proj_id = io.join_found_projects('\n', emp.found_projects.items())
         sum_data_ctx.data.out_ws_name = out_wb_ctx.managed_sheet.selected_sheet.sheet_name
         sum_data_ctx.data.coord = emp.hours.hours_coord
+        sum_data_ctx.data.suggestions = nx.format_suggestions(emp.suggestions)
         sum_data_ctx.configure_row(sum_data_ctx, row, emp.hours)
     page.completeChanged.emit()
 
+def get_selected_names(table: QTableWidget) -> set[str]:
+    '''Returns the employee names of the selected rows of the summary data table.'''
+    return {
+        table.item(row, ie.SummaryDataTableHeaders.EMPLOYEE).text()
+        for row in range(table.rowCount())
+        if table.selectionModel().isRowSelected(row)
+    }
+
+def show_cell_changes(page: QWizardPage, changes: list["hu.CellChange"]) -> None:
+    '''Shows the cells which writing the hours would change, from what to what, in a dialog.'''
+    dialog = QDialog(page)
+    dialog.setWindowTitle(st.CELL_CHANGES_TITLE)
+    dialog.resize(1000, 500)
+    table = QTableWidget(len(changes), len(ie.CellChangeTableHeaders))
+    table.setHorizontalHeaderLabels(ie.CellChangeTableHeaders.cap_members_list())
+    table.horizontalHeader().setDefaultAlignment(Qt.AlignmentFlag.AlignLeft)
+    table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+    for header, width in hm.CELL_CHANGE_COLUMN_WIDTHS.items():
+        table.setColumnWidth(header, width)
+    # Fill the table without repainting each item
+    table.setUpdatesEnabled(False)
+    for row, change in enumerate(changes):
+        for header, value in zip(ie.CellChangeTableHeaders, (
+            change.sheet_name, change.coord, change.old_value, change.new_value,
+            change.old_style, change.new_style
+        )):
+            table.setItem(row, header, QTableWidgetItem("" if value is None else str(value)))
+    table.setUpdatesEnabled(True)
+    buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+    buttons.rejected.connect(dialog.reject)
+    layout = QVBoxLayout()
+    layout.addWidget(QLabel(st.CELL_CHANGES_SUMMARY.format(count=len(changes))))
+    layout.addWidget(table)
+    layout.addWidget(buttons)
+    dialog.setLayout(layout)
+    dialog.exec()
+
 
 #           --- Exception Styling and Handling ---
 
@@ -409,8 +472,8 @@ def _highlight_bad_item(item: QTableWidgetItem) -> None:
 def _remove_highlighting(item: QTableWidgetItem) -> None:
     '''Removes the highlighting after error correction.'''
 
-    item.setBackground(st.DEFAULT_BACKGROUND_COLOUR)
-    item.setForeground(st.DEFAULT_FONT_COLOUR)
+    item.setBackground(co.DEFAULT_BACKGROUND_COLOUR)
+    item.setForeground(co.DEFAULT_FONT_COLOUR)
 
 def _clear_row_error_status(file_ctx: "io.EntryContext", row: int, header: ie.BaseTableHeaders) -> None:
     '''Clear the error status of a row in the table.'''
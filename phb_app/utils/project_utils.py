@@ -18,26 +18,30 @@ of employees in the project hours budgeting wizard.
 '''
 #           --- Standard libraries ---
 from typing import TYPE_CHECKING
-#           --- Third party libraries ---
-from PyQt6.QtWidgets import QTableWidget
-from PyQt6.QtCore import QModelIndex
 #           --- First party libraries ---
 import phb_app.wizard.constants.integer_enums as ie
 import phb_app.wizard.constants.ui_strings as st
 
 if TYPE_CHECKING:
+    from PyQt6.QtWidgets import QTableWidget
+    from PyQt6.QtCore import QModelIndex
     import phb_app.data.workbook_management as wm
 
 def set_project_ids_each_input_wb(wb_mngr: "wm.WorkbookManager") -> None:
-    '''Set project IDs for each input workbook.'''
+    '''Set project IDs for each input workbook. Workbooks are only ingested once, or taken
+    from the history store; reloads after changes on disk ingest them again by themselves.'''
 
     for wb_ctx in wb_mngr.yield_workbook_ctxs_by_role(st.IORole.INPUTS):
-        wb_ctx.worksheet_service.set_selectable_project_ids(
-            wb_ctx.locale_data.filter_headers.proj_id,
-            wb_ctx.locale_data.filter_headers.description,
-            wb_ctx.locale_data.filter_headers.name)
+        if wb_ctx.managed_sheet.bookings is None:
+            wb_mngr.ingest_input_bookings(wb_ctx)
+            wb_ctx.worksheet_service.set_selectable_project_ids()
 
-def set_selected_project_ids(wb_ctx: "wm.InputWorkbookContext", table: QTableWidget, rows: list[QModelIndex], headers: ie.ProjectIDTableHeaders) -> None:
+def set_selected_project_ids(
+    wb_ctx: "wm.InputWorkbookContext",
+    table: "QTableWidget",
+    rows: list["QModelIndex"],
+    headers: ie.ProjectIDTableHeaders
+) -> None:
     '''Sets the selected projects IDs as references from the selectable IDs.'''
     currently_selected = set()
     # Get the project ID and file name from each row
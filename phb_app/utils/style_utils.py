@@ -0,0 +1,81 @@
+'''
+Package
+-------
+General Function Utilities
+
+Module Name
+---------
+Style Utilities
+
+Author
+-------
+Karl Goran Antony Zuvela
+
+Description
+-----------
+Classifies the fonts of a workbook's style table once, so that the font of any
+cell is classified by looking up the cell's font index. Also describes cell styles
+for the preview of the cells a run would change.
+'''
+#           --- Third party libraries ---
+from openpyxl.cell.cell import Cell
+from openpyxl.styles import Font
+from openpyxl.workbook import Workbook
+#           --- First party libraries ---
+import phb_app.wizard.constants.integer_enums as ie
+
+# Theme colours of light and dark text, i.e. white and black in the default theme
+_LIGHT_TEXT_THEME = 0
+_DARK_TEXT_THEME = 1
+_BLACK_RGB = 'FF000000'
+
+def classify_font(font: Font) -> ie.FontClass:
+    '''Public module level. Classifies the font by its colour. Default or black fonts mark
+    recorded hours; lightened theme colours, darkened white and greys mark planned hours.'''
+    colour = font.color
+    if not colour:
+        return ie.FontClass.RECORDED
+    if colour.type == 'theme':
+        return _classify_theme_colour(colour.theme, colour.tint)
+    if colour.type == 'rgb' and isinstance(colour.rgb, str):
+        return _classify_rgb_colour(colour.rgb)
+    return ie.FontClass.OTHER
+
+def _classify_theme_colour(theme: int, tint: float) -> ie.FontClass:
+    '''Private module level. Classifies a theme colour of a font, with its tint.'''
+    if theme == _DARK_TEXT_THEME and tint == 0.0:
+        return ie.FontClass.RECORDED
+    # E.g. "White, Background 1, Darker 35%" is grey
+    if theme == _LIGHT_TEXT_THEME and tint != 0.0:
+        return ie.FontClass.PLANNED
+    return ie.FontClass.PLANNED if tint > 0.0 else ie.FontClass.OTHER
+
+def _classify_rgb_colour(rgb: str) -> ie.FontClass:
+    '''Private module level. Classifies an ARGB colour of a font.'''
+    if rgb == _BLACK_RGB:
+        return ie.FontClass.RECORDED
+    red, green, blue = rgb[2:4], rgb[4:6], rgb[6:8]
+    return ie.FontClass.PLANNED if red == green == blue else ie.FontClass.OTHER
+
+def classify_fonts(workbook: Workbook) -> tuple[ie.FontClass, ...]:
+    '''Public module level. Classifies every font in the workbook's style table,
+    indexed by font ID.'''
+    return tuple(classify_font(font) for font in workbook._fonts) # pylint: disable=protected-access
+
+def get_font_id(cell: Cell) -> int:
+    '''Public module level. Returns the index of the cell's font in the style table.
+    Cells stored without a style use the default font.'''
+    style = cell._style # pylint: disable=protected-access
+    return style.fontId if style is not None else 0
+
+def describe_style(number_format: str, font: Font) -> str:
+    '''Public module level. Describes the number format and font of a cell in one line.'''
+    colour = font.color
+    if colour is None:
+        colour_text = "auto"
+    elif colour.type == 'theme':
+        colour_text = f"theme {colour.theme}" + (f" {colour.tint:+.2f}" if colour.tint else "")
+    else:
+        colour_text = str(colour.rgb) if colour.type == 'rgb' else colour.type
+    size = f"{font.sz:g}" if font.sz is not None else ""
+    return f"{number_format}; {' '.join(part for part in (font.name, size, colour_text) if part)}"
@@ -0,0 +1,41 @@
+'''
+Package
+-------
+PHB Wizard
+
+Module Name
+---------
+PHB Wizard Constant - Colours
+
+Author
+-------
+Karl Goran Antony Zuvela
+
+Description
+-----------
+Qt colours of the wizard. The data model keeps colours as plain enums, which only
+the pages map to Qt colours, so that it is imported and pickled without Qt.
+'''
+#           --- Third party libraries ---
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QPalette, QColor
+from PyQt6.QtWidgets import QApplication
+#           --- First party libraries ---
+import phb_app.wizard.constants.integer_enums as ie
+
+DEFAULT_FONT_COLOUR = QColor()
+
+DEFAULT_BACKGROUND_COLOUR = QColor()
+
+def set_app_default_font_theme(app: QApplication) -> None:
+    """Sets white or black based on the app's background colour."""
+    global DEFAULT_FONT_COLOUR # pylint: disable=global-statement
+    global DEFAULT_BACKGROUND_COLOUR # pylint: disable=global-statement
+    DEFAULT_FONT_COLOUR = app.palette().color(QPalette.ColorRole.Text)
+    DEFAULT_BACKGROUND_COLOUR = app.palette().color(QPalette.ColorRole.Base)
+
+def to_qcolor(colour: ie.HoursColour) -> QColor:
+    """Returns the Qt colour of the hours colour."""
+    if colour == ie.HoursColour.RED:
+        return QColor(Qt.GlobalColor.red)
+    return DEFAULT_FONT_COLOUR
@@ -51,6 +51,7 @@ class OutputTableHeaders(BaseTableHeaders):
     WORKSHEET = auto()
     MONTH = auto()
     YEAR = auto()
+    MONTHS = auto()
     UNIQUE_ID = auto()
 
 class OutputFile(BaseTableHeaders):
@@ -89,9 +90,49 @@ class SummaryDataTableHeaders(BaseTableHeaders):
     PROJECT_ID = auto()
     OUTPUT_WORKSHEET = auto()
     COORDINATE = auto()
+    SUGGESTIONS = auto()
+
+class CellChangeTableHeaders(BaseTableHeaders):
+    '''Table headers of the cells to be changed, previewed in the summary.'''
+
+    SHEET = 0
+    COORDINATE = auto()
+    OLD_VALUE = auto()
+    NEW_VALUE = auto()
+    OLD_STYLE = auto()
+    NEW_STYLE = auto()
+
+class HoursColour(IntEnum):
+    '''Colours of the hours, mapped to Qt colours only by the pages.'''
+
+    DEFAULT = 0
+    # Predicted hours already recorded or accumulated hours missing
+    RED = auto()
+
+class DeviationClass(IntEnum):
+    '''Deviation between the predicted and accumulated hours.'''
+
+    # Not computed yet
+    UNSET = 0
+    # Neither predicted nor accumulated hours
+    NO_HOURS = auto()
+    NEGLIGIBLE = auto()
+    WEAK = auto()
+    STRONG = auto()
 
 #           --- CONSTANTS ---
 
 CONST_0 = 0
 CONST_1 = 1
+# Most months recorded in one run, e.g. to backfill a year
+MAX_RANGE_MONTHS = 12
 IO_SUMMARY_ROW_COUNT = 3
+
+class FontClass(IntEnum):
+    '''Classification of the font of budgeted hours in the output workbook.'''
+
+    OTHER = 0
+    # Default black: hours already recorded
+    RECORDED = auto()
+    # Lightened grey: hours only planned
+    PLANNED = auto()
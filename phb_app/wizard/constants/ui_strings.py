@@ -7,8 +7,6 @@ from pathlib import Path
 from enum import StrEnum, auto
 #           --- Third party libraries ---
 import git
-from PyQt6.QtGui import QPalette, QColor
-from PyQt6.QtWidgets import QApplication
 
 #           --- GENERIC ---
 
@@ -16,17 +14,6 @@ GUI_TITLE = "Project Hours Budgeting Wizard"
 
 NO_SELECTION = "No selection."
 
-DEFAULT_FONT_COLOUR = QColor()
-
-DEFAULT_BACKGROUND_COLOUR = QColor()
-
-def set_app_default_font_theme(app: QApplication) -> None:
-    """Sets white or black based on the app's background colour."""
-    global DEFAULT_FONT_COLOUR # pylint: disable=global-statement
-    global DEFAULT_BACKGROUND_COLOUR # pylint: disable=global-statement
-    DEFAULT_FONT_COLOUR = app.palette().color(QPalette.ColorRole.Text)
-    DEFAULT_BACKGROUND_COLOUR = app.palette().color(QPalette.ColorRole.Base)
-
 #           --- INTRO PAGE ---
 
 INTRO_TITLE = "Introduction"
@@ -78,6 +65,7 @@ OUTPUT_FILE_INSTRUCTION_TEXT = "Select the project hours budgeting file as the t
 
 ADD_FILE = "Add File"
 EXCEL_FILE = "Excel files (*.xlsx)"
+INPUT_FILE = "Excel or CSV files (*.xlsx *.csv *.tsv)"
 
 #           --- PROJECT SELECTION PAGE ---
 
@@ -112,8 +100,16 @@ IO_SUMMARY = "IO Summary."
 SUMMARY_INSTRUCTIONS = """
 <p>Check all details before selecting which employee's hours should be recorded.</P>
 <p>Missing hours will be omitted. Red predicted hours imply that hours have already been recorded and thus will not be overwritten. The project ID column displays from where the hours were taken.</p>
+<p>For employees found in no input, the suggestions column lists the most similar names
+in the inputs.</p>
 """
 
+CELL_CHANGES_TITLE = "Cells to be changed"
+
+CELL_CHANGES_SUMMARY = (
+    "{count} cells of the budgeting file would change. Nothing has been written yet."
+)
+
 #           --- ENUMS ---
 
 class IORole(StrEnum):
@@ -132,6 +128,8 @@ class SpecialStrings(StrEnum):
 
     SELECT_WORKSHEET = "<select worksheet>"
     XLSX = ".xlsx"
+    CSV = ".csv"
+    TSV = ".tsv"
     UTF_8 = "utf-8"
     DATA_ONLY_EXCEL = "_wizard_data_only.xlsx"
     ZERO_HOURS = "0.00"
@@ -150,6 +148,7 @@ class ButtonNames(StrEnum):
     REMOVE = "Remove"
     SELECT_ALL = "Select all"
     DESELECT_ALL = "Deselect all"
+    PREVIEW_CHANGES = "Preview changes"
 
 class LogTableHeaders(StrEnum):
     '''Summary table headers in summary selection.'''
@@ -172,6 +171,13 @@ class YamlEnum(StrEnum):
     COUNTRIES = "countries"
     DEVIATIONS = "deviations"
     ROW_ANCHORS = "row_anchors"
+    INGESTION = "ingestion"
+
+class InputBackend(StrEnum):
+    '''Enum of readers for input xlsx workbooks.'''
+
+    OPENPYXL = "openpyxl"
+    FAST = "fast"
 
 class CountriesEnum(StrEnum):
     '''Enum of countries.'''
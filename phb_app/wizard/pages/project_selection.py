@@ -21,6 +21,7 @@ from PyQt6.QtWidgets import QWizardPage, QLabel, QTableWidget, QPushButton, QHBo
 import phb_app.data.header_management as hm
 import phb_app.data.io_management as io
 import phb_app.data.workbook_management as wm
+import phb_app.utils.hours_utils as hu
 import phb_app.utils.page_utils as pu
 import phb_app.utils.project_utils as pro
 import phb_app.wizard.constants.integer_enums as ie
@@ -56,6 +57,8 @@ class ProjectSelectionPage(QWizardPage):
     def initializePage(self) -> None: # pylint: disable=invalid-name
         '''Override page initialisation. Setup page on each visit.'''
         pro.set_project_ids_each_input_wb(self.wb_mgmt)
+        # The summary then only looks the sums up once the employees are selected
+        hu.start_aggregating_input_bookings(self.wb_mgmt)
         io.set_row_configurator(self.proj_ctx)
         pu.connect_buttons(self, self.proj_ctx)
         pu.populate_project_table(self, self.proj_ctx, self.wb_mgmt)
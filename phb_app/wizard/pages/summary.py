@@ -24,6 +24,7 @@ import phb_app.data.header_management as hm
 import phb_app.data.io_management as io
 import phb_app.data.workbook_management as wm
 import phb_app.utils.employee_utils as eu
+import phb_app.utils.hours_utils as hu
 import phb_app.utils.page_utils as pu
 import phb_app.logging.logger as logger
 import phb_app.wizard.constants.integer_enums as ie
@@ -57,8 +58,13 @@ class SummaryPage(QWizardPage):
                 selection_mode=QTableWidget.SelectionMode.MultiSelection,
                 tab_widths=hm.SUMMARY_DATA_COLUMN_WIDTHS
             ),
-            buttons=[QPushButton(st.ButtonNames.SELECT_ALL, self), QPushButton(st.ButtonNames.DESELECT_ALL, self)]
+            buttons=[
+                QPushButton(st.ButtonNames.SELECT_ALL, self),
+                QPushButton(st.ButtonNames.DESELECT_ALL, self),
+                QPushButton(st.ButtonNames.PREVIEW_CHANGES, self)
+            ]
         )
+        self.summary_data_panel.buttons[-1].clicked.connect(self.preview_changes)
         self.sum_io_ctx = io.EntryContext(self.summary_io_panel, io.SummaryIOContext())
         self.sum_data_ctx = io.EntryContext(self.summary_data_panel, io.SummaryDataContext())
         pu.setup_page(
@@ -67,6 +73,19 @@ class SummaryPage(QWizardPage):
             layout_type=QVBoxLayout())
         self.setFinalPage(True)
 
+    def preview_changes(self) -> None:
+        '''Shows the cells which writing the hours of the selected employees would change,
+        without writing.'''
+        names = pu.get_selected_names(self.summary_data_panel.table)
+        pu.show_cell_changes(self, hu.diff_hours_to_output_file(self.out_wb_ctx, names))
+
+    def refresh_hours(self) -> None:
+        '''Computes the hours of the selected employees again and shows them,
+        e.g. after an input workbook was reloaded.'''
+        pu.clean_up_table(self.summary_data_panel.table)
+        hu.recompute_hours_for_selected_employees(self.wb_mgmt, self.out_wb_ctx)
+        pu.populate_summary_data_table(self, self.sum_data_ctx, self.wb_mgmt)
+
 #           --- QWizard function overrides ---
 
     def initializePage(self) -> None: # pylint: disable=invalid-name
@@ -11,7 +11,10 @@ Description
 -----------
 Constructs and manages the stages of the GUI.
 '''
+#           --- Standard libraries ---
+from uuid import UUID
 #           --- Third party libraries ---
+from PyQt6.QtCore import pyqtSignal
 from PyQt6.QtGui import QGuiApplication
 from PyQt6.QtWidgets import QWizard
 #           --- First party libraries ---
@@ -28,6 +31,9 @@ import phb_app.wizard.constants.ui_strings as st
 
 class PHBWizard(QWizard):
     '''Main GUI interface for the Auto Hours Collector.'''
+    # Role and UUID of a workbook whose data changed. Emitted from the reload worker,
+    # its slots run on the GUI thread.
+    workbook_invalidated = pyqtSignal(object, object)
 
     def __init__(
         self,
@@ -48,10 +54,19 @@ class PHBWizard(QWizard):
         self.addPage(iosp.IOSelectionPage(country_data, self.workbook_manager))
         self.addPage(ps.ProjectSelectionPage(self.workbook_manager))
         self.addPage(ems.EmployeeSelectionPage(self.workbook_manager))
-        self.addPage(sp.SummaryPage(self.workbook_manager))
+        self.summary_page = sp.SummaryPage(self.workbook_manager)
+        self.addPage(self.summary_page)
+        self.workbook_invalidated.connect(self.on_workbook_invalidated)
+        self.workbook_manager.add_invalidation_hook(self.workbook_invalidated.emit)
 
         self.setWizardStyle(QWizard.WizardStyle.ModernStyle)
 
+    def on_workbook_invalidated(self, role: st.IORole, _uuid: UUID) -> None:
+        '''Shows the hours again if an input workbook was reloaded while they are shown.
+        The earlier pages read the inputs anew on their next visit.'''
+        if role == st.IORole.INPUTS and self.currentPage() is self.summary_page:
+            self.summary_page.refresh_hours()
+
     def accept(self) -> bool:
         '''Extend the functionality of the Finish button.'''
         # Get the first and only output workbook
@@ -0,0 +1,85 @@
+"""Testing of the Aggregation"""
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from phb_app.data.aggregation import aggregate_bookings
+from phb_app.data.booking_management import BookingTable, to_date_serial
+from phb_app.data.location_management import CountryData
+from phb_app.data.workbook_management import WorkbookManager, load_input_context
+from phb_app.data.worksheet_management import InputWorksheetService
+from phb_app.utils.hours_utils import aggregate_input_bookings
+from phb_app.wizard.constants.ui_strings import IORole
+
+INPUT = Path(__file__).parents[1] / "German_SAPX_Extract_July_August_2024.xlsx"
+
+def _random_table(rows: int) -> BookingTable:
+    """Builds a reproducible table of bookings over three months, some without hours."""
+    rand = random.Random(7)
+    table = BookingTable()
+    for _ in range(rows):
+        date = datetime(2024, 6, 1) + timedelta(days=rand.randrange(92))
+        hours = rand.choice((None, rand.uniform(0.1, 9.9)))
+        name, proj_id = f"Person {rand.randrange(20)}", f"P{rand.randrange(8)}"
+        table.append(name, proj_id, None, hours, to_date_serial(date, ""))
+    return table
+
+def test_parallel_sums_identical_to_sequential() -> None:
+    """Chunks summed in worker processes give exactly the sequential sums, in the same order."""
+    table = _random_table(5000)
+    sequential = aggregate_bookings(table, workers=1, chunk_rows=700)
+    parallel = aggregate_bookings(table, workers=2, chunk_rows=700)
+    assert list(parallel.sums.items()) == list(sequential.sums.items())
+    july = dict(sequential.yield_hours("Person 3", ["P1", "P2"], 7, 2024))
+    expected = sum(
+        hours for name, proj, hours, serial
+        in zip(table.names, table.proj_ids, table.hours, table.date_serials)
+        if table.pool[name] == "Person 3" and table.pool[proj] == "P1"
+        and 45474 <= serial < 45505 and hours == hours
+    )
+    assert abs(july["P1"] - expected) < 1e-9
+
+def test_hours_looked_up_in_index() -> None:
+    """An employee's month is looked up in the index and holds exactly the sums of its keys."""
+    table = _random_table(2000)
+    aggregate = aggregate_bookings(table)
+    proj_ids = [f"P{idx}" for idx in range(8)]
+    for person, month_key in ((3, 24294), (5, 24295)):
+        name = f"Person {person}"
+        month, year = month_key % 12 + 1, month_key // 12
+        expected = {
+            table.pool[proj]: hours for (name_val, proj, month_val), hours in aggregate.sums.items()
+            if table.pool[name_val] == name and month_val == month_key
+        }
+        assert dict(aggregate.yield_hours(name, proj_ids, month, year)) == expected
+        assert expected
+    names = dict.fromkeys(table.pool[name_ref] for name_ref, _, _ in aggregate.sums)
+    assert list(aggregate.yield_names()) == list(names)
+    assert not list(aggregate.yield_hours("Nobody", proj_ids, 7, 2024))
+
+def test_inputs_aggregated_once_across_threads(monkeypatch) -> None:
+    """Aggregating on the reload worker and the GUI thread at once sums each input once."""
+    calls = []
+    aggregate = InputWorksheetService.aggregate_bookings
+    def slow_aggregate(service: InputWorksheetService, workers: int, chunk_rows: int) -> None:
+        calls.append(service)
+        time.sleep(0.2)
+        aggregate(service, workers, chunk_rows)
+    monkeypatch.setattr(InputWorksheetService, "aggregate_bookings", slow_aggregate)
+    wb_mngr = WorkbookManager()
+    try:
+        ctx = load_input_context(str(INPUT), CountryData(), wb_mngr=wb_mngr)
+        wb_mngr.add_workbook(IORole.INPUTS, ctx)
+        # As if started ahead on the reload worker and called again on the GUI thread
+        threads = [
+            threading.Thread(target=aggregate_input_bookings, args=(wb_mngr,))
+            for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        wb_mngr.close()
+    assert len(calls) == 1
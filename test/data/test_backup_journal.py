@@ -0,0 +1,71 @@
+"""Testing of the Backup Journal"""
+import shutil
+from pathlib import Path
+import openpyxl
+import pytest
+from openpyxl.styles import Font
+from phb_app.data.backup_journal import BackupJournal, capture_cells
+from phb_app.logging.exceptions import BudgetingFileChanged
+from phb_app.utils.output_utils import OutputJob, process_output
+
+BUDGET = Path(__file__).parents[1] / "budget_Deutschland.xlsx"
+
+def _cell(budget: Path):
+    """Returns the July 2024 hours cell of Karsten Wilmsen-Bolnbach."""
+    return openpyxl.load_workbook(budget)["Timbudget"]["I15"]
+
+def _write(budget: Path, hours: float) -> None:
+    """Writes the hours as a run would, journaling the original cell."""
+    workbook = openpyxl.load_workbook(budget)
+    sheet = workbook["Timbudget"]
+    backup = capture_cells(sheet, ["I15"], str(budget))
+    sheet["I15"] = hours
+    sheet["I15"].number_format = '0.00 "h"'
+    workbook.save(budget)
+    BackupJournal(str(budget)).append_backup(backup)
+
+def test_runs_restored_one_by_one(tmp_path: Path) -> None:
+    """Each restore undoes the latest run still in effect, down to the original cell."""
+    budget = tmp_path / "budget.xlsx"
+    shutil.copy(BUDGET, budget)
+    original = _cell(budget)
+    original_state = (original.value, original.number_format, original.font.name)
+    _write(budget, 90.0)
+    _write(budget, 80.0)
+    journal = BackupJournal(str(budget))
+    assert [backup.backup_id for backup in journal.yield_backups()] == [1, 2]
+    assert journal.restore().backup_id == 2
+    assert _cell(budget).value == 90.0
+    assert journal.restore().backup_id == 1
+    restored = _cell(budget)
+    assert (restored.value, restored.number_format, restored.font.name) == original_state
+
+def test_default_font_restored(tmp_path: Path) -> None:
+    """A cell in the workbook's default font gets that font back, not openpyxl's Calibri."""
+    budget = tmp_path / "budget.xlsx"
+    shutil.copy(BUDGET, budget)
+    workbook = openpyxl.load_workbook(budget)
+    sheet = workbook["Timbudget"]
+    backup = capture_cells(sheet, ["Z30"], str(budget))
+    sheet["Z30"].font = Font(name="Arial", size=12)
+    workbook.save(budget)
+    BackupJournal(str(budget)).append_backup(backup)
+    BackupJournal(str(budget)).restore()
+    font = openpyxl.load_workbook(budget)["Timbudget"]["Z30"].font
+    assert (font.name, font.sz) == ("Aptos Narrow", 11.0)
+
+def test_changed_file_refused(tmp_path: Path) -> None:
+    """A run journals the cells it writes; a file saved since is only restored with force."""
+    budget = tmp_path / "budget.xlsx"
+    shutil.copy(BUDGET, budget)
+    hours = {(7, 2024): {"Karsten Wilmsen-Bolnbach": {"A": 1.0}}}
+    process_output(OutputJob(str(budget), 7, 2024), hours)
+    assert len(next(BackupJournal(str(budget)).yield_backups()).cells) == 1
+    workbook = openpyxl.load_workbook(budget)
+    workbook["Timbudget"]["A1"] = "edited"
+    workbook.save(budget)
+    journal = BackupJournal(str(budget))
+    with pytest.raises(BudgetingFileChanged):
+        journal.restore()
+    journal.restore(force=True)
+    assert _cell(budget).value != 1.0
@@ -0,0 +1,61 @@
+"""Testing of the Booking Management"""
+from datetime import datetime
+from phb_app.data.aggregation import aggregate_bookings
+from phb_app.data.booking_management import build_booking_table, to_date_serial
+from phb_app.data.location_management import CsvFormat
+
+def test_strings_pooled_and_bookings_matched_by_reference() -> None:
+    """Repeated strings are stored once and only complete bookings of the employee are summed."""
+    rows = [
+        ("Ada", "P1", "Design", "7,5", "01.07.2024"),
+        ("Ada", "P1", "Design", 2, datetime(2024, 7, 2)),
+        ("Bob", "P1", "Design", 8, datetime(2024, 7, 2)),
+        ("Ada", "P2", None, None, datetime(2024, 7, 3)),
+        (None, "P3", "Orphan", 1, datetime(2024, 7, 4))
+    ]
+    table = build_booking_table(rows, CsvFormat(decimal_separator=","))
+    assert len(table) == 4
+    assert len(table.pool) == 5
+    assert table.pool[table.names[0]] is table.pool[table.names[1]]
+    assert list(table.yield_project_ids_and_descs()) == [("P1", "Design")] * 3
+    aggregate = aggregate_bookings(table)
+    assert list(aggregate.yield_hours("Ada", ["P1", "P2"], 7, 2024)) == [("P1", 9.5)]
+    assert not list(aggregate.yield_hours("Ada", ["P1"], 8, 2024))
+    assert not list(aggregate.yield_hours("Eve", ["P1"], 7, 2024))
+
+def test_dates_kept_as_serials() -> None:
+    """Dates of any kind become Excel serials; text falls back to ISO 8601."""
+    assert to_date_serial(datetime(2024, 7, 1), "%d.%m.%Y") == 45474.0
+    assert to_date_serial(45474, "%d.%m.%Y") == 45474.0
+    assert to_date_serial("01.07.2024", "%d.%m.%Y") == 45474.0
+    assert to_date_serial("2024-07-01", "%d.%m.%Y") == 45474.0
+    assert to_date_serial("July", "%d.%m.%Y") is None
+
+def test_text_date_format_inferred_per_column() -> None:
+    """The column's format settles ambiguous dates; other formats are read cell by cell."""
+    rows = [
+        ("Ada", "P1", None, 1, "07/31/2024"),
+        ("Ada", "P1", None, 2, "08/07/2024"),
+        ("Ada", "P1", None, 4, "2024-08-09"),
+        ("Ada", "P1", None, 8, "soon")
+    ]
+    table = build_booking_table(rows, CsvFormat(date_format="%d.%m.%Y"))
+    report = table.date_report
+    assert report.date_format == "%m/%d/%Y"
+    assert (report.parsed, report.fallback, report.unparsed) == (2, 1, 1)
+    assert list(aggregate_bookings(table).yield_hours("Ada", ["P1"], 8, 2024)) == [("P1", 6)]
+
+def test_hours_not_numbers_read_in_bulk() -> None:
+    """Text hours are read with the locale's separator; anything else is rejected and reported."""
+    rows = [
+        ("Ada", "P1", None, "7,5", datetime(2024, 7, 1)),
+        ("Ada", "P1", None, " 7,5 ", datetime(2024, 7, 2)),
+        ("Ada", "P1", None, "n/a", datetime(2024, 7, 3)),
+        ("Ada", "P1", None, datetime(2024, 7, 4), datetime(2024, 7, 4)),
+        ("Ada", "P1", None, 3, datetime(2024, 7, 5))
+    ]
+    table = build_booking_table(rows, CsvFormat(decimal_separator=","))
+    report = table.hours_report
+    assert (report.converted, report.rejected) == (2, 2)
+    assert report.examples[0] == "'n/a'"
+    assert list(aggregate_bookings(table).yield_hours("Ada", ["P1"], 7, 2024)) == [("P1", 18.0)]
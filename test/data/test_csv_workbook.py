@@ -0,0 +1,32 @@
+"""Testing of the CSV Workbook"""
+from pathlib import Path
+import pytest
+from phb_app.data.csv_workbook import CsvWorkbook, is_csv_file
+from phb_app.data.location_management import CsvFormat
+
+def test_tsv_rows_streamed_as_text(tmp_path: Path) -> None:
+    """TSV files are tab separated, empty fields are None and rows can be sliced."""
+    export = tmp_path / "sapx_extract.tsv"
+    export.write_text("Name\tHours\nAda\t7,5\nBob\t\n", encoding="utf-8")
+    workbook = CsvWorkbook(str(export))
+    sheet = workbook[workbook.sheetnames[0]]
+    assert workbook.sheetnames == ["sapx_extract"]
+    assert list(sheet.iter_rows(min_row=1, max_row=1)) == [("Name", "Hours")]
+    assert list(sheet.iter_rows(min_row=2)) == [("Ada", "7,5"), ("Bob", None)]
+
+def test_csv_uses_locale_delimiter_and_encoding(tmp_path: Path) -> None:
+    """CSV files are read with the delimiter and encoding of the locale."""
+    export = tmp_path / "sapx_extract.csv"
+    export.write_bytes("Name;Projekt\nJürgen;P1\n".encode("cp1252"))
+    workbook = CsvWorkbook(str(export))
+    workbook.set_format(CsvFormat(delimiter=";", encoding="cp1252"))
+    sheet = workbook["sapx_extract"]
+    assert list(sheet.iter_rows(min_row=2)) == [("Jürgen", "P1")]
+    with pytest.raises(KeyError):
+        _ = workbook["Tabelle1"]
+
+def test_is_csv_file() -> None:
+    """Only CSV and TSV extensions are recognised, regardless of case."""
+    assert is_csv_file("extract.CSV")
+    assert is_csv_file("extract.tsv")
+    assert not is_csv_file("extract.xlsx")
@@ -0,0 +1,59 @@
+"""Testing of the Duplicate Bookings"""
+import shutil
+from datetime import datetime
+from pathlib import Path
+import phb_app.data.duplicate_bookings as dd
+from phb_app.data.aggregation import aggregate_bookings
+from phb_app.data.booking_management import build_booking_table
+from phb_app.data.duplicate_bookings import drop_duplicate_rows, find_duplicate_rows
+from phb_app.data.location_management import CountryData, CsvFormat
+from phb_app.data.workbook_management import WorkbookManager, load_input_context
+from phb_app.utils.hours_utils import aggregate_input_bookings
+
+INPUT = Path(__file__).parents[1] / "German_SAPX_Extract_July_August_2024.xlsx"
+
+def _table(rows: list[tuple]):
+    """Builds a booking table of Ada's bookings on P1."""
+    return build_booking_table(
+        [("Ada", "P1", None, hours, day) for hours, day in rows], CsvFormat()
+    )
+
+def test_overlapping_extracts_summed_once() -> None:
+    """Bookings of a later extract already in an earlier one are dropped, as often as
+    they are there."""
+    july_31, aug_1, aug_2 = datetime(2024, 7, 31), datetime(2024, 8, 1), datetime(2024, 8, 2)
+    july_august = _table([(4.0, july_31), (2.0, aug_1), (2.0, aug_1)])
+    august = _table([(2.0, aug_1), (2.0, aug_1), (2.0, aug_1), (1.0, aug_2)])
+    (first, first_sources), (rows, sources) = find_duplicate_rows([july_august, august])
+    assert not first and not first_sources
+    assert list(rows) == [0, 1] and sources == {0}
+    unique = drop_duplicate_rows(august, aggregate_bookings(august), rows)
+    assert list(unique.yield_hours("Ada", ["P1"], 8, 2024)) == [("P1", 3.0)]
+
+def test_duplicates_found_again_only_on_change(tmp_path: Path, monkeypatch) -> None:
+    """Aggregating unchanged inputs again reuses their duplicates; another order or
+    a rebuilt aggregate finds them again."""
+    calls = []
+    def counted_find(tables):
+        calls.append(len(tables))
+        return find_duplicate_rows(tables)
+    monkeypatch.setattr(dd, "find_duplicate_rows", counted_find)
+    copy = tmp_path / "German_SAPX_Extract_copy.xlsx"
+    shutil.copy(INPUT, copy)
+    wb_mngr = WorkbookManager()
+    try:
+        first, second = (
+            load_input_context(str(file_path), CountryData(), wb_mngr=wb_mngr)
+            for file_path in (INPUT, copy)
+        )
+        aggregate_input_bookings(wb_mngr, [first, second])
+        aggregate_input_bookings(wb_mngr, [first, second])
+        assert len(calls) == 1 and second.managed_sheet.duplicates is not None
+        aggregate_input_bookings(wb_mngr, [second, first])
+        assert len(calls) == 2 and first.managed_sheet.duplicates is not None
+        # As once the first input was reloaded
+        first.managed_sheet.aggregate = None
+        aggregate_input_bookings(wb_mngr, [second, first])
+        assert len(calls) == 3
+    finally:
+        wb_mngr.close()
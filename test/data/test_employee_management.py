@@ -0,0 +1,20 @@
+"""Testing of the Employee Management"""
+from phb_app.data.employee_management import Employee, HoursTable
+from phb_app.wizard.constants.integer_enums import DeviationClass, HoursColour
+
+def test_employees_share_one_table() -> None:
+    """The hours of employees selected together are rows of one table, finalised in place."""
+    table = HoursTable()
+    ada, bob = Employee("Ada", table=table), Employee("Bob", table=table)
+    for employee in (ada, bob):
+        employee.set_date_range([(7, 2024), (8, 2024)])
+        employee.hours.predicted_hours = 100.0
+    ada.hours.accumulated_hours = 98.0
+    for employee in (ada, bob):
+        employee.finalise_hours()
+    assert len(table) == 4
+    assert ada.hours.deviation_class is DeviationClass.NEGLIGIBLE
+    assert ada.hours.acc_hours_colour is HoursColour.DEFAULT
+    assert bob.hours.accumulated_hours is None
+    assert bob.hours.acc_hours_colour is HoursColour.RED
+    assert bob.hours_by_month[(8, 2024)].deviation_class is DeviationClass.NO_HOURS
@@ -0,0 +1,100 @@
+"""Testing of the File Watcher"""
+import math
+import os
+import shutil
+import threading
+from pathlib import Path
+from openpyxl import load_workbook
+from phb_app.data.file_watcher import FileWatcher
+from phb_app.data.location_management import CountryData
+from phb_app.data.workbook_management import WorkbookManager, load_input_context
+from phb_app.data.worksheet_management import InputWorksheetService
+from phb_app.wizard.constants.ui_strings import IORole
+
+INPUT = Path(__file__).parent.parent / "German_SAPX_Extract_July_August_2024.xlsx"
+
+def _touch(file_path: Path, content: bytes, mtime_ns: int) -> None:
+    """Write the content and set a distinct modification time."""
+    file_path.write_bytes(content)
+    os.utime(file_path, ns=(mtime_ns, mtime_ns))
+
+def test_change_reported_once_stable(tmp_path: Path) -> None:
+    """A change is only reported after the file kept its fingerprint for one poll."""
+    extract = tmp_path / "sapx_extract.xlsx"
+    _touch(extract, b"first", 1_000_000_000)
+    watcher = FileWatcher(lambda _path: None)
+    watcher.watch(str(extract))
+    try:
+        assert not watcher._poll() # pylint: disable=protected-access
+        _touch(extract, b"second export", 2_000_000_000)
+        # Still being written
+        assert not watcher._poll() # pylint: disable=protected-access
+        assert watcher._poll() == [str(extract)] # pylint: disable=protected-access
+        # Reported only once
+        assert not watcher._poll() # pylint: disable=protected-access
+    finally:
+        watcher.stop()
+
+def test_unwatched_file_not_reported(tmp_path: Path) -> None:
+    """Files no longer watched are ignored."""
+    extract = tmp_path / "sapx_extract.xlsx"
+    _touch(extract, b"first", 1_000_000_000)
+    watcher = FileWatcher(lambda _path: None)
+    watcher.watch(str(extract))
+    watcher.unwatch(str(extract))
+    try:
+        _touch(extract, b"second export", 2_000_000_000)
+        assert not watcher._poll() # pylint: disable=protected-access
+        assert not watcher._poll() # pylint: disable=protected-access
+    finally:
+        watcher.stop()
+
+def _sum_hours(table) -> float:
+    """Sum of the hours of the bookings, without the missing ones."""
+    return sum(hours for hours in table.hours if not math.isnan(hours))
+
+def _lock_free(wb_mngr: WorkbookManager) -> bool:
+    """Whether another thread can take the manager's lock right now."""
+    acquired = []
+    def probe() -> None:
+        if wb_mngr.lock.acquire(timeout=1):
+            acquired.append(True)
+            wb_mngr.lock.release()
+    thread = threading.Thread(target=probe)
+    thread.start()
+    thread.join()
+    return bool(acquired)
+
+def test_changed_input_reingested(tmp_path: Path, monkeypatch) -> None:
+    """An input changed on disk is ingested again and the invalidation hooks are called."""
+    extract = tmp_path / "German_SAPX_Extract.xlsx"
+    shutil.copy(INPUT, extract)
+    wb_mngr = WorkbookManager()
+    reloaded = threading.Event()
+    calls = []
+    def hook(role, uuid) -> None:
+        calls.append((role, uuid))
+        reloaded.set()
+    # Whether the lock was free while the bookings were parsed on the reload worker
+    unlocked = []
+    ingest = InputWorksheetService.ingest_bookings
+    def watched_ingest(service: InputWorksheetService, locale_data) -> None:
+        if threading.current_thread() is not threading.main_thread():
+            unlocked.append(_lock_free(wb_mngr))
+        ingest(service, locale_data)
+    monkeypatch.setattr(InputWorksheetService, "ingest_bookings", watched_ingest)
+    try:
+        ctx = load_input_context(str(extract), CountryData(), wb_mngr=wb_mngr)
+        wb_mngr.add_workbook(IORole.INPUTS, ctx)
+        wb_mngr.add_invalidation_hook(hook)
+        before = _sum_hours(ctx.managed_sheet.bookings)
+        workbook = load_workbook(extract)
+        workbook.active["E2"] = workbook.active["E2"].value + 10
+        workbook.save(extract)
+        assert reloaded.wait(15)
+        assert calls == [(IORole.INPUTS, ctx.mngd_wb.uuid)]
+        assert ctx.mngd_wb.revision == 1
+        assert unlocked == [True]
+        assert abs(_sum_hours(ctx.managed_sheet.bookings) - before - 10) < 1e-6
+    finally:
+        wb_mngr.close()
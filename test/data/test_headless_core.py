@@ -0,0 +1,42 @@
+"""Testing of the Qt-free data model"""
+import os
+import pickle
+import subprocess
+import sys
+from pathlib import Path
+from phb_app.data.employee_management import Employee
+from phb_app.wizard.constants.integer_enums import HoursColour
+
+CORE_MODULES = (
+    "phb_app.data.workbook_management",
+    "phb_app.data.worksheet_management",
+    "phb_app.data.employee_management",
+    "phb_app.utils.hours_utils",
+    "phb_app.utils.output_utils",
+    "phb_app.logging.logger",
+    "phb_app.batch"
+)
+
+def test_core_imports_without_qt() -> None:
+    """The data and computation modules load no PyQt6 module."""
+    code = (
+        f"import sys\nfor name in {CORE_MODULES!r}: __import__(name)\n"
+        "print([m for m in sys.modules if m.startswith('PyQt6')])"
+    )
+    # The child imports phb_app as this process does, wherever pytest was started from
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, sys.path))}
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True,
+        cwd=Path(__file__).parents[2], env=env
+    ).stdout
+    assert output.strip() == "[]"
+
+def test_employee_pickles() -> None:
+    """Employees with their hours and colours survive the trip to a worker process."""
+    employee = Employee("Ada")
+    employee.set_date_range([(7, 2024), (8, 2024)])
+    employee.hours.acc_hours_colour = HoursColour.RED
+    employee.hours.accumulated_hours = 7.5
+    copy = pickle.loads(pickle.dumps(employee))
+    assert copy.hours.acc_hours_colour is HoursColour.RED
+    assert copy.hours_by_month[(7, 2024)].accumulated_hours == 7.5
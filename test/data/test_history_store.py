@@ -0,0 +1,72 @@
+"""Testing of the History Store"""
+from datetime import datetime
+from phb_app.data.aggregation import aggregate_bookings
+from phb_app.data.booking_management import BookingTable, to_date_serial
+from phb_app.data.history_store import HistoryStore
+
+def _table(hours: float) -> BookingTable:
+    """Builds bookings of one employee in July and August 2024."""
+    table = BookingTable()
+    table.append("Ada", "P1", "Design", hours, to_date_serial(datetime(2024, 7, 3), ""))
+    table.append("Ada", "P1", None, 2.0, to_date_serial(datetime(2024, 8, 5), ""))
+    table.append("Ada", "P2", "Review", None, to_date_serial(datetime(2024, 8, 6), ""))
+    return table
+
+def test_round_trip_and_latest_source_per_month() -> None:
+    """Stored bookings and sums load back unchanged; a newer version of the extract replaces
+    the months it covers."""
+    store = HistoryStore(":memory:")
+    table = _table(5.0)
+    first = store.save("july_august.xlsx", (1, 10), "Germany", table, aggregate_bookings(table))
+    assert store.find_source("july_august.xlsx", (1, 10)) == first
+    assert store.find_source("july_august.xlsx", (2, 10)) is None
+    loaded = store.load_bookings(first)
+    assert [loaded.pool[ref] for ref in loaded.descriptions if ref >= 0] == ["Design", "Review"]
+    assert list(loaded.hours)[:2] == [5.0, 2.0] and list(loaded.hours)[2] != list(loaded.hours)[2]
+    assert store.load_aggregate(first, loaded.pool).sums == aggregate_bookings(loaded).sums
+    # A corrected version of the extract
+    newer = _table(7.5)
+    store.save("july_august.xlsx", (3, 10), "Germany", newer, aggregate_bookings(newer))
+    assert store.query_hours("Ada", start=(7, 2024), end=(8, 2024)) == [
+        (2024, 7, "P1", 7.5), (2024, 8, "P1", 2.0)
+    ]
+    assert store.query_hours("Ada", ["P2"]) == []
+    store.close()
+
+def test_oldest_sources_pruned() -> None:
+    """Only the most recently stored workbook versions are kept, with their months."""
+    store = HistoryStore(":memory:", max_sources=2)
+    for version, hours in enumerate((1.0, 2.0, 3.0)):
+        table = _table(hours)
+        aggregate = aggregate_bookings(table)
+        store.save("extract.xlsx", (version, 10), "Germany", table, aggregate)
+    assert store.find_source("extract.xlsx", (0, 10)) is None
+    assert store.find_source("extract.xlsx", (2, 10)) is not None
+    assert store.query_hours("Ada", start=(7, 2024), end=(7, 2024)) == [(2024, 7, "P1", 3.0)]
+    store.close()
+
+def test_source_keyed_by_locale() -> None:
+    """A workbook read with another locale, e.g. country or CSV format, is another version."""
+    store = HistoryStore(":memory:")
+    table = _table(5.0)
+    aggregate = aggregate_bookings(table)
+    source_id = store.save("extract.csv", (1, 10), "Germany", table, aggregate, "de")
+    assert store.find_source("extract.csv", (1, 10), "de") == source_id
+    assert store.find_source("extract.csv", (1, 10), "en") is None
+    store.close()
+
+def test_other_extracts_of_month_kept() -> None:
+    """Another extract of the same country and month adds its hours, rather than replacing
+    those of the extract stored before it."""
+    store = HistoryStore(":memory:")
+    for file_name, hours in (("team_a.xlsx", 5.0), ("team_b.xlsx", 1.5)):
+        table = _table(hours)
+        store.save(file_name, (1, 10), "Germany", table, aggregate_bookings(table))
+    assert store.query_hours("Ada", start=(7, 2024), end=(8, 2024)) == [
+        (2024, 7, "P1", 6.5), (2024, 8, "P1", 4.0)
+    ]
+    # A newer version of one of them only replaces its own hours
+    table = _table(2.5)
+    store.save("team_a.xlsx", (2, 10), "Germany", table, aggregate_bookings(table))
+    assert store.query_hours("Ada", start=(7, 2024), end=(7, 2024)) == [(2024, 7, "P1", 4.0)]
+    store.close()
@@ -0,0 +1,18 @@
+"""Testing of the Ingestion Settings"""
+import phb_app.data.ingestion_settings as ing
+
+def test_configuration_read_once(monkeypatch) -> None:
+    """The settings accessor reads the configuration file once, then hands out the same settings."""
+    reads = []
+    process_yaml = ing.IngestionSettings._process_yaml  # pylint: disable=protected-access
+    def counted(settings: ing.IngestionSettings, yaml_data) -> None:
+        reads.append(True)
+        process_yaml(settings, yaml_data)
+    monkeypatch.setattr(ing.IngestionSettings, "_process_yaml", counted)
+    ing.get_ingestion_settings.cache_clear()
+    try:
+        settings = ing.get_ingestion_settings()
+        assert ing.get_ingestion_settings() is settings
+        assert len(reads) == 1
+    finally:
+        ing.get_ingestion_settings.cache_clear()
@@ -0,0 +1,14 @@
+"""Testing of the Name Index"""
+from phb_app.data.name_index import NameIndex
+
+def test_near_matches_ranked() -> None:
+    """Misspelt, reordered and unaccented names find their input names, best first."""
+    index = NameIndex([
+        "Karsten Wilmsen-Bolnbach", "Karl Wilms", "Zoë Müller", "Aldo Bauer", "Aldo Bauer"
+    ])
+    assert len(index) == 4 and "Aldo Bauer" in index
+    assert index.suggest("Wilmsen-Bolnbach, Karsten")[0] == ("Karsten Wilmsen-Bolnbach", 1.0)
+    suggested = [name for name, _ in index.suggest("Karsten Wilmsen Bolnbak")]
+    assert suggested[:2] == ["Karsten Wilmsen-Bolnbach", "Karl Wilms"]
+    assert index.suggest("Zoe Mueller")[0][0] == "Zoë Müller"
+    assert index.suggest("Reuben Berry") == []
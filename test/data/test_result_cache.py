@@ -0,0 +1,32 @@
+"""Testing of the Result Cache"""
+from pathlib import Path
+from phb_app.data.result_cache import CacheKey, NamedCache, get_cache, invalidate_file
+from phb_app.utils.file_handling_utils import get_file_fingerprint
+
+def test_least_recently_used_evicted() -> None:
+    """Beyond the maximum, the least recently used entry is dropped and computed again."""
+    cache = NamedCache("test", max_entries=2)
+    computed = []
+    def compute(sheet: str) -> str:
+        computed.append(sheet)
+        return sheet
+    for sheet in ("A", "B", "A", "C", "A", "B"):
+        key = CacheKey("budget.xlsx", (1, 1), sheet)
+        cache.get_or_compute(key, lambda sheet=sheet: compute(sheet))
+    assert computed == ["A", "B", "C", "B"]
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.evictions) == (2, 4, 2)
+
+def _key(budget: Path) -> CacheKey:
+    """Returns the key of the file as it is on disk."""
+    return CacheKey(str(budget), get_file_fingerprint(str(budget)), "Timbudget")
+
+def test_changed_file_missed(tmp_path: Path) -> None:
+    """A file changed on disk gets a new key; invalidation drops the entries of a file."""
+    budget = tmp_path / "budget.xlsx"
+    budget.write_bytes(b"1")
+    cache = get_cache("test_changed_file")
+    assert cache.get_or_compute(_key(budget), lambda: 1) == 1
+    budget.write_bytes(b"22")
+    assert cache.get_or_compute(_key(budget), lambda: 2) == 2
+    invalidate_file(str(budget))
+    assert len(cache) == 0 and cache.stats.invalidations == 2
@@ -0,0 +1,14 @@
+"""Testing of the precomputed worksheet layouts"""
+from pathlib import Path
+from phb_app.data.worksheet_management import precompute_sheet_layouts
+
+BUDGET = Path(__file__).parents[1] / "budget_Deutschland.xlsx"
+
+def test_layouts_of_every_sheet() -> None:
+    """The employees and budgeting dates of each worksheet are read without Excel."""
+    layouts = precompute_sheet_layouts(str(BUDGET))
+    layout = layouts["Timbudget"]
+    assert layout.error is None
+    assert ("I7", "Karsten Wilmsen-Bolnbach") in layout.employees
+    assert (7, 2024, 15) in layout.budgeting_dates
+    assert (8, 2024, 16) in layout.budgeting_dates
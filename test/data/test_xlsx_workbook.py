@@ -0,0 +1,37 @@
+"""Testing of the Fast Xlsx Workbook"""
+from datetime import datetime
+from pathlib import Path
+from openpyxl import Workbook, load_workbook
+from phb_app.data.xlsx_workbook import FastXlsxWorkbook
+
+GERMAN_EXTRACT = Path(__file__).parents[1] / "German_SAPX_Extract_July_August_2024.xlsx"
+
+def test_projected_rows_match_openpyxl() -> None:
+    """Projected columns hold the same typed values, including dates, as openpyxl reads."""
+    expected_sheet = load_workbook(GERMAN_EXTRACT, read_only=True)["Tabelle1"]
+    workbook = FastXlsxWorkbook(str(GERMAN_EXTRACT))
+    sheet = workbook["Tabelle1"]
+    header = next(sheet.iter_rows(max_row=1))
+    columns = tuple(
+        header.index(name) for name in ("Name der Person", "Buchdatum", "Stunden gesamt")
+    )
+    expected = [
+        tuple(row[col] if col < len(row) else None for col in columns)
+        for row in expected_sheet.iter_rows(min_row=2, values_only=True)
+    ]
+    assert workbook.sheetnames == ["Tabelle1"]
+    assert list(sheet.iter_projected_rows(columns, min_row=2)) == expected
+    workbook.close()
+
+def test_iso_dates_read(tmp_path: Path) -> None:
+    """Dates stored as ISO 8601 text cells (t="d") are read as datetimes, or as serial numbers."""
+    workbook = Workbook()
+    workbook.iso_dates = True
+    workbook.active.append(["Ada", datetime(2024, 7, 3)])
+    file_path = tmp_path / "iso_dates.xlsx"
+    workbook.save(file_path)
+    fast = FastXlsxWorkbook(str(file_path))
+    sheet = fast[fast.sheetnames[0]]
+    assert list(sheet.iter_rows()) == [("Ada", datetime(2024, 7, 3))]
+    assert list(sheet.iter_projected_rows((1,), serial_columns=frozenset({1}))) == [(45476.0,)]
+    fast.close()
@@ -0,0 +1,51 @@
+"""Testing of the batch run"""
+import json
+import shutil
+from pathlib import Path
+import openpyxl
+from phb_app.batch import main
+
+TEST_DIR = Path(__file__).parent
+INPUT = TEST_DIR / "German_SAPX_Extract_July_August_2024.xlsx"
+BUDGET = TEST_DIR / "budget_Deutschland.xlsx"
+
+def test_output_recorded_twice(tmp_path: Path) -> None:
+    """A budgeting file saved by a batch run, without the values Excel computed, can be
+    recorded in again, its dates computed from their formulae."""
+    budget = tmp_path / BUDGET.name
+    shutil.copy(BUDGET, budget)
+    argv = [str(INPUT), "--month", "8", "--year", "2024", "--output", str(budget)]
+    assert main(argv) == 0
+    first = openpyxl.load_workbook(budget)["Timbudget"]["I16"].value
+    assert main(argv) == 0
+    assert openpyxl.load_workbook(budget)["Timbudget"]["I16"].value == first
+
+def test_outputs_with_own_projects(tmp_path: Path) -> None:
+    """Each budgeting file of one run receives only the hours of its own project IDs."""
+    api, front = tmp_path / "budget_api.xlsx", tmp_path / "budget_front.xlsx"
+    for budget in (api, front):
+        shutil.copy(BUDGET, budget)
+    assert main([
+        str(INPUT), "--month", "8", "--year", "2024",
+        "--output", f"{api}:TEST_API_AUT", "--output", f"{front}:DEV_JS_FRONT"
+    ]) == 0
+    original = openpyxl.load_workbook(BUDGET)["Timbudget"]
+    api_sheet, front_sheet = (
+        openpyxl.load_workbook(budget)["Timbudget"] for budget in (api, front)
+    )
+    # Karsten Wilmsen-Bolnbach only booked on TEST_API_AUT, Aldo Bauer only on DEV_JS_FRONT
+    assert api_sheet["I16"].value == 101.56 and api_sheet["D16"].value == original["D16"].value
+    assert front_sheet["D16"].value == 102.31 and front_sheet["I16"].value == original["I16"].value
+
+def test_input_names_not_reported_missing(tmp_path: Path, capsys) -> None:
+    """Employees of the inputs without hours on the selected projects are not reported as
+    missing from the inputs; only names in no input are."""
+    budget = tmp_path / BUDGET.name
+    shutil.copy(BUDGET, budget)
+    argv = [
+        str(INPUT), "--month", "8", "--year", "2024", "--project", "TEST_API_AUT",
+        "--output", str(budget), "--dry-run", "--json"
+    ]
+    assert main(argv) == 0
+    missing = json.loads(capsys.readouterr().out)[0]["suggestions"]
+    assert "Aldo Bauer" not in missing and "Casey Lewis" in missing
@@ -0,0 +1,18 @@
+"""Testing of the profiled batch run"""
+import pstats
+import shutil
+from pathlib import Path
+from phb_app.batch import main
+
+INPUT = Path(__file__).parent / "German_SAPX_Extract_July_August_2024.xlsx"
+
+def test_profile_written_next_to_input(tmp_path: Path, capsys) -> None:
+    """With --profile the run's profile and its tagged summary are written next to the input."""
+    extract = tmp_path / INPUT.name
+    shutil.copy(INPUT, extract)
+    assert main([str(extract), "--month", "7", "--year", "2024", "--profile"]) == 0
+    assert "Profile written to" in capsys.readouterr().err
+    profile, = tmp_path.glob("profile_*.prof")
+    assert pstats.Stats(str(profile)).total_calls > 0
+    summary = profile.with_suffix(".txt").read_text(encoding="utf-8")
+    assert f"* Input {INPUT.name}: {INPUT.stat().st_size} bytes" in summary
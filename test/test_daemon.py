@@ -0,0 +1,176 @@
+"""Testing of the Daemon"""
+import json
+import os
+import shutil
+import socket
+import sqlite3
+import stat
+import threading
+from pathlib import Path
+from xml.etree import ElementTree
+import openpyxl
+import pytest
+import phb_app.data.aggregation as agg
+import phb_app.data.workbook_management as wm
+from phb_app.data.location_management import CountryData
+from phb_app.data.worksheet_management import InputWorksheetService
+from phb_app.daemon import (
+    AggregationService, DaemonClient, DaemonServer, get_token_path, write_token
+)
+from phb_app.logging.exceptions import DaemonUnavailable
+from phb_app.wizard.constants.ui_strings import IORole
+
+INPUT = Path(__file__).parent / "German_SAPX_Extract_July_August_2024.xlsx"
+
+def test_duplicates_only_among_requested_inputs(tmp_path: Path) -> None:
+    """Bookings of a requested input also in another requested input are summed once, as in
+    the batch; inputs loaded for earlier requests do not count."""
+    copy = tmp_path / "German_SAPX_Extract_copy.xlsx"
+    shutil.copy(INPUT, copy)
+    service = AggregationService()
+    try:
+        request = {"op": "aggregate", "month": 7, "year": 2024, "employees": ["Aldo Bauer"]}
+        single = service.handle({**request, "inputs": [str(INPUT)]})
+        both = service.handle({**request, "inputs": [str(INPUT), str(copy)]})
+        copy_only = service.handle({**request, "inputs": [str(copy)]})
+    finally:
+        service.close()
+    expected = {"Aldo Bauer": {"DEV_JS_FRONT": 109.08}}
+    for response in (single, both, copy_only):
+        assert response["ok"]
+        hours = response["result"]["employees"]
+        rounded = {
+            name: {proj: round(value, 2) for proj, value in projects.items()}
+            for name, projects in hours.items()
+        }
+        assert rounded == expected
+        # Every name of the inputs, not only of the employees requested
+        assert "Karsten Wilmsen-Bolnbach" in response["result"]["names"]
+
+def test_input_reloaded_by_watcher_kept(tmp_path: Path) -> None:
+    """An input the watcher already reloaded after a change is not loaded again."""
+    extract = tmp_path / "German_SAPX_Extract.xlsx"
+    shutil.copy(INPUT, extract)
+    service = AggregationService()
+    reloaded = threading.Event()
+    service.wb_mngr.add_invalidation_hook(lambda _role, _uuid: reloaded.set())
+    try:
+        request = {"op": "projects", "inputs": [str(extract)]}
+        assert service.handle(request)["ok"]
+        ctx = next(service.wb_mngr.yield_workbook_ctxs_by_role(IORole.INPUTS))
+        workbook = openpyxl.load_workbook(extract)
+        workbook.active["E2"] = workbook.active["E2"].value + 10
+        workbook.save(extract)
+        assert reloaded.wait(15)
+        assert service.handle(request)["ok"]
+        assert list(service.wb_mngr.yield_workbook_ctxs_by_role(IORole.INPUTS)) == [ctx]
+        assert ctx.mngd_wb.revision == 1
+    finally:
+        service.close()
+
+def test_inputs_not_swapped_while_answering(monkeypatch) -> None:
+    """The manager's lock is held from loading the inputs until their hours are collected,
+    so that the watcher cannot swap in a reloaded input without its sums meanwhile."""
+    locked = []
+    collect = agg.collect_month_hours
+    def probe() -> None:
+        acquired = service.wb_mngr.lock.acquire(timeout=0.1)
+        locked.append(not acquired)
+        if acquired:
+            service.wb_mngr.lock.release()
+    def probed_collect(*args):
+        probe_thread = threading.Thread(target=probe)
+        probe_thread.start()
+        probe_thread.join()
+        return collect(*args)
+    monkeypatch.setattr(agg, "collect_month_hours", probed_collect)
+    service = AggregationService()
+    try:
+        response = service.handle(
+            {"op": "aggregate", "inputs": [str(INPUT)], "month": 7, "year": 2024}
+        )
+    finally:
+        service.close()
+    assert response["ok"] and locked == [True]
+
+def test_load_errors_answered(monkeypatch) -> None:
+    """Errors of the history store, the xlsx reader and the file system are returned
+    in the response instead of ending the handler."""
+    errors = [
+        sqlite3.OperationalError("database is locked"),
+        ElementTree.ParseError("no element found"),
+        IsADirectoryError("is a directory")
+    ]
+    service = AggregationService()
+    try:
+        for error in errors:
+            def failing_load(*_args, error=error) -> None:
+                raise error
+            monkeypatch.setattr(wm, "load_input_context", failing_load)
+            response = service.handle({"op": "projects", "inputs": [str(INPUT)]})
+            assert response == {"ok": False, "error": str(error)}
+    finally:
+        service.close()
+
+def test_wizard_takes_bookings_from_daemon(tmp_path: Path, monkeypatch) -> None:
+    """With a daemon running, an input is parsed by the daemon and only decoded when
+    loaded by a workbook manager; without one, it is parsed as before."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("USERPROFILE", str(tmp_path))
+    parsed_in = []
+    ingest = InputWorksheetService.ingest_bookings
+    def watched_ingest(service: InputWorksheetService, locale_data) -> None:
+        parsed_in.append(threading.current_thread().name)
+        ingest(service, locale_data)
+    monkeypatch.setattr(InputWorksheetService, "ingest_bookings", watched_ingest)
+    service = AggregationService()
+    wb_mngr = wm.WorkbookManager()
+    with DaemonServer(service, 0, "secret") as server:
+        port = server.server_address[1]
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            write_token(port, "secret")
+            wb_mngr.daemon = DaemonClient(port)
+            taken = wm.load_input_context(str(INPUT), CountryData(), wb_mngr=wb_mngr)
+            assert threading.current_thread().name not in parsed_in
+            # As once the daemon stopped
+            os.remove(get_token_path(port))
+            parsed = wm.load_input_context(str(INPUT), CountryData(), wb_mngr=wb_mngr)
+            assert threading.current_thread().name in parsed_in
+        finally:
+            server.shutdown()
+            service.close()
+            wb_mngr.close()
+    taken_names, parsed_names = (
+        [table.pool[ref] for ref in table.names]
+        for table in (taken.managed_sheet.bookings, parsed.managed_sheet.bookings)
+    )
+    assert len(taken_names) > 100 and taken_names == parsed_names
+    # Missing hours are NaN, which only compare equal as bytes
+    hours = (taken.managed_sheet.bookings.hours, parsed.managed_sheet.bookings.hours)
+    assert hours[0].tobytes() == hours[1].tobytes()
+    assert taken.managed_sheet.selectable_project_ids == parsed.managed_sheet.selectable_project_ids
+
+def test_requests_without_token_refused(tmp_path: Path, monkeypatch) -> None:
+    """Only clients reading the token file of the daemon's user are answered."""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("USERPROFILE", str(tmp_path))
+    service = AggregationService()
+    with DaemonServer(service, 0, "secret") as server:
+        port = server.server_address[1]
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            with pytest.raises(DaemonUnavailable):
+                DaemonClient(port).request({"op": "ping"})
+            write_token(port, "secret")
+            assert stat.S_IMODE(os.stat(get_token_path(port)).st_mode) == 0o600 or os.name == "nt"
+            assert DaemonClient(port).request({"op": "ping"}) == "pong"
+            with socket.create_connection(("127.0.0.1", port)) as sock:
+                sock.sendall(b'{"op": "shutdown", "token": "guess"}\n')
+                assert not json.loads(sock.makefile("rb").readline())["ok"]
+            assert DaemonClient(port).is_running()
+        finally:
+            server.shutdown()
+            service.close()
@@ -0,0 +1,51 @@
+"""Testing of the headless Engine"""
+import shutil
+from pathlib import Path
+import pytest
+from phb_app.engine import BudgetEngine, BudgetResult
+from phb_app.logging.exceptions import EmployeeNotFound, ProjectNotFound
+from phb_app.wizard.constants.ui_strings import IORole
+
+DATA = Path(__file__).parent
+
+def _selected(engine: BudgetEngine) -> list[dict]:
+    """The selected project IDs of each input."""
+    inputs = engine.wb_mngr.yield_workbook_ctxs_by_role(IORole.INPUTS)
+    return [ctx.managed_sheet.selected_project_ids for ctx in inputs]
+
+def _compute(budget: Path) -> BudgetResult:
+    """Computes Karsten's hours on TEST_API_AUT from July to September 2024."""
+    with BudgetEngine() as engine:
+        engine.add_input(str(DATA / "German_SAPX_Extract_July_August_2024.xlsx"))
+        engine.select_projects(project.proj_id for project in engine.projects())
+        selected = _selected(engine)
+        with pytest.raises(ProjectNotFound):
+            engine.select_projects(["TEST_API_AUT", "NO_SUCH_PROJECT"])
+        # A failed selection keeps the previous one
+        assert _selected(engine) == selected
+        engine.select_projects(["TEST_API_AUT"])
+        engine.set_output(str(budget), month=7, year=2024, months=3)
+        with pytest.raises(EmployeeNotFound):
+            engine.select_employees(["Nobody"])
+        engine.select_employees(["Karsten Wilmsen-Bolnbach"])
+        return engine.compute()
+
+def test_compute_by_value(tmp_path: Path) -> None:
+    """Projects and employees are selected by value; each month lists its own projects."""
+    budget = tmp_path / "budget.xlsx"
+    shutil.copy(DATA / "budget_Deutschland.xlsx", budget)
+    rows = list(_compute(budget).rows())
+    hours = [(row.month, row.hours_coord, row.accumulated_hours and round(row.accumulated_hours, 2))
+             for row in rows]
+    assert hours == [(7, "I15", 97.28), (8, "I16", 101.56), (9, "I17", None)]
+    assert [row.projects for row in rows] == [("TEST_API_AUT",), ("TEST_API_AUT",), ()]
+
+def test_columns_share_buffers(tmp_path: Path) -> None:
+    """The NumPy columns are views of the result's buffers."""
+    pytest.importorskip("numpy")
+    budget = tmp_path / "budget.xlsx"
+    shutil.copy(DATA / "budget_Deutschland.xlsx", budget)
+    result = _compute(budget)
+    columns = result.as_numpy()
+    result.accumulated_hours[0] = 1.0
+    assert columns["accumulated_hours"][0] == 1.0
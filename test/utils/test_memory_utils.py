@@ -0,0 +1,32 @@
+"""Testing of the Memory Utilities"""
+from pathlib import Path
+from phb_app.data.ingestion_settings import IngestionSettings
+from phb_app.data.location_management import CountryData
+from phb_app.data.workbook_management import WorkbookManager, load_input_context
+from phb_app.utils.memory_utils import (
+    MemoryUsage, WorkbookMemory, format_process_memory, format_workbook_memory
+)
+
+INPUT = Path(__file__).parents[1] / "German_SAPX_Extract_July_August_2024.xlsx"
+
+def test_budget_checked_after_each_ingestion() -> None:
+    """Over the memory budget, each input is released as soon as it is ingested."""
+    settings = IngestionSettings()
+    settings.memory_budget_mb = 0
+    wb_mngr = WorkbookManager(settings)
+    try:
+        ctx = load_input_context(str(INPUT), CountryData(), wb_mngr=wb_mngr)
+        assert ctx.mngd_wb.workbook_object is None and ctx.mngd_wb.memory.released
+        assert ctx.managed_sheet.selectable_project_ids
+        # The process memory is kept once, by the manager
+        assert wb_mngr.memory.peak is not None
+    finally:
+        wb_mngr.close()
+
+def test_memory_formatted() -> None:
+    """Workbooks report the memory their loading added; the process its resident and peak memory."""
+    memory = WorkbookMemory(loaded=2 * 1024 * 1024, released=True)
+    expected = "in.xlsx: loaded 2.0 MB; released after ingestion"
+    assert format_workbook_memory("in.xlsx", memory) == expected
+    usage = MemoryUsage(peak=1024 * 1024)
+    assert format_process_memory(usage) == "Process: resident n/a, peak 1.0 MB"
@@ -0,0 +1,40 @@
+"""Testing of the Output Utilities"""
+import shutil
+from pathlib import Path
+import openpyxl
+from phb_app.utils.output_utils import OutputJob, process_output
+
+BUDGET = Path(__file__).parents[1] / "budget_Deutschland.xlsx"
+
+def test_hours_recorded_for_each_month(tmp_path: Path) -> None:
+    """Every month of the range is written into its own date row, in one save."""
+    budget = tmp_path / "budget.xlsx"
+    shutil.copy(BUDGET, budget)
+    month_hours = {
+        (7, 2024): {"Karsten Wilmsen-Bolnbach": {"A": 90.0, "B": 7.5}},
+        (8, 2024): {"Karsten Wilmsen-Bolnbach": {"A": 101.5}, "Unknown Person": {"A": 1.0}}
+    }
+    result = process_output(OutputJob(str(budget), 7, 2024, months=2), month_hours)
+    assert result.error is None
+    assert result.written == 2
+    sheet = openpyxl.load_workbook(budget)["Timbudget"]
+    assert (sheet["I15"].value, sheet["I16"].value) == (97.5, 101.5)
+
+def test_missing_month_reported(tmp_path: Path) -> None:
+    """A month missing in the budgeting file fails only this file, without writing."""
+    budget = tmp_path / "budget.xlsx"
+    shutil.copy(BUDGET, budget)
+    result = process_output(OutputJob(str(budget), 12, 2025, months=2), {})
+    assert result.error and not result.entries
+
+def test_dry_run_lists_changes_without_saving(tmp_path: Path) -> None:
+    """A dry run returns the cells which would change, from what to what, and leaves
+    the file untouched."""
+    budget = tmp_path / "budget.xlsx"
+    shutil.copy(BUDGET, budget)
+    before = budget.read_bytes()
+    month_hours = {(7, 2024): {"Karsten Wilmsen-Bolnbach": {"A": 90.0}}}
+    result = process_output(OutputJob(str(budget), 7, 2024, dry_run=True), month_hours)
+    assert [(change.coord, change.new_value) for change in result.changes] == [("I15", 90.0)]
+    assert result.changes[0].new_style.startswith('0.00 "h"; Arial 12')
+    assert budget.read_bytes() == before
@@ -0,0 +1,17 @@
+"""Testing of the Style Utilities"""
+from openpyxl.styles import Font
+from openpyxl.styles.colors import Color
+from phb_app.utils.style_utils import classify_font
+from phb_app.wizard.constants.integer_enums import FontClass
+
+def test_fonts_classified_by_colour() -> None:
+    """Default and black fonts are recorded, lightened and grey fonts planned."""
+    assert classify_font(Font()) == FontClass.RECORDED
+    assert classify_font(Font(color=Color(theme=1))) == FontClass.RECORDED
+    assert classify_font(Font(color="FF000000")) == FontClass.RECORDED
+    assert classify_font(Font(color=Color(theme=3, tint=0.5))) == FontClass.PLANNED
+    assert classify_font(Font(color="FF808080")) == FontClass.PLANNED
+    # White, Background 1, Darker 35%
+    assert classify_font(Font(color=Color(theme=0, tint=-0.35))) == FontClass.PLANNED
+    assert classify_font(Font(color=Color(theme=3, tint=-0.25))) == FontClass.OTHER
+    assert classify_font(Font(color="FFFF0000")) == FontClass.OTHER